@@ -1,10 +1,32 @@
 # ast_nodes.py
 
+# Filled in by the parser from the tokens: line and col of the node's first token, and end,
+# the line of its last token. Nodes built elsewhere (e.g. by the optimizer) read them as None.
+POSITION_FIELDS = ('line', 'col', 'end')
+
+# Attached by analyses and read as None until then
+ANNOTATION_FIELDS = ('operand_types', 'op_func', 'feedback')
+
 class ASTNode:
-    """Base class for all AST nodes."""
-    pass
+    """Base class for all AST nodes.
+
+    Nodes use __slots__: a class lists its children first, then any
+    attributes the resolver attaches (slot, depth, scope), the operand
+    types proven by type inference (operand_types, None until inferred, and
+    op_func, the operator function they allow) and the runtime type feedback
+    of the adaptive mode (feedback, see quickening.py).
+    """
+    __slots__ = POSITION_FIELDS
+
+    def __getattr__(self, name):
+        # Only called for unset slots and unknown names
+        if name in POSITION_FIELDS or name in ANNOTATION_FIELDS:
+            return None
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
 
 class Number(ASTNode):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
@@ -12,6 +34,8 @@ class Number(ASTNode):
         return f'Number({self.value})'
 
 class String(ASTNode):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
@@ -19,6 +43,8 @@ class String(ASTNode):
         return f'String("{self.value}")'
 
 class Boolean(ASTNode):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
@@ -26,6 +52,8 @@ class Boolean(ASTNode):
         return f'Boolean({self.value})'
 
 class Variable(ASTNode):
+    __slots__ = ('name', 'depth', 'slot')
+
     def __init__(self, name):
         self.name = name
 
@@ -33,6 +61,8 @@ class Variable(ASTNode):
         return f'Variable("{self.name}")'
 
 class Array(ASTNode):
+    __slots__ = ('elements',)
+
     def __init__(self, elements):
         self.elements = elements
 
@@ -40,6 +70,8 @@ class Array(ASTNode):
         return f'Array({self.elements})'
 
 class AttributeAccess(ASTNode):
+    __slots__ = ('obj', 'attribute')
+
     def __init__(self, obj, attribute):
         self.obj = obj
         self.attribute = attribute
@@ -48,6 +80,8 @@ class AttributeAccess(ASTNode):
         return f'AttributeAccess({self.obj}, "{self.attribute}")'
 
 class BinaryOp(ASTNode):
+    __slots__ = ('left', 'op', 'right', 'operand_types', 'op_func', 'feedback')
+
     def __init__(self, left, op, right):
         self.left = left
         self.op = op
@@ -57,6 +91,8 @@ class BinaryOp(ASTNode):
         return f'BinaryOp({self.left}, "{self.op}", {self.right})'
 
 class UnaryOp(ASTNode):
+    __slots__ = ('op', 'operand')
+
     def __init__(self, op, operand):
         self.op = op
         self.operand = operand
@@ -65,6 +101,8 @@ class UnaryOp(ASTNode):
         return f'UnaryOp("{self.op}", {self.operand})'
 
 class VarDeclaration(ASTNode):
+    __slots__ = ('var_type', 'name', 'expr', 'slot')
+
     def __init__(self, var_type, name, expr):
         self.var_type = var_type
         self.name = name
@@ -74,6 +112,8 @@ class VarDeclaration(ASTNode):
         return f'VarDeclaration(type="{self.var_type}", name="{self.name}", expr={self.expr})'
 
 class PointerDeclaration(ASTNode):
+    __slots__ = ('var_type', 'name', 'expr', 'slot')
+
     def __init__(self, var_type, name, expr):
         self.var_type = var_type
         self.name = name
@@ -83,6 +123,8 @@ class PointerDeclaration(ASTNode):
         return f'PointerDeclaration(type="{self.var_type}", name="{self.name}", expr={self.expr})'
 
 class ImportStatement(ASTNode):
+    __slots__ = ('module_name', 'slot')
+
     def __init__(self, module_name):
         self.module_name = module_name
 
@@ -90,6 +132,8 @@ class ImportStatement(ASTNode):
         return f'ImportStatement(module="{self.module_name}")'
 
 class Assignment(ASTNode):
+    __slots__ = ('name', 'expr', 'depth', 'slot')
+
     def __init__(self, name, expr):
         self.name = name
         self.expr = expr
@@ -98,6 +142,8 @@ class Assignment(ASTNode):
         return f'Assignment(name="{self.name}", expr={self.expr})'
 
 class ArrayAssignment(ASTNode):
+    __slots__ = ('array_name', 'index_expr', 'expr', 'operand_types')
+
     def __init__(self, array_name, index_expr, expr):
         self.array_name = array_name
         self.index_expr = index_expr
@@ -107,6 +153,8 @@ class ArrayAssignment(ASTNode):
         return f'ArrayAssignment(array="{self.array_name}", index={self.index_expr}, expr={self.expr})'
 
 class PrintStatement(ASTNode):
+    __slots__ = ('expr',)
+
     def __init__(self, expr):
         self.expr = expr
 
@@ -114,6 +162,8 @@ class PrintStatement(ASTNode):
         return f'PrintStatement(expr={self.expr})'
 
 class IfStatement(ASTNode):
+    __slots__ = ('condition', 'then_branch', 'else_branch')
+
     def __init__(self, condition, then_branch, else_branch=None):
         self.condition = condition
         self.then_branch = then_branch
@@ -123,6 +173,8 @@ class IfStatement(ASTNode):
         return f'IfStatement(condition={self.condition}, then={self.then_branch}, else={self.else_branch})'
 
 class WhileStatement(ASTNode):
+    __slots__ = ('condition', 'body')
+
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
@@ -131,6 +183,8 @@ class WhileStatement(ASTNode):
         return f'WhileStatement(condition={self.condition}, body={self.body})'
 
 class ForStatement(ASTNode):
+    __slots__ = ('init', 'condition', 'increment', 'body', 'scope')
+
     def __init__(self, init, condition, increment, body):
         self.init = init
         self.condition = condition
@@ -141,6 +195,8 @@ class ForStatement(ASTNode):
         return f'ForStatement(init={self.init}, condition={self.condition}, increment={self.increment}, body={self.body})'
 
 class FunctionDeclaration(ASTNode):
+    __slots__ = ('name', 'params', 'body', 'slot', 'scope')
+
     def __init__(self, name, params, body):
         self.name = name
         self.params = params
@@ -150,6 +206,8 @@ class FunctionDeclaration(ASTNode):
         return f'FunctionDeclaration(name="{self.name}", params={self.params}, body={self.body})'
 
 class FunctionCall(ASTNode):
+    __slots__ = ('name', 'args', 'feedback')
+
     def __init__(self, name, args):
         self.name = name
         self.args = args
@@ -158,6 +216,8 @@ class FunctionCall(ASTNode):
         return f'FunctionCall(name={self.name}, args={self.args})'
 
 class ReturnStatement(ASTNode):
+    __slots__ = ('expr',)
+
     def __init__(self, expr):
         self.expr = expr
 
@@ -165,6 +225,8 @@ class ReturnStatement(ASTNode):
         return f'ReturnStatement(expr={self.expr})'
 
 class ArrayAccess(ASTNode):
+    __slots__ = ('array', 'index', 'operand_types', 'feedback')
+
     def __init__(self, array, index):
         self.array = array
         self.index = index
@@ -173,6 +235,8 @@ class ArrayAccess(ASTNode):
         return f'ArrayAccess(array={self.array}, index={self.index})'
 
 class ArrayLiteral(ASTNode):
+    __slots__ = ('elements',)
+
     def __init__(self, elements):
         self.elements = elements
 
@@ -180,13 +244,37 @@ class ArrayLiteral(ASTNode):
         return f'ArrayLiteral(elements={self.elements})'
 
 class PointerDereference(ASTNode):
+    __slots__ = ('var',)
+
     def __init__(self, var):
         self.var = var
 
     def __repr__(self):
         return f'PointerDereference(var={self.var})'
 
+class ErrorStatement(ASTNode):
+    """Left by the parser's recovery mode in place of a statement that failed to parse.
+
+    Like other nodes it is positioned at the statement's first token. The
+    error was found line_offset lines further down, at column; on the first
+    line the column is relative to col, so the error moves with the node.
+    skipped holds the ErrorStatements of earlier errors inside the statement,
+    which would otherwise be lost with it.
+    """
+    __slots__ = ('message', 'line_offset', 'column', 'skipped')
+
+    def __init__(self, message, line_offset=0, column=0, skipped=None):
+        self.message = message
+        self.line_offset = line_offset
+        self.column = column
+        self.skipped = skipped or []
+
+    def __repr__(self):
+        return f'ErrorStatement(message={self.message!r}, line_offset={self.line_offset}, column={self.column}, skipped={self.skipped})'
+
 class Program(ASTNode):
+    __slots__ = ('statements', 'scope')
+
     def __init__(self, statements):
         self.statements = statements
 
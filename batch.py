@@ -0,0 +1,115 @@
+# batch.py
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from lexer import Lexer
+from parser import Parser
+from linter import check_program, diagnostic, syntax_diagnostic
+
+PHASES = ('read', 'lex', 'parse', 'lint')
+
+def find_sources(patterns):
+    """Expand directories (searched recursively for .ss files), globs and plain paths, in order, without duplicates."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for directory, subdirectories, files in os.walk(pattern):
+                subdirectories.sort()
+                paths.extend(os.path.join(directory, name) for name in sorted(files) if name.endswith('.ss'))
+        elif glob.has_magic(pattern):
+            paths.extend(sorted(glob.glob(pattern, recursive=True)))
+        else:
+            paths.append(pattern)
+    return list(dict.fromkeys(paths))
+
+def check_file(path):
+    """Lex, parse and lint one file; returns its diagnostics and the seconds spent in each phase."""
+    timings = dict.fromkeys(PHASES, 0.0)
+    diagnostics = []
+    phase = 'read'
+    start = time.perf_counter()
+
+    def finish(next_phase):
+        nonlocal phase, start
+        now = time.perf_counter()
+        timings[phase] = now - start
+        phase, start = next_phase, now
+
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            code = file.read()
+        finish('lex')
+        tokens = Lexer(code).tokenize_stream()
+        finish('parse')
+        parser = Parser(tokens, recover=True)
+        program = parser.parse()
+        diagnostics.extend(syntax_diagnostic(e) for e in parser.errors)
+        finish('lint')
+        diagnostics.extend(check_program(program))
+    except SyntaxError as e:
+        diagnostics.append(syntax_diagnostic(e))
+    except RecursionError:
+        diagnostics.append(diagnostic(f'Nesting too deep to {phase}'))
+    except (OSError, UnicodeDecodeError) as e:
+        diagnostics.append(diagnostic(str(e)))
+    finish(None)
+    return {'file': path, 'diagnostics': diagnostics, 'timings': timings}
+
+def check_files(paths, workers=None):
+    """Check paths across a pool of worker processes (one per core by default) and return the report."""
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    if workers == 1 or len(paths) < 2:
+        results = [check_file(path) for path in paths]
+    else:
+        # Hand files out in batches: thousands of small scripts would otherwise be dominated by pickling round trips
+        chunksize = max(1, len(paths) // (workers * 8))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(check_file, paths, chunksize=chunksize))
+    seconds = time.perf_counter() - start
+    phases = dict.fromkeys(PHASES, 0.0)
+    for result in results:
+        for phase, elapsed in result['timings'].items():
+            phases[phase] += elapsed
+    return {
+        'files': results,
+        'summary': {
+            'files': len(results),
+            'files_with_errors': sum(1 for result in results if any(d['severity'] == 'error' for d in result['diagnostics'])),
+            'diagnostics': sum(len(result['diagnostics']) for result in results),
+            'workers': workers,
+            'seconds': seconds,
+            'files_per_second': len(results) / seconds if seconds else 0.0,
+            'phase_seconds': phases,  # Summed over all workers
+        },
+    }
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description='Lex, parse and lint SimpleScript files in parallel.')
+    arguments.add_argument('paths', nargs='+', help='.ss files, directories or glob patterns')
+    arguments.add_argument('-j', '--workers', type=int, default=None, help='worker processes (default: one per core)')
+    arguments.add_argument('-o', '--output', help='write the JSON report here instead of stdout')
+    options = arguments.parse_args(argv)
+
+    report = check_files(find_sources(options.paths), options.workers)
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    summary = report['summary']
+    phases = ', '.join(f"{phase} {seconds:.2f}s" for phase, seconds in summary['phase_seconds'].items())
+    print(f"{summary['files']} files in {summary['seconds']:.2f}s ({summary['files_per_second']:.0f} files/s, "
+          f"{summary['workers']} workers); {phases}; {summary['files_with_errors']} files with errors",
+          file=sys.stderr)
+    return 1 if summary['files_with_errors'] else 0
+
+if __name__ == '__main__':
+    # Usage: python batch.py [-j workers] [-o report.json] dir_or_glob ...
+    sys.exit(main())
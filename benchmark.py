@@ -0,0 +1,384 @@
+# benchmark.py
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from lexer import Lexer, IncrementalLexer
+from parser import Parser, IncrementalParser
+from interpreter import Interpreter
+from compile_cache import CompileCache
+
+# Loop-heavy workload: nested loops, arithmetic, comparisons, array access and calls
+LOOP_PROGRAM = """
+var integer data = [3, 1, 4, 1, 5, 9, 2, 6, 5, 3];
+function double(n) {
+    return n + n;
+}
+var integer total = 0;
+for (var integer i = 0; i < 200; i = i + 1) {
+    for (var integer j = 0; j < length(data); j = j + 1) {
+        if (data[j] > 2 AND data[j] < 9) {
+            total = total + double(data[j]) - j / 2;
+        } else {
+            total = total - 1;
+        }
+    }
+}
+var integer k = 0;
+while (k < 2000) {
+    k = k + 1;
+}
+"""
+
+# Call-heavy workload: naive recursive fib, dominated by calls and returns
+FIB_PROGRAM = """
+function fib(n) {
+    if (n < 2) {
+        return n;
+    }
+    return fib(n - 1) + fib(n - 2);
+}
+var integer result = fib(18);
+"""
+
+# Array workload: counted loops that index arrays, where type inference can prove every index is an integer
+ARRAY_PROGRAM = """
+var integer values = [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0];
+var integer n = length(values);
+for (var integer i = 0; i < n; i = i + 1) {
+    values[i] = i + 1;
+}
+var float total = 0.5;
+var integer count = 0;
+for (var integer r = 0; r < 100; r = r + 1) {
+    for (var integer i = 1; i < n; i = i + 1) {
+        values[i] = values[i - 1] + 1;
+        total = total + 0.5 - 0.25;
+        count = count + 1;
+    }
+}
+"""
+
+# Extra lexer material: comments, strings with escapes and a multi-line comment
+LEXER_EXTRAS = """
+// running totals
+var string label = "total:\\t";  /* tab-separated
+   report */
+print(label + total);
+"""
+
+def generate_source(megabytes):
+    """Repeat the sample programs until the source is at least `megabytes` long."""
+    chunk = LOOP_PROGRAM + FIB_PROGRAM + LEXER_EXTRAS
+    copies = int(megabytes * 1_000_000 / len(chunk)) + 1
+    return chunk * copies
+
+class StatementCounter:
+    """Debugger stand-in that counts executed statements and function calls."""
+    def __init__(self):
+        self.count = 0
+        self.calls = 0
+
+    def check_breakpoint(self, node):
+        self.count += 1
+
+    def before_function_call(self, func, args):
+        self.calls += 1
+
+def parse(code):
+    return Parser(Lexer(code).tokenize_stream()).parse()
+
+def count_statements(code):
+    counter = StatementCounter()
+    Interpreter(parse(code), output_callback=lambda message: None, debugger=counter).run()
+    return counter.count
+
+def count_calls(code):
+    counter = StatementCounter()
+    Interpreter(parse(code), output_callback=lambda message: None, debugger=counter).run()
+    return counter.calls
+
+def best_time(code, repeat=5, **interpreter_options):
+    """Run the program `repeat` times and return the fastest wall-clock time."""
+    ast = parse(code)
+    best = None
+    for _ in range(repeat):
+        interpreter = Interpreter(ast, output_callback=lambda message: None, **interpreter_options)
+        start = time.perf_counter()
+        interpreter.run()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def bench_statements(code=LOOP_PROGRAM, repeat=5, **interpreter_options):
+    """Return (statements executed, best seconds, statements per second)."""
+    statements = count_statements(code)
+    best = best_time(code, repeat, **interpreter_options)
+    return statements, best, statements / best
+
+def bench_calls(code=FIB_PROGRAM, repeat=5, **interpreter_options):
+    """Return (function calls made, best seconds, calls per second)."""
+    calls = count_calls(code)
+    best = best_time(code, repeat, **interpreter_options)
+    return calls, best, calls / best
+
+def bench_quickening(code, repeat=5):
+    """Return (best tree seconds, best adaptive seconds, the adaptive mode's quickening counters)."""
+    tree = best_time(code, repeat, mode='tree')
+    ast = parse(code)
+    adaptive = None
+    for _ in range(repeat):
+        interpreter = Interpreter(ast, output_callback=lambda message: None, mode='adaptive')
+        start = time.perf_counter()
+        interpreter.run()
+        elapsed = time.perf_counter() - start
+        if adaptive is None or elapsed < adaptive:
+            adaptive = elapsed
+    return tree, adaptive, interpreter.quickening
+
+def bench_lexer(megabytes=4, repeat=3):
+    """Return (source bytes, tokens, best seconds, megabytes per second) for tokenizing generated code."""
+    code = generate_source(megabytes)
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tokens = Lexer(code).tokenize_stream()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    size = len(code.encode('utf-8'))
+    return size, len(tokens), best, size / 1_000_000 / best
+
+def bench_token_memory(megabytes=4):
+    """Return (tokens, list peak bytes, stream peak bytes) for tokenizing generated code."""
+    code = generate_source(megabytes)
+    peaks = []
+    for tokenize in (Lexer.tokenize, Lexer.tokenize_stream):
+        tracemalloc.start()
+        tokens = tokenize(Lexer(code))
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        count = len(tokens)
+        del tokens
+    return count, peaks[0], peaks[1]
+
+def bench_relex(megabytes=1, edits=100):
+    """Return (source lines, seconds to lex it all, mean seconds per one-character edit) for incremental lexing."""
+    code = generate_source(megabytes)
+    start = time.perf_counter()
+    lexer = IncrementalLexer(code)
+    full = time.perf_counter() - start
+    position = code.index(';', len(code) // 2) + 1
+    start = time.perf_counter()
+    for offset in range(edits):
+        lexer.edit(position + offset, 0, 'x')
+    return code.count('\n'), full, (time.perf_counter() - start) / edits
+
+def bench_reparse(megabytes=1, edits=100):
+    """Return (top-level statements, seconds to parse it all, mean seconds to lex and reparse one edit)."""
+    code = generate_source(megabytes)
+    parser = IncrementalParser()
+    start = time.perf_counter()
+    program = parser.update(code)
+    full = time.perf_counter() - start
+    position = code.index(';', len(code) // 2) + 1
+    start = time.perf_counter()
+    for offset in range(edits):
+        code = code[:position] + ' var integer extra = 1;' + code[position:]
+        parser.update(code)
+    return len(program.statements), full, (time.perf_counter() - start) / edits
+
+def bench_ast_memory(megabytes=2):
+    """Return (top-level statements, bytes allocated for the AST) for parsing generated code."""
+    tokens = Lexer(generate_source(megabytes)).tokenize_stream()
+    parser = Parser(tokens)  # Outside the measurement: grows the shared line number table
+    tracemalloc.start()
+    program = parser.parse()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(program.statements), size
+
+def bench_compile_cache(megabytes=0.5, repeat=3):
+    """Return best seconds for (lexing and parsing generated code, loading it from the compile cache)."""
+    code = generate_source(megabytes)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = CompileCache(directory)
+        cache.store(code, parse(code))
+        timings = []
+        for load in (parse, cache.load):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                load(code)
+                elapsed = time.perf_counter() - start
+                if best is None or elapsed < best:
+                    best = elapsed
+            timings.append(best)
+    return tuple(timings)
+
+def bench_workspace_check(files=100):
+    """Return (statements, seconds to check a workspace, seconds to recheck it after a one-line edit, statements reused)."""
+    from linter import WorkspaceChecker
+    code = LOOP_PROGRAM + FIB_PROGRAM.replace('fib(18)', 'fib(1)') + LEXER_EXTRAS
+    checker = WorkspaceChecker()
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for number in range(files):
+            path = os.path.join(directory, f'script{number}.ss')
+            with open(path, 'w') as file:
+                file.write(code * 20)
+            paths.append(path)
+        start = time.perf_counter()
+        checker.check_files(paths)
+        full = time.perf_counter() - start
+        statements = checker.stats['statements']
+        with open(paths[files // 2], 'w') as file:
+            file.write((code * 20).replace('k = k + 1;', 'k = k + 2;', 1))
+        start = time.perf_counter()
+        checker.check_files(paths)
+        edit = time.perf_counter() - start
+    return statements, full, edit, checker.stats['statements_reused']
+
+def bench_expressions(terms=20000, depth=20000, repeat=3):
+    """Return best parse seconds for (a sum of terms operands, an operand nested in depth parentheses)."""
+    wide = 'var integer x = ' + ' + '.join(str(n % 10) for n in range(terms)) + ';'
+    deep = 'var integer x = ' + '(' * depth + '1' + ')' * depth + ';'
+    results = []
+    for code in (wide, deep):
+        tokens = Lexer(code).tokenize_stream()
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            Parser(tokens).parse()
+            elapsed = time.perf_counter() - start
+            if best is None or elapsed < best:
+                best = elapsed
+        results.append(best)
+    return tuple(results)
+
+def bench_startup(repeat=10):
+    """Return best wall-clock seconds for (a bare Python process, running a one-line script headlessly)."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as cache_directory:
+        script = os.path.join(cache_directory, 'hello.ss')
+        with open(script, 'w') as file:
+            file.write('print("hello");\n')
+        env = dict(os.environ, SIMPLESCRIPT_CACHE_DIR=cache_directory)
+        timings = []
+        for command in ([sys.executable, '-c', 'pass'], [sys.executable, '-m', 'simplescript', 'run', script]):
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run(command, cwd=directory, env=env, check=True, stdout=subprocess.DEVNULL)
+                elapsed = time.perf_counter() - start
+                if best is None or elapsed < best:
+                    best = elapsed
+            timings.append(best)
+    return tuple(timings)
+
+# Child process for bench_first_paint: builds the GUI and reports once the window has been drawn
+FIRST_PAINT_SCRIPT = """
+import tkinter as tk
+from gui import SimpleScriptGUI
+root = tk.Tk()
+SimpleScriptGUI(root)
+root.update()
+print('painted', flush=True)
+root.destroy()
+"""
+
+def bench_imports(module, repeat=5):
+    """Return best microseconds spent importing module, from `python -X importtime`, and its
+    five most expensive direct imports as (cumulative microseconds, name) pairs from that run."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                                cwd=directory, check=True, capture_output=True, text=True)
+        imports = []  # (cumulative microseconds, nesting depth, name)
+        for line in result.stderr.splitlines():
+            if line.startswith('import time:'):
+                _, cumulative, name = line[len('import time:'):].split('|')
+                if cumulative.strip().isdigit():
+                    name = name[1:].rstrip()
+                    imports.append((int(cumulative), (len(name) - len(name.lstrip())) // 2, name.strip()))
+        # A module's line follows the lines of everything it imported
+        end = next(index for index, (_, depth, name) in enumerate(imports) if depth == 0 and name == module)
+        start = end
+        while start > 0 and imports[start - 1][1] > 0:
+            start -= 1
+        total = imports[end][0]
+        if best is None or total < best[0]:
+            direct = sorted(((cumulative, name) for cumulative, depth, name in imports[start:end] if depth == 1), reverse=True)
+            best = (total, direct[:5])
+    return best
+
+def bench_first_paint(repeat=3):
+    """Return best seconds from launching a process to the GUI's first paint, or None without a display."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', FIRST_PAINT_SCRIPT], cwd=directory, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+        if 'painted' not in result.stdout:
+            return None
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def main():
+    print("Statements (loop workload)")
+    for mode in Interpreter.MODES:
+        statements, seconds, rate = bench_statements(mode=mode)
+        print(f"  {mode}: {statements} statements in {seconds:.4f}s ({rate:,.0f} statements/s)")
+    print("Calls (fib workload)")
+    for mode in Interpreter.MODES:
+        calls, seconds, rate = bench_calls(mode=mode)
+        print(f"  {mode}: {calls} calls in {seconds:.4f}s ({rate:,.0f} calls/s)")
+    print("Type inference (array workload)")
+    for mode in Interpreter.MODES:
+        untyped = best_time(ARRAY_PROGRAM, mode=mode, infer_types=False)
+        typed = best_time(ARRAY_PROGRAM, mode=mode)
+        print(f"  {mode}: {untyped * 1000:.1f}ms without, {typed * 1000:.1f}ms with inferred types")
+    print("Adaptive quickening")
+    for name, code in (('loop', LOOP_PROGRAM), ('fib', FIB_PROGRAM), ('array', ARRAY_PROGRAM)):
+        tree, adaptive, quickening = bench_quickening(code)
+        print(f"  {name}: tree {tree * 1000:.1f}ms, adaptive {adaptive * 1000:.1f}ms "
+              f"({quickening['specialized']} specialized, {quickening['deoptimized']} deoptimized)")
+    print("Startup")
+    python, headless = bench_startup()
+    print(f"  python -c pass {python * 1000:.0f}ms, python -m simplescript run {headless * 1000:.0f}ms")
+    for module in ('interpreter', 'simplescript', 'gui'):
+        total, heaviest = bench_imports(module)
+        print(f"  import {module}: {total / 1000:.1f}ms (" + ', '.join(f"{name} {cumulative / 1000:.1f}ms" for cumulative, name in heaviest) + ")")
+    first_paint = bench_first_paint()
+    print("  GUI first paint: " + (f"{first_paint * 1000:.0f}ms" if first_paint is not None else "skipped (no display)"))
+    print("Lexer (generated source)")
+    size, tokens, seconds, rate = bench_lexer()
+    print(f"  {size / 1_000_000:.1f} MB, {tokens} tokens in {seconds:.3f}s ({rate:.2f} MB/s)")
+    tokens, list_peak, stream_peak = bench_token_memory()
+    print(f"  peak memory for {tokens} tokens: list {list_peak / 1_000_000:.1f} MB, "
+          f"stream {stream_peak / 1_000_000:.1f} MB")
+    lines, full, edit = bench_relex()
+    print(f"  {lines} lines: full lex {full * 1000:.0f}ms, incremental edit {edit * 1000:.2f}ms")
+    print("Parser")
+    statements, full, edit = bench_reparse()
+    print(f"  {statements} statements: full parse {full * 1000:.0f}ms, incremental reparse {edit * 1000:.2f}ms")
+    statements, size = bench_ast_memory()
+    print(f"  AST for {statements} statements: {size / 1_000_000:.1f} MB")
+    parsed, cached = bench_compile_cache()
+    print(f"  0.5 MB: parse {parsed * 1000:.0f}ms, compile cache load {cached * 1000:.0f}ms")
+    wide, deep = bench_expressions()
+    print(f"  20000-term sum in {wide * 1000:.1f}ms, 20000 nested parentheses in {deep * 1000:.1f}ms")
+    print("Static checks")
+    statements, full, edit, reused = bench_workspace_check()
+    print(f"  100 files, {statements} statements: full check {full * 1000:.0f}ms, "
+          f"recheck after a one-line edit {edit * 1000:.1f}ms ({reused} statements reused)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,403 @@
+# closure_compiler.py
+
+import time
+from ast_nodes import *
+from interpreter import Environment, UserFunction, FAST_OPERATORS, RETURN
+from type_inference import ARRAY_INDEX_TYPES, typed_operator
+
+LITERAL_NODES = (Number, String, Boolean)
+
+class CompiledFunction(UserFunction):
+    """A user function whose body has already been compiled into a closure."""
+    def __init__(self, declaration, interpreter, body):
+        super().__init__(declaration, interpreter)
+        self.body = body
+
+    def __call__(self, *args):
+        if len(args) != len(self.declaration.params):
+            raise TypeError(f"Function '{self.declaration.name}' expects {len(self.declaration.params)} arguments, got {len(args)}.")
+        interpreter = self.interpreter
+        new_env = Environment(parent=interpreter.current_env)
+        for param, arg in zip(self.declaration.params, args):
+            new_env.define(param, arg)
+        previous_env = interpreter.current_env
+        interpreter.current_env = new_env
+        if self.body():
+            interpreter.current_env = previous_env
+            return interpreter.return_value
+        interpreter.current_env = previous_env
+        return None
+
+class ClosureCompiler:
+    """Compiles a Program into nested Python closures bound to an Interpreter.
+
+    Each node is visited once; the resulting closures close over everything
+    the tree-walker would look up on every visit (child nodes, operator
+    functions, names), so running the program is just calling the root closure.
+    Statement closures follow the tree-walker's completion protocol and return
+    RETURN after a 'return' statement has run.
+    """
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+        self.statement_compilers = {
+            VarDeclaration: self.compile_var_declaration,
+            Assignment: self.compile_assignment,
+            ArrayAssignment: self.compile_array_assignment,
+            PrintStatement: self.compile_print,
+            IfStatement: self.compile_if,
+            WhileStatement: self.compile_while,
+            ForStatement: self.compile_for,
+            FunctionDeclaration: self.compile_function_declaration,
+            FunctionCall: self.compile_expression_statement,
+            ArrayAccess: self.compile_expression_statement,
+            PointerDereference: self.compile_expression_statement,
+            ReturnStatement: self.compile_return,
+        }
+        self.expression_compilers = {
+            Number: self.compile_literal,
+            String: self.compile_literal,
+            Boolean: self.compile_literal,
+            Variable: self.compile_variable,
+            Array: self.compile_array,
+            ArrayLiteral: self.compile_array,
+            ArrayAccess: self.compile_array_access,
+            BinaryOp: self.compile_binary_op,
+            UnaryOp: self.compile_unary_op,
+            FunctionCall: self.compile_function_call,
+        }
+
+    def compile_program(self, program):
+        return self.compile_block(program.statements)
+
+    def compile_block(self, statements):
+        compiled = tuple(self.compile_statement(stmt) for stmt in statements)
+        if not compiled:
+            return lambda: None
+        if len(compiled) == 1:
+            return compiled[0]
+
+        def block():
+            for stmt in compiled:
+                if stmt():
+                    return RETURN
+            return None
+        return block
+
+    def compile_statement(self, node):
+        compiler = self.statement_compilers.get(type(node))
+        if compiler is None:
+            compiled = self.fallback_statement(node)
+        else:
+            compiled = compiler(node)
+        debugger = self.interpreter.debugger
+        if debugger:
+            inner = compiled
+
+            def compiled():
+                debugger.check_breakpoint(node)
+                return inner()
+        return compiled
+
+    def compile_expression(self, node):
+        compiler = self.expression_compilers.get(type(node))
+        if compiler is None:
+            return self.fallback_expression(node)
+        return compiler(node)
+
+    def fallback_statement(self, node):
+        # Rare statements (imports, pointers) run through the tree-walking handlers
+        handlers = self.interpreter.exec_handlers
+        return lambda: handlers[type(node)](node)
+
+    def fallback_expression(self, node):
+        handlers = self.interpreter.eval_handlers
+        return lambda: handlers[type(node)](node)
+
+    # ===========================
+    # Statements
+    # ===========================
+
+    def compile_var_declaration(self, node):
+        interpreter = self.interpreter
+        name = node.name
+        expr = self.compile_expression(node.expr)
+
+        def var_declaration():
+            interpreter.current_env.define(name, expr())
+        return var_declaration
+
+    def compile_assignment(self, node):
+        interpreter = self.interpreter
+        name = node.name
+        expr = self.compile_expression(node.expr)
+
+        def assignment():
+            value = expr()
+            # Iterative form of Environment.set
+            env = interpreter.current_env
+            while env is not None:
+                if name in env.vars:
+                    env.vars[name] = value
+                    return
+                env = env.parent
+            raise NameError(f"Variable '{name}' is not defined.")
+        return assignment
+
+    def compile_array_assignment(self, node):
+        interpreter = self.interpreter
+        array_name = node.array_name
+        index_expr = self.compile_expression(node.index_expr)
+        expr = self.compile_expression(node.expr)
+
+        if node.operand_types == ARRAY_INDEX_TYPES:
+            def typed_array_assignment():
+                env = interpreter.current_env
+                array = env.get(array_name)
+                index = index_expr()
+                value = expr()
+                if index < 0 or index >= len(array):
+                    raise IndexError("Array index out of bounds.")
+                array[index] = value
+                env.set(array_name, array)
+            return typed_array_assignment
+
+        def array_assignment():
+            env = interpreter.current_env
+            array = env.get(array_name)
+            index = index_expr()
+            value = expr()
+            if not isinstance(array, list):
+                raise TypeError(f"Variable '{array_name}' is not an array.")
+            if not isinstance(index, int):
+                raise TypeError("Array index must be an integer.")
+            if index < 0 or index >= len(array):
+                raise IndexError("Array index out of bounds.")
+            array[index] = value
+            env.set(array_name, array)
+        return array_assignment
+
+    def compile_print(self, node):
+        output = self.interpreter.output
+        expr = self.compile_expression(node.expr)
+
+        def print_statement():
+            output(expr())
+        return print_statement
+
+    def compile_if(self, node):
+        condition = self.compile_expression(node.condition)
+        then_branch = self.compile_block(node.then_branch)
+        if not node.else_branch:
+            def if_statement():
+                if condition():
+                    return then_branch()
+                return None
+            return if_statement
+        else_branch = self.compile_block(node.else_branch)
+
+        def if_else_statement():
+            if condition():
+                return then_branch()
+            return else_branch()
+        return if_else_statement
+
+    def compile_while(self, node):
+        condition = self.compile_expression(node.condition)
+        body = self.compile_block(node.body)
+
+        def while_statement():
+            while condition():
+                if body():
+                    return RETURN
+            return None
+        return while_statement
+
+    def compile_for(self, node):
+        interpreter = self.interpreter
+        init = self.compile_statement(node.init)
+        condition = self.compile_expression(node.condition)
+        body = self.compile_block(node.body)
+        increment = self.compile_statement(node.increment)
+
+        def for_statement():
+            previous_env = interpreter.current_env
+            interpreter.current_env = Environment(parent=previous_env)
+            try:
+                init()
+                while condition():
+                    if body():
+                        return RETURN
+                    increment()
+            finally:
+                interpreter.current_env = previous_env
+        return for_statement
+
+    def compile_function_declaration(self, node):
+        interpreter = self.interpreter
+        body = self.compile_block(node.body)
+
+        def function_declaration():
+            interpreter.current_env.define(node.name, CompiledFunction(node, interpreter, body))
+        return function_declaration
+
+    def compile_expression_statement(self, node):
+        expr = self.compile_expression(node)
+
+        def expression_statement():
+            expr()
+        return expression_statement
+
+    def compile_return(self, node):
+        interpreter = self.interpreter
+        expr = self.compile_expression(node.expr)
+
+        def return_statement():
+            interpreter.return_value = expr()
+            return RETURN
+        return return_statement
+
+    # ===========================
+    # Expressions
+    # ===========================
+
+    def compile_literal(self, node):
+        value = node.value
+        return lambda: value
+
+    def compile_variable(self, node):
+        interpreter = self.interpreter
+        name = node.name
+
+        def variable():
+            # Iterative form of Environment.get
+            env = interpreter.current_env
+            while env is not None:
+                if name in env.vars:
+                    return env.vars[name]
+                env = env.parent
+            raise NameError(f"Variable '{name}' is not defined.")
+        return variable
+
+    def compile_array(self, node):
+        elements = tuple(self.compile_expression(elem) for elem in node.elements)
+
+        def array():
+            return [elem() for elem in elements]
+        return array
+
+    def compile_array_access(self, node):
+        array_expr = self.compile_expression(node.array)
+        index_expr = self.compile_expression(node.index)
+        array_node = node.array
+
+        if node.operand_types == ARRAY_INDEX_TYPES:
+            def typed_array_access():
+                array = array_expr()
+                index = index_expr()
+                if index < 0 or index >= len(array):
+                    raise IndexError("Array index out of bounds.")
+                return array[index]
+            return typed_array_access
+
+        def array_access():
+            array = array_expr()
+            index = index_expr()
+            if not isinstance(array, list):
+                raise TypeError(f"Variable '{array_node.name}' is not an array.")
+            if not isinstance(index, int):
+                raise TypeError("Array index must be an integer.")
+            if index < 0 or index >= len(array):
+                raise IndexError("Array index out of bounds.")
+            return array[index]
+        return array_access
+
+    def compile_binary_op(self, node):
+        op = node.op
+        # Operands of proven types get a C-level operator with no type checks
+        op_func = typed_operator(node) or FAST_OPERATORS.get(op) or FAST_OPERATORS.get(op.upper())
+        left = self.compile_expression(node.left)
+        right = self.compile_expression(node.right)
+        profiler = self.interpreter.profiler
+
+        if op_func is None:
+            # Unknown operators still fail at run time, after evaluating both operands
+            def unknown_op():
+                left()
+                right()
+                raise RuntimeError(f'Unknown operator: {op}')
+            return unknown_op
+
+        if profiler:
+            def profiled_op():
+                left_value = left()
+                right_value = right()
+                start_time = time.time()
+                result = op_func(left_value, right_value)
+                end_time = time.time()
+                profiler.profile(op, end_time - start_time)
+                return result
+            return profiled_op
+
+        if isinstance(node.left, LITERAL_NODES) and isinstance(node.right, LITERAL_NODES):
+            try:
+                value = op_func(node.left.value, node.right.value)
+            except Exception:
+                pass  # Leave errors such as division by zero to run time
+            else:
+                return lambda: value
+
+        if isinstance(node.right, LITERAL_NODES):
+            right_value = node.right.value
+            if isinstance(node.left, Variable):
+                interpreter = self.interpreter
+                name = node.left.name
+
+                def variable_op_constant():
+                    env = interpreter.current_env
+                    while env is not None:
+                        if name in env.vars:
+                            return op_func(env.vars[name], right_value)
+                        env = env.parent
+                    raise NameError(f"Variable '{name}' is not defined.")
+                return variable_op_constant
+
+            def binary_op_constant():
+                return op_func(left(), right_value)
+            return binary_op_constant
+
+        def binary_op():
+            return op_func(left(), right())
+        return binary_op
+
+    def compile_unary_op(self, node):
+        op = node.op
+        operand = self.compile_expression(node.operand)
+        if op.upper() != 'NOT':
+            def unknown_op():
+                operand()
+                raise RuntimeError(f'Unknown unary operator: {op}')
+            return unknown_op
+
+        def not_op():
+            return not operand()
+        return not_op
+
+    def compile_function_call(self, node):
+        interpreter = self.interpreter
+        name_node = node.name
+        func_expr = self.compile_expression(name_node)
+        args = tuple(self.compile_expression(arg) for arg in node.args)
+
+        def function_call():
+            func = func_expr()
+            if callable(func):
+                arg_values = [arg() for arg in args]
+                try:
+                    if interpreter.debugger:
+                        interpreter.debugger.before_function_call(func, arg_values)
+                    return func(*arg_values)
+                except Exception as e:
+                    raise RuntimeError(f"Error calling function '{name_node.name}': {e}")
+            else:
+                raise TypeError(f"'{name_node.name}' is not callable.")
+        return function_call
@@ -0,0 +1,181 @@
+# compile_cache.py
+
+import gc
+import hashlib
+import marshal
+import os
+import ast_nodes
+from ast_nodes import ASTNode, Program
+
+# Node classes by name, with the fields their constructors take, in order
+NODE_CLASSES = {}
+NODE_FIELDS = {}
+for _cls in vars(ast_nodes).values():
+    if isinstance(_cls, type) and issubclass(_cls, ASTNode) and _cls is not ASTNode:
+        _code = _cls.__init__.__code__
+        NODE_CLASSES[_cls.__name__] = _cls
+        NODE_FIELDS[_cls] = _code.co_varnames[1:_code.co_argcount]
+
+DEFAULT_DIRECTORY = os.path.join(os.path.expanduser('~'), '.cache', 'simplescript')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Modules whose code decides what a cached Program looks like; editing any of them invalidates the cache.
+# The optimizer folds constants with interpreter.py's operators, so optimized Programs depend on it too
+VERSION_SOURCES = ('lexer.py', 'parser.py', 'ast_nodes.py', 'optimizer.py', 'interpreter.py', 'compile_cache.py')
+
+_version = None
+
+def interpreter_version():
+    """Hash of the modules that produce cached Programs (computed once per process)."""
+    global _version
+    if _version is not None:
+        return _version
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in VERSION_SOURCES:
+        with open(os.path.join(directory, name), 'rb') as file:
+            digest.update(file.read())
+    _version = digest.hexdigest()[:16]
+    return _version
+
+# ===========================
+# Serialization
+# ===========================
+# A node is stored as the tuple (class name, line, col, end, *constructor arguments);
+# lists stay lists and everything else is a plain value, so marshal can write it.
+
+def encode(node):
+    if isinstance(node, list):
+        return [encode(item) for item in node]
+    if isinstance(node, ASTNode):
+        cls = type(node)
+        return (cls.__name__, node.line, node.col, node.end) + tuple(encode(getattr(node, field)) for field in NODE_FIELDS[cls])
+    return node
+
+def decode(data):
+    if type(data) is tuple:
+        node = NODE_CLASSES[data[0]](*[decode(item) for item in data[4:]])
+        if data[1] is not None:
+            node.line = data[1]
+            node.col = data[2]
+            node.end = data[3]
+        return node
+    if type(data) is list:
+        return [decode(item) for item in data]
+    return data
+
+class CompileCache:
+    """Parsed (and optionally optimized) Programs on disk, keyed by source hash.
+
+    Entries are marshal files named after sha256(interpreter version,
+    optimize flag, source). Loading one skips the Lexer and Parser
+    entirely. Loads refresh an entry's modification time and stores evict
+    the least recently used entries until the directory fits in max_bytes.
+    The cache never makes a run fail: unreadable or unwritable entries are
+    treated as misses.
+    """
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or os.environ.get('SIMPLESCRIPT_CACHE_DIR') or DEFAULT_DIRECTORY
+        self.max_bytes = max_bytes
+        self.version = interpreter_version()
+
+    def path(self, source, optimize):
+        digest = hashlib.sha256(f'{self.version}:{int(optimize)}:'.encode('utf-8') + source.encode('utf-8'))
+        return os.path.join(self.directory, digest.hexdigest() + '.ssc')
+
+    def load(self, source, optimize=False):
+        """Return the cached Program for source, or None."""
+        path = self.path(source, optimize)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            os.utime(path)  # Mark as recently used
+            # Decoding only allocates: pausing the cycle collector keeps it from rescanning the growing tree
+            collecting = gc.isenabled()
+            gc.disable()
+            try:
+                program = decode(marshal.loads(data))
+            finally:
+                if collecting:
+                    gc.enable()
+        except (OSError, ValueError, EOFError, TypeError, KeyError):
+            return None
+        return program if isinstance(program, Program) else None
+
+    def store(self, source, program, optimize=False):
+        """Write program to the cache; returns whether it was stored."""
+        try:
+            data = marshal.dumps(encode(program))
+        except (ValueError, RecursionError):
+            return False  # Too deeply nested to serialize
+        try:
+            import tempfile  # Only needed on a miss; keeps cached runs from importing it
+            os.makedirs(self.directory, exist_ok=True)
+            # Write then rename, so concurrent runs never read a partial entry
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        except OSError:
+            return False
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, self.path(source, optimize))
+        except OSError:
+            # Eviction only sees finished entries, so a leftover temp file would never be removed
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            return False
+        self.evict()
+        return True
+
+    def get_program(self, source, optimize=False):
+        """Return the Program for source from the cache, parsing (and optimizing) it on a miss."""
+        program = self.load(source, optimize)
+        if program is None:
+            # A hit never needs the Lexer and Parser, so cached runs skip importing them (and re)
+            from lexer import Lexer
+            from parser import Parser
+            program = Parser(Lexer(source).tokenize_stream()).parse()
+            if optimize:
+                from optimizer import Optimizer  # Imported on demand: it pulls in the interpreter
+                program = Optimizer().optimize(program)
+            self.store(source, program, optimize)
+        return program
+
+    def entries(self):
+        """(modification time, size, path) for every entry."""
+        result = []
+        try:
+            with os.scandir(self.directory) as scan:
+                for entry in scan:
+                    if entry.name.endswith('.ssc'):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        result.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return result
+
+    def evict(self):
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,370 @@
+# compiler.py
+
+from ast_nodes import *
+from type_inference import TypeInference, ARRAY_INDEX_TYPES, typed_operator
+
+# ===========================
+# Opcodes
+# ===========================
+# Every instruction is two slots wide in the flat code array: opcode, argument.
+
+LOAD_CONST = 0       # push constants[arg]
+LOAD_NAME = 1        # push value of names[arg]
+STORE_NAME = 2       # pop value, assign to existing names[arg]
+DEFINE_NAME = 3      # pop value, define names[arg] in the current scope
+BINARY_OP = 4        # pop right, left; push OPERATOR_NAMES[arg] applied to them
+UNARY_NOT = 5        # pop value; push not value
+JUMP = 6             # continue at code offset arg
+JUMP_IF_FALSE = 7    # pop value; continue at code offset arg if it is falsy
+LOAD_INDEX = 8       # pop index, array; push array[index] (constants[arg] is the array node)
+STORE_INDEX = 9      # pop value, index, array; array[index] = value, reassign names[arg]
+BUILD_LIST = 10      # pop arg values; push them as a list
+CHECK_CALLABLE = 11  # raise unless the top of stack is callable (constants[arg] is the call node)
+CALL = 12            # call with constants[arg] = (argument count, call node)
+RETURN = 13          # pop value; return it from the current frame
+MAKE_FUNCTION = 14   # define a function from constants[arg] = (declaration, code object)
+PRINT = 15           # pop value and output it
+POP = 16             # discard the top of stack
+PUSH_SCOPE = 17      # enter a new Environment
+POP_SCOPE = 18       # leave the current Environment
+EVAL_NODE = 19       # push the tree-walker's evaluation of constants[arg]
+EXEC_NODE = 20       # run constants[arg] through the tree-walker
+BREAKPOINT = 21      # notify the debugger about statement constants[arg]
+HALT = 22            # end of program
+BINARY_OP_CONST = 23 # pop left; push OPERATOR_NAMES[arg & 15] applied to left and constants[arg >> 4]
+TAIL_CALL = 24       # like CALL followed by RETURN, reusing the current frame for VM functions
+LOAD_LIST_INDEX = 25 # LOAD_INDEX for operands type inference proved to be an array and an integer: only checks bounds
+STORE_LIST_INDEX = 26  # STORE_INDEX for operands proved to be an array and an integer
+
+OPNAMES = {
+    LOAD_CONST: 'LOAD_CONST',
+    LOAD_NAME: 'LOAD_NAME',
+    STORE_NAME: 'STORE_NAME',
+    DEFINE_NAME: 'DEFINE_NAME',
+    BINARY_OP: 'BINARY_OP',
+    UNARY_NOT: 'UNARY_NOT',
+    JUMP: 'JUMP',
+    JUMP_IF_FALSE: 'JUMP_IF_FALSE',
+    LOAD_INDEX: 'LOAD_INDEX',
+    STORE_INDEX: 'STORE_INDEX',
+    BUILD_LIST: 'BUILD_LIST',
+    CHECK_CALLABLE: 'CHECK_CALLABLE',
+    CALL: 'CALL',
+    RETURN: 'RETURN',
+    MAKE_FUNCTION: 'MAKE_FUNCTION',
+    PRINT: 'PRINT',
+    POP: 'POP',
+    PUSH_SCOPE: 'PUSH_SCOPE',
+    POP_SCOPE: 'POP_SCOPE',
+    EVAL_NODE: 'EVAL_NODE',
+    EXEC_NODE: 'EXEC_NODE',
+    BREAKPOINT: 'BREAKPOINT',
+    HALT: 'HALT',
+    BINARY_OP_CONST: 'BINARY_OP_CONST',
+    TAIL_CALL: 'TAIL_CALL',
+    LOAD_LIST_INDEX: 'LOAD_LIST_INDEX',
+    STORE_LIST_INDEX: 'STORE_LIST_INDEX',
+}
+
+# Operand of BINARY_OP is an index into this list
+OPERATOR_NAMES = ['+', '-', '*', '/', '==', '!=', '>', '<', '>=', '<=', 'AND', 'OR', 'NOT']
+
+# Operand for a '+' whose operands type inference proved to be two numbers or two strings
+TYPED_ADD = len(OPERATOR_NAMES)
+OPERATOR_NAMES.append('+')
+
+class CodeObject:
+    """Flat bytecode for one function (or the top-level program)."""
+    def __init__(self, name, is_function=False):
+        self.name = name
+        self.is_function = is_function
+        self.code = []
+        self.constants = []
+        self.names = []
+        # Lookup tables used while compiling to share literal constants and names
+        self.constant_indices = {}
+        self.name_indices = {}
+
+    def __repr__(self):
+        return f'CodeObject(name="{self.name}", instructions={len(self.code) // 2})'
+
+class Compiler:
+    """Lowers a Program AST into CodeObjects for the VM in vm.py."""
+    def __init__(self, debug=False):
+        # When debug is set, a BREAKPOINT precedes every statement
+        self.debug = debug
+        self.code_object = None
+        # Number of for-loop scopes open in the current code object
+        self.scope_depth = 0
+        self.statement_compilers = {
+            VarDeclaration: self.compile_var_declaration,
+            Assignment: self.compile_assignment,
+            ArrayAssignment: self.compile_array_assignment,
+            PrintStatement: self.compile_print,
+            IfStatement: self.compile_if,
+            WhileStatement: self.compile_while,
+            ForStatement: self.compile_for,
+            FunctionDeclaration: self.compile_function_declaration,
+            FunctionCall: self.compile_expression_statement,
+            ArrayAccess: self.compile_expression_statement,
+            PointerDereference: self.compile_expression_statement,
+            ReturnStatement: self.compile_return,
+        }
+        self.expression_compilers = {
+            Number: self.compile_literal,
+            String: self.compile_literal,
+            Boolean: self.compile_literal,
+            Variable: self.compile_variable,
+            Array: self.compile_array,
+            ArrayLiteral: self.compile_array,
+            ArrayAccess: self.compile_array_access,
+            BinaryOp: self.compile_binary_op,
+            UnaryOp: self.compile_unary_op,
+            FunctionCall: self.compile_function_call,
+        }
+
+    def compile(self, program):
+        self.code_object = CodeObject('<main>')
+        self.compile_block(program.statements)
+        self.emit(HALT)
+        return self.code_object
+
+    # ===========================
+    # Emission Helpers
+    # ===========================
+
+    def emit(self, op, arg=0):
+        self.code_object.code.extend((op, arg))
+        return len(self.code_object.code) - 1  # Position of the argument, for patching
+
+    def patch(self, position, target):
+        self.code_object.code[position] = target
+
+    def here(self):
+        return len(self.code_object.code)
+
+    def constant(self, value):
+        code_object = self.code_object
+        # Only literal values are shared; nodes and code objects always get their own slot
+        if isinstance(value, (int, float, str, bool)) or value is None:
+            key = (type(value), value)
+            if key not in code_object.constant_indices:
+                code_object.constant_indices[key] = len(code_object.constants)
+                code_object.constants.append(value)
+            return code_object.constant_indices[key]
+        code_object.constants.append(value)
+        return len(code_object.constants) - 1
+
+    def name(self, name):
+        code_object = self.code_object
+        if name not in code_object.name_indices:
+            code_object.name_indices[name] = len(code_object.names)
+            code_object.names.append(name)
+        return code_object.name_indices[name]
+
+    # ===========================
+    # Statements
+    # ===========================
+
+    def compile_block(self, statements):
+        for stmt in statements:
+            self.compile_statement(stmt)
+
+    def compile_statement(self, node):
+        if self.debug:
+            self.emit(BREAKPOINT, self.constant(node))
+        compiler = self.statement_compilers.get(type(node))
+        if compiler is None:
+            # Imports, pointer declarations and unknown nodes run through the tree-walker
+            self.emit(EXEC_NODE, self.constant(node))
+        else:
+            compiler(node)
+
+    def compile_var_declaration(self, node):
+        self.compile_expression(node.expr)
+        self.emit(DEFINE_NAME, self.name(node.name))
+
+    def compile_assignment(self, node):
+        self.compile_expression(node.expr)
+        self.emit(STORE_NAME, self.name(node.name))
+
+    def compile_array_assignment(self, node):
+        self.emit(LOAD_NAME, self.name(node.array_name))
+        self.compile_expression(node.index_expr)
+        self.compile_expression(node.expr)
+        self.emit(STORE_LIST_INDEX if node.operand_types == ARRAY_INDEX_TYPES else STORE_INDEX, self.name(node.array_name))
+
+    def compile_print(self, node):
+        self.compile_expression(node.expr)
+        self.emit(PRINT)
+
+    def compile_if(self, node):
+        self.compile_expression(node.condition)
+        jump_to_else = self.emit(JUMP_IF_FALSE)
+        self.compile_block(node.then_branch)
+        if node.else_branch:
+            jump_to_end = self.emit(JUMP)
+            self.patch(jump_to_else, self.here())
+            self.compile_block(node.else_branch)
+            self.patch(jump_to_end, self.here())
+        else:
+            self.patch(jump_to_else, self.here())
+
+    def compile_while(self, node):
+        loop_start = self.here()
+        self.compile_expression(node.condition)
+        jump_to_end = self.emit(JUMP_IF_FALSE)
+        self.compile_block(node.body)
+        self.emit(JUMP, loop_start)
+        self.patch(jump_to_end, self.here())
+
+    def compile_for(self, node):
+        self.emit(PUSH_SCOPE)
+        self.scope_depth += 1
+        self.compile_statement(node.init)
+        loop_start = self.here()
+        self.compile_expression(node.condition)
+        jump_to_end = self.emit(JUMP_IF_FALSE)
+        self.compile_block(node.body)
+        self.compile_statement(node.increment)
+        self.emit(JUMP, loop_start)
+        self.patch(jump_to_end, self.here())
+        self.scope_depth -= 1
+        self.emit(POP_SCOPE)
+
+    def compile_function_declaration(self, node):
+        enclosing = self.code_object
+        enclosing_scope_depth = self.scope_depth
+        self.code_object = CodeObject(node.name, is_function=True)
+        self.scope_depth = 0
+        self.compile_block(node.body)
+        self.emit(LOAD_CONST, self.constant(None))
+        self.emit(RETURN)
+        function_code = self.code_object
+        self.code_object = enclosing
+        self.scope_depth = enclosing_scope_depth
+        self.emit(MAKE_FUNCTION, self.constant((node, function_code)))
+
+    def compile_expression_statement(self, node):
+        self.compile_expression(node)
+        self.emit(POP)
+
+    def compile_return(self, node):
+        # "return f(...)" directly in a function body (not inside a for loop's scope) is a tail call
+        if type(node.expr) is FunctionCall and self.code_object.is_function and self.scope_depth == 0:
+            self.compile_function_call(node.expr, tail=True)
+            return
+        self.compile_expression(node.expr)
+        self.emit(RETURN)
+
+    # ===========================
+    # Expressions
+    # ===========================
+
+    def compile_expression(self, node):
+        compiler = self.expression_compilers.get(type(node))
+        if compiler is None:
+            # Attribute access, pointer dereference and unknown nodes use the tree-walker
+            self.emit(EVAL_NODE, self.constant(node))
+        else:
+            compiler(node)
+
+    def compile_literal(self, node):
+        self.emit(LOAD_CONST, self.constant(node.value))
+
+    def compile_variable(self, node):
+        self.emit(LOAD_NAME, self.name(node.name))
+
+    def compile_array(self, node):
+        for elem in node.elements:
+            self.compile_expression(elem)
+        self.emit(BUILD_LIST, len(node.elements))
+
+    def compile_array_access(self, node):
+        self.compile_expression(node.array)
+        self.compile_expression(node.index)
+        if node.operand_types == ARRAY_INDEX_TYPES:
+            self.emit(LOAD_LIST_INDEX)
+        else:
+            self.emit(LOAD_INDEX, self.constant(node.array))
+
+    def compile_binary_op(self, node):
+        op = node.op if node.op in OPERATOR_NAMES else node.op.upper()
+        if op not in OPERATOR_NAMES:
+            # The tree-walker raises the same "Unknown operator" error at run time
+            self.emit(EVAL_NODE, self.constant(node))
+            return
+        operand = TYPED_ADD if op == '+' and typed_operator(node) else OPERATOR_NAMES.index(op)
+        self.compile_expression(node.left)
+        if isinstance(node.right, (Number, String, Boolean)):
+            # Fused form for the very common "expression op literal" shape
+            self.emit(BINARY_OP_CONST, operand | self.constant(node.right.value) << 4)
+            return
+        self.compile_expression(node.right)
+        self.emit(BINARY_OP, operand)
+
+    def compile_unary_op(self, node):
+        if node.op.upper() != 'NOT':
+            self.emit(EVAL_NODE, self.constant(node))
+            return
+        self.compile_expression(node.operand)
+        self.emit(UNARY_NOT)
+
+    def compile_function_call(self, node, tail=False):
+        self.compile_expression(node.name)
+        self.emit(CHECK_CALLABLE, self.constant(node))
+        for arg in node.args:
+            self.compile_expression(arg)
+        self.emit(TAIL_CALL if tail else CALL, self.constant((len(node.args), node)))
+
+# ===========================
+# Disassembler
+# ===========================
+
+def disassemble(code_object):
+    """Return a human-readable listing of a CodeObject and every function it defines."""
+    lines = [f'Disassembly of {code_object.name}:']
+    nested = []
+    code = code_object.code
+    for offset in range(0, len(code), 2):
+        op = code[offset]
+        arg = code[offset + 1]
+        lines.append(f'{offset:6} {OPNAMES[op]:<16}{arg:>4}  {describe_argument(code_object, op, arg)}'.rstrip())
+        if op == MAKE_FUNCTION:
+            nested.append(code_object.constants[arg][1])
+    for function_code in nested:
+        lines.append('')
+        lines.append(disassemble(function_code))
+    return '\n'.join(lines)
+
+def describe_argument(code_object, op, arg):
+    if op in (LOAD_NAME, STORE_NAME, DEFINE_NAME, STORE_INDEX, STORE_LIST_INDEX):
+        return f'({code_object.names[arg]})'
+    if op == LOAD_CONST:
+        return f'({code_object.constants[arg]!r})'
+    if op == BINARY_OP:
+        return f'({OPERATOR_NAMES[arg]}{" typed" if arg == TYPED_ADD else ""})'
+    if op == BINARY_OP_CONST:
+        typed = ' typed' if arg & 15 == TYPED_ADD else ''
+        return f'({OPERATOR_NAMES[arg & 15]}{typed} {code_object.constants[arg >> 4]!r})'
+    if op in (JUMP, JUMP_IF_FALSE):
+        return f'(to {arg})'
+    if op in (CALL, TAIL_CALL):
+        return f'({code_object.constants[arg][0]} arguments)'
+    if op == MAKE_FUNCTION:
+        return f'({code_object.constants[arg][0].name})'
+    if op == BUILD_LIST:
+        return f'({arg} elements)'
+    if op in (EVAL_NODE, EXEC_NODE, BREAKPOINT):
+        return f'({type(code_object.constants[arg]).__name__})'
+    return ''
+
+if __name__ == '__main__':
+    # Usage: python compiler.py file.ss
+    import sys
+    from lexer import Lexer
+    from parser import Parser
+    with open(sys.argv[1], 'r') as file:
+        program = Parser(Lexer(file.read()).tokenize_stream()).parse()
+    TypeInference().infer(program)  # As Interpreter.run() does, so typed instructions show up
+    print(disassemble(Compiler().compile(program)))
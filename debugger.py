@@ -27,9 +27,12 @@ class Debugger:
             self.paused = False
             self.gui.pause_execution()
             return
-        # Placeholder: Implement line tracking if AST nodes have line information
-        # For simplicity, this example does not track lines
-        # You can extend AST nodes to include line information
+        if node.line is None:
+            return
+        self.current_line = node.line
+        if node.line in self.breakpoints:
+            self.gui.highlight_line(node.line)
+            self.gui.pause_execution()
 
     def before_function_call(self, func, args):
         pass  # Placeholder for potential future use
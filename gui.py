@@ -6,15 +6,10 @@ from tkinter import filedialog, messagebox, simpledialog, ttk
 from custom_button import CustomButton
 import re
 import json
-from lexer import Lexer
-from parser import Parser
-from test_runner import TestRunner
-from linter import Linter
-from profiler import Profiler
-from plugin_system import PluginSystem
-from debugger import Debugger
-from interpreter import Interpreter
-from utils import draw_rounded_rect
+
+# The interpreter, linter, profiler, debugger, test runner and plugins are imported
+# the first time they are used (see the properties under "Subsystems"), so the window
+# appears without paying for modules a session may never need.
 
 class SimpleScriptGUI:
     def __init__(self, root):
@@ -102,38 +97,9 @@ class SimpleScriptGUI:
         tests_frame = tk.Frame(self.notebook, bg="#0d0d0d")
         self.notebook.add(tests_frame, text="Unit Tests")
 
-        self.test_label = tk.Label(tests_frame, text="Unit Tests (JSON Format):", bg="#0d0d0d", fg="white")
-        self.test_label.pack(anchor='w', padx=10, pady=(10, 0))
-
-        self.test_text = tk.Text(
-            tests_frame,
-            height=10,
-            wrap=tk.WORD,
-            font=("Consolas", 12),
-            bg="#1a1a1a",
-            fg="#ffffff",
-            insertbackground="#ffffff",
-            selectbackground="#e60012",
-            selectforeground="#ffffff",
-        )
-        self.test_text.pack(fill='both', expand=True, padx=10, pady=(0, 10))
-        self.test_scrollbar = tk.Scrollbar(tests_frame, orient=tk.VERTICAL, command=self.test_text.yview)
-        self.test_scrollbar.pack(side='right', fill='y')
-        self.test_text.configure(yscrollcommand=self.test_scrollbar.set)
-
-        sample_tests = json.dumps([
-            {
-                "name": "Addition Test",
-                "expression": "add(2, 3)",
-                "expected": 5
-            },
-            {
-                "name": "Multiplication Test",
-                "expression": "multiply(5, 7)",
-                "expected": 35
-            }
-        ], indent=4)
-        self.test_text.insert(tk.END, sample_tests)
+        self.tests_frame = tests_frame
+        self.test_text = None  # Built when the tab is first shown, see build_tests_tab
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
         # Bind Events
         self.code_area.bind("<<Modified>>", self.on_text_change)
@@ -243,15 +209,17 @@ class SimpleScriptGUI:
         # Apply the initial theme AFTER creating buttons
         self.apply_theme(self.current_theme)
 
-        # Initialize Features
-        self.linter = Linter(self)
-        self.profiler = Profiler(self)
-
-        # Initialize Plugin System AFTER toolbar_frame is defined
-        self.plugin_system = PluginSystem(self)
-        self.plugin_system.load_plugins()
+        # Features are created on first use
+        self._linter = None
+        self._profiler = None
+        self._debugger = None
+        self._compile_cache = None
+        self._lint_service = None
+        self.background_lint_errors = []  # Last errors shown by the background linter
 
-        self.debugger = Debugger(None, self)  # Placeholder, link with interpreter when running
+        # Plugins add toolbar buttons; load them once the window has been drawn
+        self.plugin_system = None
+        self.root.after_idle(self.load_plugins)
 
         # Initialize Modes
         self.current_mode = "Normal"  # Modes: Normal, Debug
@@ -259,6 +227,51 @@ class SimpleScriptGUI:
         # Create Menu
         self.create_menu()
 
+    # ===========================
+    # Subsystems
+    # ===========================
+
+    @property
+    def linter(self):
+        if self._linter is None:
+            from linter import Linter
+            self._linter = Linter(self)
+        return self._linter
+
+    @property
+    def lint_service(self):
+        if self._lint_service is None:
+            from linter import LintService
+            self._lint_service = LintService(self.root, lambda: self.code_area.get("1.0", tk.END),
+                                             self.display_background_lint_errors)
+        return self._lint_service
+
+    @property
+    def profiler(self):
+        if self._profiler is None:
+            from profiler import Profiler
+            self._profiler = Profiler(self)
+        return self._profiler
+
+    @property
+    def debugger(self):
+        if self._debugger is None:
+            from debugger import Debugger
+            self._debugger = Debugger(None, self)  # Linked with the interpreter when code runs
+        return self._debugger
+
+    @property
+    def compile_cache(self):
+        if self._compile_cache is None:
+            from compile_cache import CompileCache
+            self._compile_cache = CompileCache()
+        return self._compile_cache
+
+    def load_plugins(self):
+        from plugin_system import PluginSystem
+        self.plugin_system = PluginSystem(self)
+        self.plugin_system.load_plugins()
+
     # ===========================
     # Scrolling Methods
     # ===========================
@@ -342,7 +355,7 @@ class SimpleScriptGUI:
         if self.code_area.edit_modified():
             self.update_line_numbers()
             self.highlight_syntax()
-            self.linter.lint(self.code_area.get("1.0", tk.END))  # Run linter
+            self.lint_service.changed()  # Lints in the background once typing pauses
             self.code_area.see("insert")  # Ensure cursor is visible
             self.code_area.edit_modified(False)
 
@@ -350,7 +363,6 @@ class SimpleScriptGUI:
         """Handle key release events for additional updates."""
         self.update_line_numbers()
         self.highlight_syntax()
-        self.linter.lint(self.code_area.get("1.0", tk.END))  # Run linter
         self.code_area.see("insert")  # Ensure cursor is visible
 
     def auto_indent(self, event):
@@ -432,6 +444,47 @@ class SimpleScriptGUI:
     # Unit Testing Methods
     # ===========================
 
+    def on_tab_changed(self, event=None):
+        if self.notebook.select() == str(self.tests_frame):
+            self.build_tests_tab()
+
+    def build_tests_tab(self):
+        """Create the Unit Tests tab's widgets the first time they are needed."""
+        if self.test_text is not None:
+            return
+        self.test_label = tk.Label(self.tests_frame, text="Unit Tests (JSON Format):", bg="#0d0d0d", fg="white")
+        self.test_label.pack(anchor='w', padx=10, pady=(10, 0))
+
+        self.test_text = tk.Text(
+            self.tests_frame,
+            height=10,
+            wrap=tk.WORD,
+            font=("Consolas", 12),
+            bg="#1a1a1a",
+            fg="#ffffff",
+            insertbackground="#ffffff",
+            selectbackground="#e60012",
+            selectforeground="#ffffff",
+        )
+        self.test_text.pack(fill='both', expand=True, padx=10, pady=(0, 10))
+        self.test_scrollbar = tk.Scrollbar(self.tests_frame, orient=tk.VERTICAL, command=self.test_text.yview)
+        self.test_scrollbar.pack(side='right', fill='y')
+        self.test_text.configure(yscrollcommand=self.test_scrollbar.set)
+
+        sample_tests = json.dumps([
+            {
+                "name": "Addition Test",
+                "expression": "add(2, 3)",
+                "expected": 5
+            },
+            {
+                "name": "Multiplication Test",
+                "expression": "multiply(5, 7)",
+                "expected": 35
+            }
+        ], indent=4)
+        self.test_text.insert(tk.END, sample_tests)
+
     def output(self, message):
         """Display a message in the output area."""
         self.output_area.configure(state='normal')
@@ -439,827 +492,103 @@ class SimpleScriptGUI:
         self.output_area.configure(state='disabled')
         self.output_area.see(tk.END)
 
-    def display_linter_errors(self, errors):
-        """Display linter errors in the output area."""
-        if errors:
-            error_text = "\n".join(errors)
-            self.output(f"Linter Errors:\n{error_text}")
-        else:
-            self.output("No linting errors found.")
-
-    def run_linter(self):
-        """Run the linter on the current code."""
-        code = self.code_area.get("1.0", tk.END)
-        self.linter.lint(code)
-
     # ===========================
-    # Theme Toggle Methods
+    # Code Execution Methods
     # ===========================
 
-    def toggle_theme(self):
-        """Toggle between dark and light themes."""
-        if self.current_theme == "dark":
-            self.apply_theme("light")
-            self.current_theme = "light"
-        else:
-            self.apply_theme("dark")
-            self.current_theme = "dark"
-
-    def apply_theme(self, theme_name):
-        """Apply the selected theme to the GUI."""
-        theme = self.themes[theme_name]
-        self.root.configure(bg=theme["bg"])
-
-        # Configure ttk.Notebook using ttk.Style
-        style = ttk.Style()
-        style.theme_use('default')  # Choose an appropriate theme
+    def run_code(self):
+        code = self.code_area.get("1.0", tk.END)
+        self.clear_output()
 
-        # Configure the Notebook background
-        style.configure('TNotebook', background=theme["bg"])
+        def output_callback(message):
+            self.output(message)
 
-        # Configure the Notebook Tabs
-        style.configure('TNotebook.Tab', background=theme["button_bg"], foreground=theme["text_color"])
+        try:
+            from interpreter import Interpreter
+            ast = self.compile_cache.get_program(code, optimize=True)
+            interpreter = Interpreter(ast, output_callback=output_callback, profiler=self.profiler)
+            if self._debugger is not None:
+                self._debugger.interpreter = interpreter  # Link debugger with interpreter
+            interpreter.run()
+            if self.profiler:
+                self.profiler.display_profile()
+            # Switch to Output tab automatically
+            self.notebook.select(self.notebook.tabs()[1])  # Assuming Output tab is second
+        except SyntaxError as e:
+            self.output_area.configure(state='normal')
+            self.output_area.insert(tk.END, f"Syntax Error: {e}\n")
+            self.output_area.configure(state='disabled')
+            self.output_area.see(tk.END)
+            self.notebook.select(self.notebook.tabs()[1])
+        except ImportError as e:
+            self.output_area.configure(state='normal')
+            self.output_area.insert(tk.END, f"Import Error: {e}\n")
+            self.output_area.configure(state='disabled')
+            self.output_area.see(tk.END)
+            self.notebook.select(self.notebook.tabs()[1])
+        except Exception as e:
+            self.output_area.configure(state='normal')
+            self.output_area.insert(tk.END, f"Error: {e}\n")
+            self.output_area.configure(state='disabled')
+            self.output_area.see(tk.END)
+            self.notebook.select(self.notebook.tabs()[1])
 
-        # Optional: Configure selected tab
-        style.map('TNotebook.Tab',
-                  background=[('selected', theme["button_hover"])],
-                  foreground=[('selected', theme["text_color"])])
+    def run_tests(self):
+        current_tab = self.notebook.nametowidget(self.notebook.select())
+        if current_tab != self.notebook.nametowidget(self.notebook.tabs()[2]):
+            self.notebook.select(self.notebook.tabs()[2])  # Switch to Unit Tests tab
 
-        # Configure the code_area and output_area
-        self.code_area.configure(
-            bg=theme["code_bg"],
-            fg=theme["code_fg"],
-            insertbackground=theme["fg"],
-            selectbackground=theme["select_bg"],       # Now defined
-            selectforeground=theme["select_fg"]        # Now defined
-        )
-        self.output_area.configure(
-            bg=theme["output_bg"],
-            fg=theme["output_fg"],
-            insertbackground=theme["fg"],
-            selectbackground=theme["select_bg"],
-            selectforeground=theme["select_fg"]
-        )
-        self.line_numbers.configure(bg=theme["code_bg"], fg=theme["fg"])
+        self.build_tests_tab()
+        tests_json = self.test_text.get("1.0", tk.END)
+        try:
+            from test_runner import TestRunner
+            tests = json.loads(tests_json)
+            runner = TestRunner(self.code_area.get("1.0", tk.END), self.output, self.compile_cache)
+            results = runner.run_tests(tests)
+            self.output_area.configure(state='normal')
+            self.output_area.insert(tk.END, "\n--- Unit Test Results ---\n")
+            for res in results:
+                self.output_area.insert(tk.END, res + '\n')
+            self.output_area.configure(state='disabled')
+            self.output_area.see(tk.END)
+            # Switch to Output tab automatically
+            self.notebook.select(self.notebook.tabs()[1])  # Assuming Output tab is second
+        except json.JSONDecodeError as e:
+            messagebox.showerror("JSON Error", f"Failed to parse tests: {e}")
+        except Exception as e:
+            messagebox.showerror("Error", f"An error occurred while running tests: {e}")
 
-        # Update menu colors (if implemented)
-        self.update_menu_colors(theme)
+    def step_in(self):
+        messagebox.showinfo("Debugger", "Step In functionality not yet implemented.")
 
-        # Update buttons
-        for button in [self.run_button, self.run_tests_button, self.clear_button]:
-            button.itemconfig(button.rounded_rect, fill=theme["button_bg"], outline=theme["button_bg"])
-            button.itemconfig(button.text_id, fill=theme["text_color"])
-            button.bg_color = theme["button_bg"]
-            button.hover_color = theme["button_hover"]
-            button.text_color = theme["text_color"]
+    def step_over(self):
+        messagebox.showinfo("Debugger", "Step Over functionality not yet implemented.")
 
-        # Update plugin-added buttons if any
-        for child in self.toolbar_frame.winfo_children():
-            if isinstance(child, CustomButton):
-                child.itemconfig(child.rounded_rect, fill=theme["button_bg"], outline=theme["button_bg"])
-                child.itemconfig(child.text_id, fill=theme["text_color"])
-                child.bg_color = theme["button_bg"]
-                child.hover_color = theme["button_hover"]
-                child.text_color = theme["text_color"]
+    def continue_execution(self):
+        messagebox.showinfo("Debugger", "Continue functionality not yet implemented.")
 
-    def update_menu_colors(self, theme):
-        """Update menu colors. Note: Tkinter does not support dynamic menu color changes directly."""
-        # This is a placeholder. Implementing dynamic menu color changes requires more complex handling.
-        pass
+    def clear_output(self):
+        self.output_area.configure(state='normal')
+        self.output_area.delete("1.0", tk.END)
+        self.output_area.configure(state='disabled')
 
     # ===========================
-    # Menu Creation
+    # Linter Methods
     # ===========================
 
-    def create_menu(self):
-        style = ttk.Style()
-        style.theme_use('default')  # Ensure default theme for consistent styling
-
-        menu = tk.Menu(self.root, bg=self.themes[self.current_theme]["bg"], fg=self.themes[self.current_theme]["fg"],
-                      activebackground=self.themes[self.current_theme]["button_bg"],
-                      activeforeground=self.themes[self.current_theme]["text_color"])
-        self.root.config(menu=menu)
-
-        # File Menu
-        file_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                            fg=self.themes[self.current_theme]["fg"],
-                            activebackground=self.themes[self.current_theme]["button_bg"],
-                            activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="File", menu=file_menu)
-        file_menu.add_command(label="Open", command=self.open_file)
-        file_menu.add_command(label="Save", command=self.save_file)
-        file_menu.add_command(label="Save As", command=self.save_as_file)
-        file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
-
-        # Run Menu
-        run_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                           fg=self.themes[self.current_theme]["fg"],
-                           activebackground=self.themes[self.current_theme]["button_bg"],
-                           activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Run", menu=run_menu)
-        run_menu.add_command(label="Run", command=self.run_code)
-        run_menu.add_command(label="Run Tests", command=self.run_tests)
-
-        # Debug Menu
-        debug_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                             fg=self.themes[self.current_theme]["fg"],
-                             activebackground=self.themes[self.current_theme]["button_bg"],
-                             activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Debug", menu=debug_menu)
-        debug_menu.add_command(label="Step In", command=self.step_in)
-        debug_menu.add_command(label="Step Over", command=self.step_over)
-        debug_menu.add_command(label="Continue", command=self.continue_execution)
+    def display_linter_errors(self, errors):
+        """Display linter errors in the output area."""
+        if errors:
+            error_text = "\n".join(errors)
+            self.output(f"Linter Errors:\n{error_text}")
+        else:
+            self.output("No linting errors found.")
 
-        # Tools Menu
-        tools_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                             fg=self.themes[self.current_theme]["fg"],
-                             activebackground=self.themes[self.current_theme]["button_bg"],
-                             activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Tools", menu=tools_menu)
-        tools_menu.add_command(label="Linter", command=self.run_linter)
-        tools_menu.add_command(label="Profile Code", command=self.profile_code)
-
-        # Version Control Menu
-        vc_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                          fg=self.themes[self.current_theme]["fg"],
-                          activebackground=self.themes[self.current_theme]["button_bg"],
-                          activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Version Control", menu=vc_menu)
-        vc_menu.add_command(label="Commit", command=self.commit_code)
-        vc_menu.add_command(label="Push", command=self.push_code)
-        vc_menu.add_command(label="Pull", command=self.pull_code)
-
-        # View Menu
-        view_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                            fg=self.themes[self.current_theme]["fg"],
-                            activebackground=self.themes[self.current_theme]["button_bg"],
-                            activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="View", menu=view_menu)
-        view_menu.add_command(label="Toggle Theme", command=self.toggle_theme)
-        view_menu.add_separator()
-        view_menu.add_command(label="Normal Mode", command=lambda: self.set_mode("Normal"))
-        view_menu.add_command(label="Debug Mode", command=lambda: self.set_mode("Debug"))
-
-        # Templates Menu
-        templates_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                                  fg=self.themes[self.current_theme]["fg"],
-                                  activebackground=self.themes[self.current_theme]["button_bg"],
-                                  activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Templates", menu=templates_menu)
-        templates_menu.add_command(label="If-Else", command=lambda: self.insert_template("If-Else"))
-        templates_menu.add_command(label="Function", command=lambda: self.insert_template("Function"))
-        templates_menu.add_command(label="For Loop", command=lambda: self.insert_template("For Loop"))
-        templates_menu.add_command(label="While Loop", command=lambda: self.insert_template("While Loop"))
-
-        # Cloud Menu
-        cloud_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                             fg=self.themes[self.current_theme]["fg"],
-                             activebackground=self.themes[self.current_theme]["button_bg"],
-                             activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Cloud", menu=cloud_menu)
-        cloud_menu.add_command(label="Save to Dropbox", command=self.save_to_cloud)
-        cloud_menu.add_command(label="Load from Dropbox", command=self.load_from_cloud)
-
-        # Help Menu
-        help_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                            fg=self.themes[self.current_theme]["fg"],
-                            activebackground=self.themes[self.current_theme]["button_bg"],
-                            activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Help", menu=help_menu)
-        help_menu.add_command(label="Documentation", command=self.show_documentation)
-
-    # ===========================
-    # Code Execution Methods
-    # ===========================
-
-    def run_code(self):
-        code = self.code_area.get("1.0", tk.END)
-        self.clear_output()
-
-        def output_callback(message):
-            self.output(message)
-
-        try:
-            lexer = Lexer(code)
-            tokens = lexer.tokenize()
-            parser = Parser(tokens)
-            ast = parser.parse()
-            interpreter = Interpreter(ast, output_callback=output_callback, profiler=self.profiler)
-            self.debugger.interpreter = interpreter  # Link debugger with interpreter
-            interpreter.run()
-            if self.profiler:
-                self.profiler.display_profile()
-            # Switch to Output tab automatically
-            self.notebook.select(self.notebook.tabs()[1])  # Assuming Output tab is second
-        except SyntaxError as e:
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, f"Syntax Error: {e}\n")
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            self.notebook.select(self.notebook.tabs()[1])
-        except ImportError as e:
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, f"Import Error: {e}\n")
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            self.notebook.select(self.notebook.tabs()[1])
-        except Exception as e:
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, f"Error: {e}\n")
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            self.notebook.select(self.notebook.tabs()[1])
-
-    def run_tests(self):
-        current_tab = self.notebook.nametowidget(self.notebook.select())
-        if current_tab != self.notebook.nametowidget(self.notebook.tabs()[2]):
-            self.notebook.select(self.notebook.tabs()[2])  # Switch to Unit Tests tab
-
-        tests_json = self.test_text.get("1.0", tk.END)
-        try:
-            tests = json.loads(tests_json)
-            runner = TestRunner(self.code_area.get("1.0", tk.END), self.output)
-            results = runner.run_tests(tests)
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, "\n--- Unit Test Results ---\n")
-            for res in results:
-                self.output_area.insert(tk.END, res + '\n')
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            # Switch to Output tab automatically
-            self.notebook.select(self.notebook.tabs()[1])  # Assuming Output tab is second
-        except json.JSONDecodeError as e:
-            messagebox.showerror("JSON Error", f"Failed to parse tests: {e}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while running tests: {e}")
-
-    def step_in(self):
-        messagebox.showinfo("Debugger", "Step In functionality not yet implemented.")
-
-    def step_over(self):
-        messagebox.showinfo("Debugger", "Step Over functionality not yet implemented.")
-
-    def continue_execution(self):
-        messagebox.showinfo("Debugger", "Continue functionality not yet implemented.")
-
-    def clear_output(self):
-        self.output_area.configure(state='normal')
-        self.output_area.delete("1.0", tk.END)
-        self.output_area.configure(state='disabled')
-
-    # ===========================
-    # Linter Methods
-    # ===========================
-
-    def display_linter_errors(self, errors):
-        """Display linter errors in the output area."""
-        if errors:
-            error_text = "\n".join(errors)
-            self.output(f"Linter Errors:\n{error_text}")
-        else:
-            self.output("No linting errors found.")
-
-    # ===========================
-    # Theme Toggle Methods
-    # ===========================
-
-    def toggle_theme(self):
-        """Toggle between dark and light themes."""
-        if self.current_theme == "dark":
-            self.apply_theme("light")
-            self.current_theme = "light"
-        else:
-            self.apply_theme("dark")
-            self.current_theme = "dark"
-
-    def apply_theme(self, theme_name):
-        """Apply the selected theme to the GUI."""
-        theme = self.themes[theme_name]
-        self.root.configure(bg=theme["bg"])
-
-        # Configure ttk.Notebook using ttk.Style
-        style = ttk.Style()
-        style.theme_use('default')  # Choose an appropriate theme
-
-        # Configure the Notebook background
-        style.configure('TNotebook', background=theme["bg"])
-
-        # Configure the Notebook Tabs
-        style.configure('TNotebook.Tab', background=theme["button_bg"], foreground=theme["text_color"])
-
-        # Optional: Configure selected tab
-        style.map('TNotebook.Tab',
-                  background=[('selected', theme["button_hover"])],
-                  foreground=[('selected', theme["text_color"])])
-
-        # Configure the code_area and output_area
-        self.code_area.configure(
-            bg=theme["code_bg"],
-            fg=theme["code_fg"],
-            insertbackground=theme["fg"],
-            selectbackground=theme["select_bg"],       # Now defined
-            selectforeground=theme["select_fg"]        # Now defined
-        )
-        self.output_area.configure(
-            bg=theme["output_bg"],
-            fg=theme["output_fg"],
-            insertbackground=theme["fg"],
-            selectbackground=theme["select_bg"],
-            selectforeground=theme["select_fg"]
-        )
-        self.line_numbers.configure(bg=theme["code_bg"], fg=theme["fg"])
-
-        # Update menu colors (if implemented)
-        self.update_menu_colors(theme)
-
-        # Update buttons
-        for button in [self.run_button, self.run_tests_button, self.clear_button]:
-            button.itemconfig(button.rounded_rect, fill=theme["button_bg"], outline=theme["button_bg"])
-            button.itemconfig(button.text_id, fill=theme["text_color"])
-            button.bg_color = theme["button_bg"]
-            button.hover_color = theme["button_hover"]
-            button.text_color = theme["text_color"]
-
-        # Update plugin-added buttons if any
-        for child in self.toolbar_frame.winfo_children():
-            if isinstance(child, CustomButton):
-                child.itemconfig(child.rounded_rect, fill=theme["button_bg"], outline=theme["button_bg"])
-                child.itemconfig(child.text_id, fill=theme["text_color"])
-                child.bg_color = theme["button_bg"]
-                child.hover_color = theme["button_hover"]
-                child.text_color = theme["text_color"]
-
-    def update_menu_colors(self, theme):
-        """Update menu colors. Note: Tkinter does not support dynamic menu color changes directly."""
-        # This is a placeholder. Implementing dynamic menu color changes requires more complex handling.
-        pass
-
-    # ===========================
-    # Menu Creation
-    # ===========================
-
-    def create_menu(self):
-        style = ttk.Style()
-        style.theme_use('default')  # Ensure default theme for consistent styling
-
-        menu = tk.Menu(self.root, bg=self.themes[self.current_theme]["bg"], fg=self.themes[self.current_theme]["fg"],
-                      activebackground=self.themes[self.current_theme]["button_bg"],
-                      activeforeground=self.themes[self.current_theme]["text_color"])
-        self.root.config(menu=menu)
-
-        # File Menu
-        file_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                            fg=self.themes[self.current_theme]["fg"],
-                            activebackground=self.themes[self.current_theme]["button_bg"],
-                            activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="File", menu=file_menu)
-        file_menu.add_command(label="Open", command=self.open_file)
-        file_menu.add_command(label="Save", command=self.save_file)
-        file_menu.add_command(label="Save As", command=self.save_as_file)
-        file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
-
-        # Run Menu
-        run_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                           fg=self.themes[self.current_theme]["fg"],
-                           activebackground=self.themes[self.current_theme]["button_bg"],
-                           activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Run", menu=run_menu)
-        run_menu.add_command(label="Run", command=self.run_code)
-        run_menu.add_command(label="Run Tests", command=self.run_tests)
-
-        # Debug Menu
-        debug_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                             fg=self.themes[self.current_theme]["fg"],
-                             activebackground=self.themes[self.current_theme]["button_bg"],
-                             activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Debug", menu=debug_menu)
-        debug_menu.add_command(label="Step In", command=self.step_in)
-        debug_menu.add_command(label="Step Over", command=self.step_over)
-        debug_menu.add_command(label="Continue", command=self.continue_execution)
-
-        # Tools Menu
-        tools_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                             fg=self.themes[self.current_theme]["fg"],
-                             activebackground=self.themes[self.current_theme]["button_bg"],
-                             activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Tools", menu=tools_menu)
-        tools_menu.add_command(label="Linter", command=self.run_linter)
-        tools_menu.add_command(label="Profile Code", command=self.profile_code)
-
-        # Version Control Menu
-        vc_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                          fg=self.themes[self.current_theme]["fg"],
-                          activebackground=self.themes[self.current_theme]["button_bg"],
-                          activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Version Control", menu=vc_menu)
-        vc_menu.add_command(label="Commit", command=self.commit_code)
-        vc_menu.add_command(label="Push", command=self.push_code)
-        vc_menu.add_command(label="Pull", command=self.pull_code)
-
-        # View Menu
-        view_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                            fg=self.themes[self.current_theme]["fg"],
-                            activebackground=self.themes[self.current_theme]["button_bg"],
-                            activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="View", menu=view_menu)
-        view_menu.add_command(label="Toggle Theme", command=self.toggle_theme)
-        view_menu.add_separator()
-        view_menu.add_command(label="Normal Mode", command=lambda: self.set_mode("Normal"))
-        view_menu.add_command(label="Debug Mode", command=lambda: self.set_mode("Debug"))
-
-        # Templates Menu
-        templates_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                                  fg=self.themes[self.current_theme]["fg"],
-                                  activebackground=self.themes[self.current_theme]["button_bg"],
-                                  activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Templates", menu=templates_menu)
-        templates_menu.add_command(label="If-Else", command=lambda: self.insert_template("If-Else"))
-        templates_menu.add_command(label="Function", command=lambda: self.insert_template("Function"))
-        templates_menu.add_command(label="For Loop", command=lambda: self.insert_template("For Loop"))
-        templates_menu.add_command(label="While Loop", command=lambda: self.insert_template("While Loop"))
-
-        # Cloud Menu
-        cloud_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                             fg=self.themes[self.current_theme]["fg"],
-                             activebackground=self.themes[self.current_theme]["button_bg"],
-                             activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Cloud", menu=cloud_menu)
-        cloud_menu.add_command(label="Save to Dropbox", command=self.save_to_cloud)
-        cloud_menu.add_command(label="Load from Dropbox", command=self.load_from_cloud)
-
-        # Help Menu
-        help_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                            fg=self.themes[self.current_theme]["fg"],
-                            activebackground=self.themes[self.current_theme]["button_bg"],
-                            activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Help", menu=help_menu)
-        help_menu.add_command(label="Documentation", command=self.show_documentation)
-
-    # ===========================
-    # Code Execution Methods
-    # ===========================
-
-    def run_code(self):
-        code = self.code_area.get("1.0", tk.END)
-        self.clear_output()
-
-        def output_callback(message):
-            self.output(message)
-
-        try:
-            lexer = Lexer(code)
-            tokens = lexer.tokenize()
-            parser = Parser(tokens)
-            ast = parser.parse()
-            interpreter = Interpreter(ast, output_callback=output_callback, profiler=self.profiler)
-            self.debugger.interpreter = interpreter  # Link debugger with interpreter
-            interpreter.run()
-            if self.profiler:
-                self.profiler.display_profile()
-            # Switch to Output tab automatically
-            self.notebook.select(self.notebook.tabs()[1])  # Assuming Output tab is second
-        except SyntaxError as e:
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, f"Syntax Error: {e}\n")
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            self.notebook.select(self.notebook.tabs()[1])
-        except ImportError as e:
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, f"Import Error: {e}\n")
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            self.notebook.select(self.notebook.tabs()[1])
-        except Exception as e:
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, f"Error: {e}\n")
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            self.notebook.select(self.notebook.tabs()[1])
-
-    def run_tests(self):
-        current_tab = self.notebook.nametowidget(self.notebook.select())
-        if current_tab != self.notebook.nametowidget(self.notebook.tabs()[2]):
-            self.notebook.select(self.notebook.tabs()[2])  # Switch to Unit Tests tab
-
-        tests_json = self.test_text.get("1.0", tk.END)
-        try:
-            tests = json.loads(tests_json)
-            runner = TestRunner(self.code_area.get("1.0", tk.END), self.output)
-            results = runner.run_tests(tests)
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, "\n--- Unit Test Results ---\n")
-            for res in results:
-                self.output_area.insert(tk.END, res + '\n')
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            # Switch to Output tab automatically
-            self.notebook.select(self.notebook.tabs()[1])  # Assuming Output tab is second
-        except json.JSONDecodeError as e:
-            messagebox.showerror("JSON Error", f"Failed to parse tests: {e}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while running tests: {e}")
-
-    def step_in(self):
-        messagebox.showinfo("Debugger", "Step In functionality not yet implemented.")
-
-    def step_over(self):
-        messagebox.showinfo("Debugger", "Step Over functionality not yet implemented.")
-
-    def continue_execution(self):
-        messagebox.showinfo("Debugger", "Continue functionality not yet implemented.")
-
-    def clear_output(self):
-        self.output_area.configure(state='normal')
-        self.output_area.delete("1.0", tk.END)
-        self.output_area.configure(state='disabled')
-
-    # ===========================
-    # Linter Methods
-    # ===========================
-
-    def display_linter_errors(self, errors):
-        """Display linter errors in the output area."""
-        if errors:
-            error_text = "\n".join(errors)
-            self.output(f"Linter Errors:\n{error_text}")
-        else:
-            self.output("No linting errors found.")
-
-    def run_linter(self):
-        """Run the linter on the current code."""
-        code = self.code_area.get("1.0", tk.END)
-        self.linter.lint(code)
-
-    # ===========================
-    # Theme Toggle Methods
-    # ===========================
-
-    def toggle_theme(self):
-        """Toggle between dark and light themes."""
-        if self.current_theme == "dark":
-            self.apply_theme("light")
-            self.current_theme = "light"
-        else:
-            self.apply_theme("dark")
-            self.current_theme = "dark"
-
-    def apply_theme(self, theme_name):
-        """Apply the selected theme to the GUI."""
-        theme = self.themes[theme_name]
-        self.root.configure(bg=theme["bg"])
-
-        # Configure ttk.Notebook using ttk.Style
-        style = ttk.Style()
-        style.theme_use('default')  # Choose an appropriate theme
-
-        # Configure the Notebook background
-        style.configure('TNotebook', background=theme["bg"])
-
-        # Configure the Notebook Tabs
-        style.configure('TNotebook.Tab', background=theme["button_bg"], foreground=theme["text_color"])
-
-        # Optional: Configure selected tab
-        style.map('TNotebook.Tab',
-                  background=[('selected', theme["button_hover"])],
-                  foreground=[('selected', theme["text_color"])])
-
-        # Configure the code_area and output_area
-        self.code_area.configure(
-            bg=theme["code_bg"],
-            fg=theme["code_fg"],
-            insertbackground=theme["fg"],
-            selectbackground=theme["select_bg"],       # Now defined
-            selectforeground=theme["select_fg"]        # Now defined
-        )
-        self.output_area.configure(
-            bg=theme["output_bg"],
-            fg=theme["output_fg"],
-            insertbackground=theme["fg"],
-            selectbackground=theme["select_bg"],
-            selectforeground=theme["select_fg"]
-        )
-        self.line_numbers.configure(bg=theme["code_bg"], fg=theme["fg"])
-
-        # Update menu colors (if implemented)
-        self.update_menu_colors(theme)
-
-        # Update buttons
-        for button in [self.run_button, self.run_tests_button, self.clear_button]:
-            button.itemconfig(button.rounded_rect, fill=theme["button_bg"], outline=theme["button_bg"])
-            button.itemconfig(button.text_id, fill=theme["text_color"])
-            button.bg_color = theme["button_bg"]
-            button.hover_color = theme["button_hover"]
-            button.text_color = theme["text_color"]
-
-        # Update plugin-added buttons if any
-        for child in self.toolbar_frame.winfo_children():
-            if isinstance(child, CustomButton):
-                child.itemconfig(child.rounded_rect, fill=theme["button_bg"], outline=theme["button_bg"])
-                child.itemconfig(child.text_id, fill=theme["text_color"])
-                child.bg_color = theme["button_bg"]
-                child.hover_color = theme["button_hover"]
-                child.text_color = theme["text_color"]
-
-    def update_menu_colors(self, theme):
-        """Update menu colors. Note: Tkinter does not support dynamic menu color changes directly."""
-        # This is a placeholder. Implementing dynamic menu color changes requires more complex handling.
-        pass
-
-    # ===========================
-    # Menu Creation
-    # ===========================
-
-    def create_menu(self):
-        style = ttk.Style()
-        style.theme_use('default')  # Ensure default theme for consistent styling
-
-        menu = tk.Menu(self.root, bg=self.themes[self.current_theme]["bg"], fg=self.themes[self.current_theme]["fg"],
-                      activebackground=self.themes[self.current_theme]["button_bg"],
-                      activeforeground=self.themes[self.current_theme]["text_color"])
-        self.root.config(menu=menu)
-
-        # File Menu
-        file_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                            fg=self.themes[self.current_theme]["fg"],
-                            activebackground=self.themes[self.current_theme]["button_bg"],
-                            activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="File", menu=file_menu)
-        file_menu.add_command(label="Open", command=self.open_file)
-        file_menu.add_command(label="Save", command=self.save_file)
-        file_menu.add_command(label="Save As", command=self.save_as_file)
-        file_menu.add_separator()
-        file_menu.add_command(label="Exit", command=self.root.quit)
-
-        # Run Menu
-        run_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                           fg=self.themes[self.current_theme]["fg"],
-                           activebackground=self.themes[self.current_theme]["button_bg"],
-                           activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Run", menu=run_menu)
-        run_menu.add_command(label="Run", command=self.run_code)
-        run_menu.add_command(label="Run Tests", command=self.run_tests)
-
-        # Debug Menu
-        debug_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                             fg=self.themes[self.current_theme]["fg"],
-                             activebackground=self.themes[self.current_theme]["button_bg"],
-                             activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Debug", menu=debug_menu)
-        debug_menu.add_command(label="Step In", command=self.step_in)
-        debug_menu.add_command(label="Step Over", command=self.step_over)
-        debug_menu.add_command(label="Continue", command=self.continue_execution)
-
-        # Tools Menu
-        tools_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                             fg=self.themes[self.current_theme]["fg"],
-                             activebackground=self.themes[self.current_theme]["button_bg"],
-                             activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Tools", menu=tools_menu)
-        tools_menu.add_command(label="Linter", command=self.run_linter)
-        tools_menu.add_command(label="Profile Code", command=self.profile_code)
-
-        # Version Control Menu
-        vc_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                          fg=self.themes[self.current_theme]["fg"],
-                          activebackground=self.themes[self.current_theme]["button_bg"],
-                          activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Version Control", menu=vc_menu)
-        vc_menu.add_command(label="Commit", command=self.commit_code)
-        vc_menu.add_command(label="Push", command=self.push_code)
-        vc_menu.add_command(label="Pull", command=self.pull_code)
-
-        # View Menu
-        view_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                            fg=self.themes[self.current_theme]["fg"],
-                            activebackground=self.themes[self.current_theme]["button_bg"],
-                            activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="View", menu=view_menu)
-        view_menu.add_command(label="Toggle Theme", command=self.toggle_theme)
-        view_menu.add_separator()
-        view_menu.add_command(label="Normal Mode", command=lambda: self.set_mode("Normal"))
-        view_menu.add_command(label="Debug Mode", command=lambda: self.set_mode("Debug"))
-
-        # Templates Menu
-        templates_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                                  fg=self.themes[self.current_theme]["fg"],
-                                  activebackground=self.themes[self.current_theme]["button_bg"],
-                                  activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Templates", menu=templates_menu)
-        templates_menu.add_command(label="If-Else", command=lambda: self.insert_template("If-Else"))
-        templates_menu.add_command(label="Function", command=lambda: self.insert_template("Function"))
-        templates_menu.add_command(label="For Loop", command=lambda: self.insert_template("For Loop"))
-        templates_menu.add_command(label="While Loop", command=lambda: self.insert_template("While Loop"))
-
-        # Cloud Menu
-        cloud_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                             fg=self.themes[self.current_theme]["fg"],
-                             activebackground=self.themes[self.current_theme]["button_bg"],
-                             activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Cloud", menu=cloud_menu)
-        cloud_menu.add_command(label="Save to Dropbox", command=self.save_to_cloud)
-        cloud_menu.add_command(label="Load from Dropbox", command=self.load_from_cloud)
-
-        # Help Menu
-        help_menu = tk.Menu(menu, tearoff=0, bg=self.themes[self.current_theme]["bg"],
-                            fg=self.themes[self.current_theme]["fg"],
-                            activebackground=self.themes[self.current_theme]["button_bg"],
-                            activeforeground=self.themes[self.current_theme]["text_color"])
-        menu.add_cascade(label="Help", menu=help_menu)
-        help_menu.add_command(label="Documentation", command=self.show_documentation)
-
-    # ===========================
-    # Code Execution Methods
-    # ===========================
-
-    def run_code(self):
-        code = self.code_area.get("1.0", tk.END)
-        self.clear_output()
-
-        def output_callback(message):
-            self.output(message)
-
-        try:
-            lexer = Lexer(code)
-            tokens = lexer.tokenize()
-            parser = Parser(tokens)
-            ast = parser.parse()
-            interpreter = Interpreter(ast, output_callback=output_callback, profiler=self.profiler)
-            self.debugger.interpreter = interpreter  # Link debugger with interpreter
-            interpreter.run()
-            if self.profiler:
-                self.profiler.display_profile()
-            # Switch to Output tab automatically
-            self.notebook.select(self.notebook.tabs()[1])  # Assuming Output tab is second
-        except SyntaxError as e:
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, f"Syntax Error: {e}\n")
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            self.notebook.select(self.notebook.tabs()[1])
-        except ImportError as e:
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, f"Import Error: {e}\n")
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            self.notebook.select(self.notebook.tabs()[1])
-        except Exception as e:
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, f"Error: {e}\n")
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            self.notebook.select(self.notebook.tabs()[1])
-
-    def run_tests(self):
-        current_tab = self.notebook.nametowidget(self.notebook.select())
-        if current_tab != self.notebook.nametowidget(self.notebook.tabs()[2]):
-            self.notebook.select(self.notebook.tabs()[2])  # Switch to Unit Tests tab
-
-        tests_json = self.test_text.get("1.0", tk.END)
-        try:
-            tests = json.loads(tests_json)
-            runner = TestRunner(self.code_area.get("1.0", tk.END), self.output)
-            results = runner.run_tests(tests)
-            self.output_area.configure(state='normal')
-            self.output_area.insert(tk.END, "\n--- Unit Test Results ---\n")
-            for res in results:
-                self.output_area.insert(tk.END, res + '\n')
-            self.output_area.configure(state='disabled')
-            self.output_area.see(tk.END)
-            # Switch to Output tab automatically
-            self.notebook.select(self.notebook.tabs()[1])  # Assuming Output tab is second
-        except json.JSONDecodeError as e:
-            messagebox.showerror("JSON Error", f"Failed to parse tests: {e}")
-        except Exception as e:
-            messagebox.showerror("Error", f"An error occurred while running tests: {e}")
-
-    def step_in(self):
-        messagebox.showinfo("Debugger", "Step In functionality not yet implemented.")
-
-    def step_over(self):
-        messagebox.showinfo("Debugger", "Step Over functionality not yet implemented.")
-
-    def continue_execution(self):
-        messagebox.showinfo("Debugger", "Continue functionality not yet implemented.")
-
-    def clear_output(self):
-        self.output_area.configure(state='normal')
-        self.output_area.delete("1.0", tk.END)
-        self.output_area.configure(state='disabled')
-
-    # ===========================
-    # Linter Methods
-    # ===========================
-
-    def display_linter_errors(self, errors):
-        """Display linter errors in the output area."""
-        if errors:
-            error_text = "\n".join(errors)
-            self.output(f"Linter Errors:\n{error_text}")
-        else:
-            self.output("No linting errors found.")
+    def display_background_lint_errors(self, errors):
+        """Show background lint results, but only when they differ from the last ones shown."""
+        if errors != self.background_lint_errors:
+            self.background_lint_errors = errors
+            self.display_linter_errors(errors)
 
     def run_linter(self):
         """Run the linter on the current code."""
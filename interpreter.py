@@ -1,12 +1,14 @@
 # interpreter.py
 
 import importlib
+import operator
 import time
 from ast_nodes import *
-from lexer import Lexer
-from parser import Parser
-from debugger import Debugger
-from profiler import Profiler
+from resolver import Resolver, Frame, UNDEFINED
+from type_inference import TypeInference, TypedBinaryOp, TypedArrayAccess, TypedArrayAssignment, ARRAY_INDEX_TYPES
+from quickening import (Feedback, WARMUP, MAX_DEOPTIMIZATIONS, LIST_INDEX_TYPES, GENERIC_CLASSES, BASE_CLASSES,
+                        SpecializedBinaryOp, GenericBinaryOp, SpecializedArrayAccess, GenericArrayAccess,
+                        SpecializedFunctionCall, GenericFunctionCall, specialized_operator)
 
 class Environment:
     def __init__(self, parent=None):
@@ -38,6 +40,107 @@ class ReturnException(Exception):
     def __init__(self, value):
         self.value = value
 
+# Completion signal: statement handlers return RETURN once a 'return' statement has run
+# (the value is left in Interpreter.return_value) and None when execution falls through.
+# The vm and python modes still unwind to the top level with ReturnException.
+RETURN = True
+
+# ===========================
+# Binary Operators
+# ===========================
+
+def binary_add(left, right):
+    if isinstance(left, str) or isinstance(right, str):
+        return str(left) + str(right)
+    return left + right
+
+def binary_sub(left, right):
+    return left - right
+
+def binary_mul(left, right):
+    # Covers number * number as well as string repetition in either order
+    return left * right
+
+def binary_div(left, right):
+    if right == 0:
+        raise ZeroDivisionError("Division by zero.")
+    return left / right
+
+def binary_eq(left, right):
+    return left == right
+
+def binary_neq(left, right):
+    return left != right
+
+def binary_gt(left, right):
+    return left > right
+
+def binary_lt(left, right):
+    return left < right
+
+def binary_gte(left, right):
+    return left >= right
+
+def binary_lte(left, right):
+    return left <= right
+
+def binary_and(left, right):
+    return left and right
+
+def binary_or(left, right):
+    return left or right
+
+def binary_not(left, right):
+    return not right
+
+BINARY_OPERATORS = {
+    '+': binary_add,
+    '-': binary_sub,
+    '*': binary_mul,
+    '/': binary_div,
+    '==': binary_eq,
+    '!=': binary_neq,
+    '>': binary_gt,
+    '<': binary_lt,
+    '>=': binary_gte,
+    '<=': binary_lte,
+    'AND': binary_and,
+    'OR': binary_or,
+    'NOT': binary_not,
+}
+
+# C-level implementations for operators whose semantics match Python's exactly
+FAST_OPERATORS = dict(BINARY_OPERATORS)
+FAST_OPERATORS.update({
+    '-': operator.sub,
+    '*': operator.mul,
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '<': operator.lt,
+    '>=': operator.ge,
+    '<=': operator.le,
+})
+
+def lookup_binary_operator(op):
+    op_func = BINARY_OPERATORS.get(op)
+    if op_func is None:
+        # Logical operators are matched case-insensitively
+        op_func = BINARY_OPERATORS.get(op.upper())
+        if op_func is None:
+            raise RuntimeError(f'Unknown operator: {op}')
+    return op_func
+
+class HandlerTable(dict):
+    """Maps AST node classes to handlers, resolving unregistered subclasses through the MRO."""
+    def __missing__(self, cls):
+        for base in cls.__mro__[1:]:
+            if base in self:
+                handler = self[base]
+                self[cls] = handler
+                return handler
+        raise RuntimeError(f'Unknown node type: {cls}')
+
 class UserFunction:
     def __init__(self, declaration, interpreter):
         self.declaration = declaration
@@ -46,34 +149,84 @@ class UserFunction:
     def __call__(self, *args):
         if len(args) != len(self.declaration.params):
             raise TypeError(f"Function '{self.declaration.name}' expects {len(self.declaration.params)} arguments, got {len(args)}.")
+        interpreter = self.interpreter
         # Create a new environment for the function
-        new_env = Environment(parent=self.interpreter.current_env)
+        new_env = Environment(parent=interpreter.current_env)
         # Bind parameters
         for param, arg in zip(self.declaration.params, args):
             new_env.define(param, arg)
         # Save current environment
-        previous_env = self.interpreter.current_env
-        self.interpreter.current_env = new_env
-        try:
-            for stmt in self.declaration.body:
-                self.interpreter.execute(stmt)
-        except ReturnException as ret:
-            # Restore previous environment
-            self.interpreter.current_env = previous_env
-            return ret.value
+        previous_env = interpreter.current_env
+        interpreter.current_env = new_env
+        handlers = interpreter.exec_handlers
+        debugger = interpreter.debugger
+        for stmt in self.declaration.body:
+            if debugger:
+                debugger.check_breakpoint(stmt)
+            if handlers[type(stmt)](stmt):
+                # Restore previous environment
+                interpreter.current_env = previous_env
+                return interpreter.return_value
         # Restore previous environment
-        self.interpreter.current_env = previous_env
+        interpreter.current_env = previous_env
+        return None
+
+class SlotFunction(UserFunction):
+    """A user function whose variables live in a resolver Frame instead of an Environment."""
+    def __init__(self, declaration, interpreter):
+        super().__init__(declaration, interpreter)
+        # Parameters occupy the first slots unless a name is repeated
+        self.distinct_params = len(set(declaration.params)) == len(declaration.params)
+
+    def __call__(self, *args):
+        declaration = self.declaration
+        if len(args) != len(declaration.params):
+            raise TypeError(f"Function '{declaration.name}' expects {len(declaration.params)} arguments, got {len(args)}.")
+        interpreter = self.interpreter
+        frame = Frame(declaration.scope, parent=interpreter.current_env)
+        if self.distinct_params:
+            frame.values[:len(args)] = args
+        else:
+            for param, arg in zip(declaration.params, args):
+                frame.define(param, arg)
+        previous_env = interpreter.current_env
+        interpreter.current_env = frame
+        handlers = interpreter.exec_handlers
+        debugger = interpreter.debugger
+        for stmt in declaration.body:
+            if debugger:
+                debugger.check_breakpoint(stmt)
+            if handlers[type(stmt)](stmt):
+                interpreter.current_env = previous_env
+                return interpreter.return_value
+        interpreter.current_env = previous_env
         return None
 
 class Interpreter:
-    def __init__(self, ast, output_callback=None, profiler=None, debugger=None):
+    # Execution modes: "tree" walks the AST directly, "closure" compiles it into closures first,
+    # "vm" compiles it to bytecode for the stack machine in vm.py, "python" transpiles it to Python source,
+    # "slots" walks the AST with variables resolved ahead of time to frame slots,
+    # "adaptive" walks the AST and specializes nodes to the types they see at run time (quickening.py)
+    MODES = ('tree', 'closure', 'vm', 'python', 'slots', 'adaptive')
+    WALKING_MODES = ('tree', 'slots', 'adaptive')  # Modes that run the AST itself through the handler tables
+
+    def __init__(self, ast, output_callback=None, profiler=None, debugger=None, mode='tree', infer_types=True):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown execution mode '{mode}'. Expected one of: {', '.join(self.MODES)}.")
         self.ast = ast
+        self.mode = mode
+        self.infer_types = infer_types  # Specialize operations whose operand types can be proven, see type_inference.py
         self.global_env = Environment()
         self.current_env = self.global_env
         self.output_callback = output_callback
         self.profiler = profiler
         self.debugger = debugger
         self.outputs = []  # Store outputs for testing
+        self.return_value = None  # Value of the most recent 'return', see RETURN
+        self.error = None  # Message of the runtime error that stopped run(), if any
+        self.quickening = {'specialized': 0, 'deoptimized': 0}  # Adaptive mode: times nodes were rewritten either way
+        self.adapted_nodes = []  # Nodes with feedback, reset when run() finishes
+        self.typed_nodes = []  # Nodes switched to a Typed class, reset when run() finishes
 
         # Initialize built-in functions
         self.global_env.define("print", self.builtin_print)
@@ -81,95 +234,385 @@ class Interpreter:
         self.global_env.define("push", self.builtin_push)
         self.global_env.define("pop", self.builtin_pop)
 
+        # Dispatch tables mapping each AST node class to its handler
+        self.exec_handlers = HandlerTable({
+            VarDeclaration: self.exec_var_declaration,
+            PointerDeclaration: self.exec_pointer_declaration,
+            ImportStatement: self.exec_import,
+            Assignment: self.exec_assignment,
+            ArrayAssignment: self.exec_array_assignment,
+            TypedArrayAssignment: self.exec_typed_array_assignment,
+            PrintStatement: self.exec_print,
+            IfStatement: self.exec_if,
+            WhileStatement: self.exec_while,
+            ForStatement: self.exec_for,
+            FunctionDeclaration: self.exec_function_declaration,
+            FunctionCall: self.exec_expression,
+            ReturnStatement: self.exec_return,
+            ArrayAccess: self.exec_expression,
+            PointerDereference: self.exec_expression,
+        })
+        self.eval_handlers = HandlerTable({
+            Number: self.eval_literal,
+            String: self.eval_literal,
+            Boolean: self.eval_literal,
+            Variable: self.eval_variable,
+            Array: self.eval_array,
+            ArrayAccess: self.eval_array_access,
+            TypedArrayAccess: self.eval_typed_array_access,
+            AttributeAccess: self.eval_attribute_access,
+            BinaryOp: self.eval_binary_op,
+            TypedBinaryOp: self.eval_typed_binary_op,
+            UnaryOp: self.eval_unary_op,
+            FunctionCall: self.call_function,
+            PointerDereference: self.eval_pointer_dereference,
+            ArrayLiteral: self.eval_array,
+        })
+
     def run(self):
         try:
-            for stmt in self.ast.statements:
-                self.execute(stmt)
+            # Programs streamed by Parser.iter_statements cannot be analysed ahead of time
+            if self.infer_types and isinstance(self.ast.statements, list):
+                self.use_static_types()
+            if self.mode == 'closure':
+                from closure_compiler import ClosureCompiler
+                if ClosureCompiler(self).compile_program(self.ast)():
+                    self.runtime_error(f"Runtime error: 'return' outside of function with value {self.return_value}")
+            elif self.mode == 'vm':
+                from vm import VM
+                VM(self).run_program(self.ast)
+            elif self.mode == 'python':
+                from transpiler import Transpiler
+                Transpiler(profile=bool(self.profiler), debug=bool(self.debugger)).transpile(self.ast).run(self)
+            else:
+                if self.mode == 'slots':
+                    self.use_slot_frames()
+                elif self.mode == 'adaptive':
+                    self.use_quickening()
+                for stmt in self.ast.statements:
+                    if self.execute(stmt):
+                        self.runtime_error(f"Runtime error: 'return' outside of function with value {self.return_value}")
+                        break
         except ReturnException as ret:
-            self.output(f"Runtime error: 'return' outside of function with value {ret.value}")
+            self.runtime_error(f"Runtime error: 'return' outside of function with value {ret.value}")
         except Exception as e:
-            self.output(f'Runtime error: {e}')
+            line = getattr(e, 'simplescript_line', None)
+            if line is not None:
+                self.runtime_error(f'Runtime error at line {line}: {e}')
+            else:
+                self.runtime_error(f'Runtime error: {e}')
+        finally:
+            if self.adapted_nodes:
+                self.reset_quickening()
+            if self.typed_nodes:
+                self.reset_static_types()
+
+    def runtime_error(self, message):
+        self.error = message
+        self.output(message)
+
+    def use_slot_frames(self):
+        """Resolve the program's variables to frame slots and switch to the slot-aware handlers."""
+        Resolver(builtins=list(self.global_env.vars)).resolve(self.ast)
+        frame = Frame(self.ast.scope)
+        for name, value in self.global_env.vars.items():
+            frame.define(name, value)
+        self.global_env = self.current_env = frame
+        self.exec_handlers.update({
+            VarDeclaration: self.exec_slot_var_declaration,
+            Assignment: self.exec_slot_assignment,
+            ForStatement: self.exec_slot_for,
+            FunctionDeclaration: self.exec_slot_function_declaration,
+        })
+        self.eval_handlers[Variable] = self.eval_slot_variable
+
+    def use_static_types(self):
+        """Annotate the program with the operand types inference can prove and switch the proven nodes to their Typed class.
+
+        The typed handlers skip the type checks (and, for operators, the generic
+        Python-level operator function); every other node keeps its usual
+        handler. The compiling modes read the annotations themselves, and the
+        profiler times every operator, so neither gets typed nodes.
+        """
+        inference = TypeInference()
+        if not inference.infer(self.ast) or self.mode not in self.WALKING_MODES:
+            return
+        for node, operand_types in inference.annotations.items():
+            if isinstance(node, BinaryOp):
+                if node.op_func is None or self.profiler:
+                    continue
+                node.__class__ = TypedBinaryOp
+            elif operand_types != ARRAY_INDEX_TYPES:
+                continue
+            else:
+                node.__class__ = TypedArrayAccess if isinstance(node, ArrayAccess) else TypedArrayAssignment
+            self.typed_nodes.append(node)
+
+    def reset_static_types(self):
+        """Put every typed node back in its base class."""
+        for node in self.typed_nodes:
+            node.__class__ = type(node).__base__
+        self.typed_nodes = []
+
+    def use_quickening(self):
+        """Switch BinaryOp, ArrayAccess and FunctionCall nodes to handlers that specialize them from runtime feedback.
+
+        Each node is rewritten to a guarded fast handler once it has seen the same
+        operand types (or callee) WARMUP times in a row, and back when the guard
+        fails. The profiler and the debugger need every operation and call to take
+        the generic path, so nothing is quickened while either is attached.
+        """
+        if self.profiler or self.debugger:
+            return
+        handlers = self.eval_handlers
+        # Nodes that stop adapting go back to the handlers of the other modes; typed nodes never adapt
+        handlers.update({
+            GenericBinaryOp: handlers[BinaryOp],
+            GenericArrayAccess: handlers[ArrayAccess],
+            GenericFunctionCall: handlers[FunctionCall],
+        })
+        handlers.update({
+            BinaryOp: self.eval_adaptive_binary_op,
+            SpecializedBinaryOp: self.eval_specialized_binary_op,
+            ArrayAccess: self.eval_adaptive_array_access,
+            SpecializedArrayAccess: self.eval_specialized_array_access,
+            FunctionCall: self.eval_adaptive_function_call,
+            SpecializedFunctionCall: self.eval_specialized_function_call,
+        })
+        self.exec_handlers.update({
+            WhileStatement: self.exec_adaptive_while,
+            ForStatement: self.exec_adaptive_for,
+        })
+
+    def attach_feedback(self, node):
+        node.feedback = feedback = Feedback()
+        self.adapted_nodes.append(node)
+        return feedback
+
+    def quicken(self, node, cls, target):
+        """Rewrite node to cls, specialized to target; with no target it becomes generic for good."""
+        if target is None:
+            node.__class__ = GENERIC_CLASSES[type(node)]
+            return
+        node.feedback.target = target
+        node.__class__ = cls
+        self.quickening['specialized'] += 1
+
+    def deoptimize(self, node, cls):
+        """Return node to the adaptive class cls after a failed guard, or to the generic one after too many."""
+        feedback = node.feedback
+        feedback.seen = feedback.target = None
+        feedback.count = 0
+        feedback.deoptimizations += 1
+        self.quickening['deoptimized'] += 1
+        node.__class__ = cls if feedback.deoptimizations < MAX_DEOPTIMIZATIONS else GENERIC_CLASSES[cls]
+
+    def reset_quickening(self):
+        """Put every node back in its base class and drop its feedback, leaving the AST as it was parsed."""
+        for node in self.adapted_nodes:
+            node.__class__ = BASE_CLASSES.get(type(node), type(node))
+            del node.feedback
+        self.adapted_nodes = []
 
     def execute(self, node):
         if self.debugger:
             self.debugger.check_breakpoint(node)
-        if isinstance(node, VarDeclaration):
-            value = self.evaluate(node.expr)
-            self.current_env.define(node.name, value)
-        elif isinstance(node, PointerDeclaration):
-            # Assuming 'expr' is a Variable node indicating which variable to point to
-            # The pointer itself stores the name of the variable it points to
-            referenced_var_name = self.get_variable_name(node.expr)
-            if not referenced_var_name:
-                raise TypeError("Pointer must point to a variable name.")
-            if not self.is_variable_defined(referenced_var_name):
-                raise NameError(f"Variable '{referenced_var_name}' does not exist to be pointed to.")
-            self.current_env.define(node.name, {"pointer": referenced_var_name})
-        elif isinstance(node, ImportStatement):
-            self.handle_import(node)
-        elif isinstance(node, Assignment):
-            value = self.evaluate(node.expr)
+        return self.exec_handlers[type(node)](node)
+
+    def execute_block(self, statements):
+        # Inlined version of execute() for statement lists; keeps the Python stack shallow
+        handlers = self.exec_handlers
+        debugger = self.debugger
+        for stmt in statements:
+            if debugger:
+                debugger.check_breakpoint(stmt)
+            if handlers[type(stmt)](stmt):
+                return RETURN
+        return None
+
+    # ===========================
+    # Statement Handlers
+    # ===========================
+
+    def exec_var_declaration(self, node):
+        expr = node.expr
+        value = self.eval_handlers[type(expr)](expr)
+        self.current_env.define(node.name, value)
+
+    def exec_pointer_declaration(self, node):
+        # Assuming 'expr' is a Variable node indicating which variable to point to
+        # The pointer itself stores the name of the variable it points to
+        referenced_var_name = self.get_variable_name(node.expr)
+        if not referenced_var_name:
+            raise TypeError("Pointer must point to a variable name.")
+        if not self.is_variable_defined(referenced_var_name):
+            raise NameError(f"Variable '{referenced_var_name}' does not exist to be pointed to.")
+        self.current_env.define(node.name, {"pointer": referenced_var_name})
+
+    def exec_import(self, node):
+        self.handle_import(node)
+
+    def exec_assignment(self, node):
+        expr = node.expr
+        value = self.eval_handlers[type(expr)](expr)
+        self.current_env.set(node.name, value)
+
+    def exec_array_assignment(self, node):
+        array = self.current_env.get(node.array_name)
+        index = self.evaluate(node.index_expr)
+        value = self.evaluate(node.expr)
+        if not isinstance(array, list):
+            raise TypeError(f"Variable '{node.array_name}' is not an array.")
+        if not isinstance(index, int):
+            raise TypeError("Array index must be an integer.")
+        if index < 0 or index >= len(array):
+            raise IndexError("Array index out of bounds.")
+        array[index] = value
+        self.current_env.set(node.array_name, array)
+
+    def exec_typed_array_assignment(self, node):
+        array = self.current_env.get(node.array_name)
+        index = self.evaluate(node.index_expr)
+        value = self.evaluate(node.expr)
+        if index < 0 or index >= len(array):
+            raise IndexError("Array index out of bounds.")
+        array[index] = value
+        self.current_env.set(node.array_name, array)
+
+    def exec_print(self, node):
+        value = self.evaluate(node.expr)
+        self.output(value)
+
+    def exec_if(self, node):
+        condition = node.condition
+        if self.eval_handlers[type(condition)](condition):
+            branch = node.then_branch
+        elif node.else_branch:
+            branch = node.else_branch
+        else:
+            return None
+        handlers = self.exec_handlers
+        debugger = self.debugger
+        for stmt in branch:
+            if debugger:
+                debugger.check_breakpoint(stmt)
+            if handlers[type(stmt)](stmt):
+                return RETURN
+        return None
+
+    def exec_while(self, node):
+        condition = node.condition
+        evaluate_condition = self.eval_handlers[type(condition)]
+        execute_block = self.execute_block
+        while evaluate_condition(condition):
+            if execute_block(node.body):
+                return RETURN
+        return None
+
+    def exec_for(self, node):
+        # Create a new environment for the loop
+        loop_env = Environment(parent=self.current_env)
+        previous_env = self.current_env
+        self.current_env = loop_env
+        condition = node.condition
+        evaluate_condition = self.eval_handlers[type(condition)]
+        execute_block = self.execute_block
+        try:
+            self.execute(node.init)
+            while evaluate_condition(condition):
+                if execute_block(node.body):
+                    return RETURN
+                self.execute(node.increment)
+        finally:
+            self.current_env = previous_env
+
+    # Quickening changes the class of a loop's condition while the loop runs, so the
+    # adaptive mode dispatches on it every iteration instead of looking its handler up once
+    def exec_adaptive_while(self, node):
+        condition = node.condition
+        handlers = self.eval_handlers
+        execute_block = self.execute_block
+        while handlers[type(condition)](condition):
+            if execute_block(node.body):
+                return RETURN
+        return None
+
+    def exec_adaptive_for(self, node):
+        loop_env = Environment(parent=self.current_env)
+        previous_env = self.current_env
+        self.current_env = loop_env
+        condition = node.condition
+        handlers = self.eval_handlers
+        execute_block = self.execute_block
+        try:
+            self.execute(node.init)
+            while handlers[type(condition)](condition):
+                if execute_block(node.body):
+                    return RETURN
+                self.execute(node.increment)
+        finally:
+            self.current_env = previous_env
+
+    def exec_function_declaration(self, node):
+        func = UserFunction(node, self)
+        self.current_env.define(node.name, func)
+
+    def exec_expression(self, node):
+        # Function calls and standalone array accesses used as statements
+        self.eval_handlers[type(node)](node)
+
+    def exec_return(self, node):
+        expr = node.expr
+        self.return_value = self.eval_handlers[type(expr)](expr)
+        return RETURN
+
+    def exec_slot_var_declaration(self, node):
+        expr = node.expr
+        value = self.eval_handlers[type(expr)](expr)
+        values = self.current_env.values
+        if values[node.slot] is not UNDEFINED:
+            raise NameError(f"Variable '{node.name}' already defined.")
+        values[node.slot] = value
+
+    def exec_slot_assignment(self, node):
+        expr = node.expr
+        value = self.eval_handlers[type(expr)](expr)
+        depth = node.depth
+        if depth is None:
             self.current_env.set(node.name, value)
-        elif isinstance(node, ArrayAssignment):
-            array = self.current_env.get(node.array_name)
-            index = self.evaluate(node.index_expr)
-            value = self.evaluate(node.expr)
-            if not isinstance(array, list):
-                raise TypeError(f"Variable '{node.array_name}' is not an array.")
-            if not isinstance(index, int):
-                raise TypeError("Array index must be an integer.")
-            if index < 0 or index >= len(array):
-                raise IndexError("Array index out of bounds.")
-            array[index] = value
-            self.current_env.set(node.array_name, array)
-        elif isinstance(node, PrintStatement):
-            value = self.evaluate(node.expr)
-            self.output(value)
-        elif isinstance(node, IfStatement):
-            condition = self.evaluate(node.condition)
-            if condition:
-                for stmt in node.then_branch:
-                    self.execute(stmt)
-            elif node.else_branch:
-                for stmt in node.else_branch:
-                    self.execute(stmt)
-        elif isinstance(node, WhileStatement):
-            while self.evaluate(node.condition):
-                for stmt in node.body:
-                    self.execute(stmt)
-        elif isinstance(node, ForStatement):
-            # Create a new environment for the loop
-            loop_env = Environment(parent=self.current_env)
-            previous_env = self.current_env
-            self.current_env = loop_env
-            try:
-                self.execute(node.init)
-                while self.evaluate(node.condition):
-                    for stmt in node.body:
-                        self.execute(stmt)
-                    self.execute(node.increment)
-            finally:
-                self.current_env = previous_env
-        elif isinstance(node, FunctionDeclaration):
-            func = UserFunction(node, self)
-            self.current_env.define(node.name, func)
-        elif isinstance(node, FunctionCall):
-            self.evaluate(node)
-        elif isinstance(node, ReturnStatement):
-            value = self.evaluate(node.expr)
-            raise ReturnException(value)
-        elif isinstance(node, ArrayAccess):
-            # Handle standalone array access if necessary
-            self.evaluate(node)
-        elif isinstance(node, PointerDereference):
-            # Handle dereferencing
-            pointer_ref = self.evaluate(node.var)
-            if not isinstance(pointer_ref, dict) or "pointer" not in pointer_ref:
-                raise TypeError(f"Variable '{node.var.name}' is not a valid pointer.")
-            referenced_var_name = pointer_ref["pointer"]
-            return self.current_env.get(referenced_var_name)
+            return
+        frame = self.current_env
+        while depth:
+            frame = frame.parent
+            depth -= 1
+        if frame.values[node.slot] is UNDEFINED:
+            # Declared in this scope but not yet executed: the name refers to an outer variable
+            if frame.parent is None:
+                raise NameError(f"Variable '{node.name}' is not defined.")
+            frame.parent.set(node.name, value)
         else:
-            raise RuntimeError(f'Unknown node type: {type(node)}')
+            frame.values[node.slot] = value
+
+    def exec_slot_for(self, node):
+        previous_env = self.current_env
+        self.current_env = Frame(node.scope, parent=previous_env)
+        condition = node.condition
+        evaluate_condition = self.eval_handlers[type(condition)]
+        execute_block = self.execute_block
+        try:
+            self.execute(node.init)
+            while evaluate_condition(condition):
+                if execute_block(node.body):
+                    return RETURN
+                self.execute(node.increment)
+        finally:
+            self.current_env = previous_env
+
+    def exec_slot_function_declaration(self, node):
+        values = self.current_env.values
+        if values[node.slot] is not UNDEFINED:
+            raise NameError(f"Variable '{node.name}' already defined.")
+        values[node.slot] = SlotFunction(node, self)
 
     def handle_import(self, node):
         module_name = node.module_name
@@ -180,105 +623,179 @@ class Interpreter:
         except ImportError:
             raise ImportError(f"Module '{module_name}' not found.")
 
+    # ===========================
+    # Expression Handlers
+    # ===========================
+
     def evaluate(self, node):
-        if isinstance(node, Number):
-            return node.value
-        elif isinstance(node, String):
-            return node.value
-        elif isinstance(node, Boolean):
-            return node.value
-        elif isinstance(node, Variable):
+        return self.eval_handlers[type(node)](node)
+
+    def eval_literal(self, node):
+        return node.value
+
+    def eval_variable(self, node):
+        return self.current_env.get(node.name)
+
+    def eval_slot_variable(self, node):
+        depth = node.depth
+        if depth is None:
             return self.current_env.get(node.name)
-        elif isinstance(node, Array):
-            return [self.evaluate(elem) for elem in node.elements]
-        elif isinstance(node, ArrayAccess):
-            array = self.evaluate(node.array)
-            index = self.evaluate(node.index)
-            if not isinstance(array, list):
-                raise TypeError(f"Variable '{node.array.name}' is not an array.")
-            if not isinstance(index, int):
-                raise TypeError("Array index must be an integer.")
+        frame = self.current_env
+        while depth:
+            frame = frame.parent
+            depth -= 1
+        value = frame.values[node.slot]
+        if value is UNDEFINED:
+            # Declared in this scope but not yet executed: the name refers to an outer variable
+            if frame.parent is None:
+                raise NameError(f"Variable '{node.name}' is not defined.")
+            return frame.parent.get(node.name)
+        return value
+
+    def eval_array(self, node):
+        return [self.evaluate(elem) for elem in node.elements]
+
+    def eval_array_access(self, node):
+        handlers = self.eval_handlers
+        array = handlers[type(node.array)](node.array)
+        index = handlers[type(node.index)](node.index)
+        if not isinstance(array, list):
+            raise TypeError(f"Variable '{node.array.name}' is not an array.")
+        if not isinstance(index, int):
+            raise TypeError("Array index must be an integer.")
+        if index < 0 or index >= len(array):
+            raise IndexError("Array index out of bounds.")
+        return array[index]
+
+    def eval_typed_array_access(self, node):
+        handlers = self.eval_handlers
+        array = handlers[type(node.array)](node.array)
+        index = handlers[type(node.index)](node.index)
+        if index < 0 or index >= len(array):
+            raise IndexError("Array index out of bounds.")
+        return array[index]
+
+    def eval_adaptive_array_access(self, node):
+        handlers = self.eval_handlers
+        array = handlers[type(node.array)](node.array)
+        index = handlers[type(node.index)](node.index)
+        feedback = node.feedback or self.attach_feedback(node)
+        seen = (type(array), type(index))
+        if seen != feedback.seen:
+            feedback.seen = seen
+            feedback.count = 1
+        else:
+            feedback.count += 1
+            if feedback.count >= WARMUP:
+                self.quicken(node, SpecializedArrayAccess, seen if seen == LIST_INDEX_TYPES else None)
+        return self.index_array(node, array, index)
+
+    def eval_specialized_array_access(self, node):
+        handlers = self.eval_handlers
+        array = handlers[type(node.array)](node.array)
+        index = handlers[type(node.index)](node.index)
+        if type(array) is list and type(index) is int:
             if index < 0 or index >= len(array):
                 raise IndexError("Array index out of bounds.")
             return array[index]
-        elif isinstance(node, AttributeAccess):
-            obj = self.evaluate(node.obj)
-            if hasattr(obj, node.attribute):
-                return getattr(obj, node.attribute)
-            else:
-                raise AttributeError(f"Object '{obj}' has no attribute '{node.attribute}'.")
-        elif isinstance(node, BinaryOp):
-            left = self.evaluate(node.left)
-            right = self.evaluate(node.right)
-            if self.profiler:
-                start_time = time.time()
-            if node.op == '+':
-                if isinstance(left, str) or isinstance(right, str):
-                    result = str(left) + str(right)
-                elif isinstance(left, list) and isinstance(right, list):
-                    result = left + right
-                else:
-                    result = left + right
-            elif node.op == '-':
-                result = left - right
-            elif node.op == '*':
-                if isinstance(left, str) and isinstance(right, int):
-                    result = left * right
-                elif isinstance(right, str) and isinstance(left, int):
-                    result = right * left
-                else:
-                    result = left * right
-            elif node.op == '/':
-                if right == 0:
-                    raise ZeroDivisionError("Division by zero.")
-                result = left / right
-            elif node.op == '==':
-                result = left == right
-            elif node.op == '!=':
-                result = left != right
-            elif node.op == '>':
-                result = left > right
-            elif node.op == '<':
-                result = left < right
-            elif node.op == '>=':
-                result = left >= right
-            elif node.op == '<=':
-                result = left <= right
-            elif node.op.upper() == 'AND':
-                result = left and right
-            elif node.op.upper() == 'OR':
-                result = left or right
-            elif node.op.upper() == 'NOT':
-                result = not right
-            else:
-                raise RuntimeError(f'Unknown operator: {node.op}')
-            if self.profiler:
-                end_time = time.time()
-                self.profiler.profile(node.op, end_time - start_time)
+        self.deoptimize(node, ArrayAccess)
+        return self.index_array(node, array, index)
+
+    def index_array(self, node, array, index):
+        # The checks of eval_array_access, for operands that have already been evaluated
+        if not isinstance(array, list):
+            raise TypeError(f"Variable '{node.array.name}' is not an array.")
+        if not isinstance(index, int):
+            raise TypeError("Array index must be an integer.")
+        if index < 0 or index >= len(array):
+            raise IndexError("Array index out of bounds.")
+        return array[index]
+
+    def eval_attribute_access(self, node):
+        obj = self.evaluate(node.obj)
+        if hasattr(obj, node.attribute):
+            return getattr(obj, node.attribute)
+        else:
+            raise AttributeError(f"Object '{obj}' has no attribute '{node.attribute}'.")
+
+    def eval_binary_op(self, node):
+        handlers = self.eval_handlers
+        left = handlers[type(node.left)](node.left)
+        right = handlers[type(node.right)](node.right)
+        op_func = lookup_binary_operator(node.op)
+        if self.profiler:
+            start_time = time.time()
+            result = op_func(left, right)
+            end_time = time.time()
+            self.profiler.profile(node.op, end_time - start_time)
             return result
-        elif isinstance(node, UnaryOp):
-            operand = self.evaluate(node.operand)
-            if node.op.upper() == 'NOT':
-                return not operand
-            else:
-                raise RuntimeError(f'Unknown unary operator: {node.op}')
-        elif isinstance(node, FunctionCall):
-            return self.call_function(node)
-        elif isinstance(node, PointerDereference):
-            pointer_ref = self.evaluate(node.var)
-            if not isinstance(pointer_ref, dict) or "pointer" not in pointer_ref:
-                raise TypeError(f"Variable '{node.var.name}' is not a valid pointer.")
-            referenced_var_name = pointer_ref["pointer"]
-            return self.current_env.get(referenced_var_name)
-        elif isinstance(node, ArrayLiteral):
-            return [self.evaluate(elem) for elem in node.elements]
+        return op_func(left, right)
+
+    def eval_typed_binary_op(self, node):
+        handlers = self.eval_handlers
+        left = handlers[type(node.left)](node.left)
+        right = handlers[type(node.right)](node.right)
+        return node.op_func(left, right)
+
+    def eval_adaptive_binary_op(self, node):
+        handlers = self.eval_handlers
+        left = handlers[type(node.left)](node.left)
+        right = handlers[type(node.right)](node.right)
+        feedback = node.feedback or self.attach_feedback(node)
+        seen = (type(left), type(right))
+        if seen != feedback.seen:
+            feedback.seen = seen
+            feedback.count = 1
+        else:
+            feedback.count += 1
+            if feedback.count >= WARMUP:
+                self.quicken(node, SpecializedBinaryOp, specialized_operator(node.op, *seen))
+        return lookup_binary_operator(node.op)(left, right)
+
+    def eval_specialized_binary_op(self, node):
+        handlers = self.eval_handlers
+        left = handlers[type(node.left)](node.left)
+        right = handlers[type(node.right)](node.right)
+        feedback = node.feedback
+        left_type, right_type = feedback.seen
+        if type(left) is left_type and type(right) is right_type:
+            return feedback.target(left, right)
+        self.deoptimize(node, BinaryOp)
+        return lookup_binary_operator(node.op)(left, right)
+
+    def eval_unary_op(self, node):
+        operand = self.evaluate(node.operand)
+        if node.op.upper() == 'NOT':
+            return not operand
         else:
-            raise RuntimeError(f'Unknown node type: {type(node)}')
+            raise RuntimeError(f'Unknown unary operator: {node.op}')
+
+    def eval_pointer_dereference(self, node):
+        pointer_ref = self.evaluate(node.var)
+        if not isinstance(pointer_ref, dict) or "pointer" not in pointer_ref:
+            raise TypeError(f"Variable '{node.var.name}' is not a valid pointer.")
+        referenced_var_name = pointer_ref["pointer"]
+        return self.current_env.get(referenced_var_name)
 
     def call_function(self, node):
-        func = self.evaluate(node.name)
+        handlers = self.eval_handlers
+        func = handlers[type(node.name)](node.name)
+        if callable(func):
+            args = [handlers[type(arg)](arg) for arg in node.args]
+            try:
+                if self.debugger:
+                    self.debugger.before_function_call(func, args)
+                return func(*args)
+            except Exception as e:
+                raise RuntimeError(f"Error calling function '{node.name.name}': {e}")
+        else:
+            raise TypeError(f"'{node.name.name}' is not callable.")
+
+    def call_value(self, node, func):
+        # call_function for a callee that has already been evaluated
         if callable(func):
-            args = [self.evaluate(arg) for arg in node.args]
+            handlers = self.eval_handlers
+            args = [handlers[type(arg)](arg) for arg in node.args]
             try:
                 if self.debugger:
                     self.debugger.before_function_call(func, args)
@@ -288,6 +805,48 @@ class Interpreter:
         else:
             raise TypeError(f"'{node.name.name}' is not callable.")
 
+    def eval_adaptive_function_call(self, node):
+        func = self.eval_handlers[type(node.name)](node.name)
+        feedback = node.feedback or self.attach_feedback(node)
+        if type(func) is UserFunction:
+            declaration = func.declaration
+            if declaration is not feedback.seen:
+                feedback.seen = declaration
+                feedback.count = 1
+            else:
+                feedback.count += 1
+                if feedback.count >= WARMUP:
+                    params = declaration.params
+                    inlinable = len(node.args) == len(params) == len(set(params))
+                    self.quicken(node, SpecializedFunctionCall, declaration if inlinable else None)
+        else:
+            # Builtins and imported callables have no faster path
+            node.__class__ = GenericFunctionCall
+        return self.call_value(node, func)
+
+    def eval_specialized_function_call(self, node):
+        handlers = self.eval_handlers
+        func = handlers[type(node.name)](node.name)
+        declaration = node.feedback.target
+        if type(func) is not UserFunction or func.declaration is not declaration:
+            self.deoptimize(node, FunctionCall)
+            return self.call_value(node, func)
+        # UserFunction.__call__ inlined; the arity and distinct parameters were checked when the node was specialized
+        env = Environment(parent=self.current_env)
+        env.vars = dict(zip(declaration.params, [handlers[type(arg)](arg) for arg in node.args]))
+        previous_env = self.current_env
+        self.current_env = env
+        exec_handlers = self.exec_handlers
+        try:
+            for stmt in declaration.body:
+                if exec_handlers[type(stmt)](stmt):
+                    self.current_env = previous_env
+                    return self.return_value
+        except Exception as e:
+            raise RuntimeError(f"Error calling function '{node.name.name}': {e}")
+        self.current_env = previous_env
+        return None
+
     def builtin_print(self, *args):
         message = ' '.join(str(arg) for arg in args)
         self.output(message)
@@ -330,4 +889,13 @@ class Interpreter:
             self.current_env.get(name)
             return True
         except NameError:
-            return False
\ No newline at end of file
+            return False
+if __name__ == '__main__':
+    # Usage: python interpreter.py file.ss
+    # The file is lexed and parsed lazily and each statement runs as soon as it is parsed,
+    # so huge generated scripts start executing early and need bounded memory.
+    import sys
+    from lexer import Lexer
+    from parser import Parser
+    with open(sys.argv[1], 'rb') as file:
+        Interpreter(Program(Parser.iter_statements(Lexer(file).iter_tokens()))).run()
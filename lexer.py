@@ -1,6 +1,8 @@
 # lexer.py
 
 import re
+import codecs
+from array import array
 from ast_nodes import *
 
 class Token:
@@ -13,77 +15,525 @@ class Token:
     def __repr__(self):
         return f'Token({self.type}, {self.value}, Line: {self.line}, Column: {self.column})'
 
+# ===========================
+# Token Specification
+# ===========================
+# Built once at import; every Lexer shares the compiled master pattern.
+
+KEYWORDS = frozenset({'var', 'if', 'else', 'while', 'for', 'function', 'return', 'print', 'import', 'pointer'})
+
+# Whitespace comes first: it is the most frequent match and no other pattern can start
+# with a space, tab or newline, so trying it early changes no result but halves the work.
+# The remaining patterns keep their relative order, which does matter (e.g. ASSIGN before EQ).
+TOKEN_SPECIFICATION = [
+    ('SKIP',     r'[ \t]+'),                   # Skip Over Spaces and Tabs
+    ('NEWLINE',  r'\n'),                       # Line Break
+    ('MCOMMENT', r'/\*[\s\S]*?\*/'),          # Multiline Comment
+    ('COMMENT',  r'//.*'),                    # Single Line Comment
+    ('NUMBER',   r'\b\d+(?:\.\d+)?\b'),       # Integer or Decimal Number
+    ('STRING',   r'"(?:[^"\\]|\\.)*"'),       # String Literal
+    ('AND',      r'\bAND\b'),                 # Logical AND
+    ('OR',       r'\bOR\b'),                  # Logical OR
+    ('NOT',      r'\bNOT\b'),                 # Logical NOT
+    ('ID',       r'\b[A-Za-z_]\w*\b'),        # Identifiers
+    ('POINTER',  r'\*'),                      # Pointer Symbol
+    ('ASSIGN',   r'='),                        # Assignment Operator
+    ('END',      r';'),                        # Statement Terminator
+    ('EQ',       r'=='),                       # Equal Operator
+    ('NEQ',      r'!='),                       # Not Equal Operator
+    ('GTE',      r'>='),                       # Greater Than or Equal
+    ('LTE',      r'<='),                       # Less Than or Equal
+    ('GT',       r'>'),                        # Greater Than
+    ('LT',       r'<'),                        # Less Than
+    ('OP',       r'[+\-*/]'),                  # Arithmetic Operators
+    ('LPAREN',   r'\('),                       # Left Parenthesis
+    ('RPAREN',   r'\)'),                       # Right Parenthesis
+    ('LBRACE',   r'\{'),                       # Left Brace
+    ('RBRACE',   r'\}'),                       # Right Brace
+    ('LBRACKET', r'\['),                       # Left Bracket
+    ('RBRACKET', r'\]'),                       # Right Bracket
+    ('COMMA',    r','),                        # Comma
+    ('DOT',      r'\.'),                       # Dot for Attribute Access
+    ('MISMATCH', r'.'),                        # Any Other Character
+]
+
+# Only the named groups capture, so a match's lastindex identifies its kind
+TOKEN_REGEX = re.compile('|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPECIFICATION))
+
+# What tokenize() does with a match
+EMIT = 0        # Token of the group's kind with the matched text as value
+IDENTIFIER = 1  # Keyword, boolean or identifier
+NUMBER = 2      # Integer or float value
+STRING = 3      # Unquoted, unescaped value
+NEWLINE = 4     # Advance the line counter
+IGNORE = 5      # Whitespace and comments
+MISMATCH = 6    # Syntax error
+
+SPECIAL_ACTIONS = {
+    'ID': IDENTIFIER,
+    'NUMBER': NUMBER,
+    'STRING': STRING,
+    'NEWLINE': NEWLINE,
+    'SKIP': IGNORE,
+    'COMMENT': IGNORE,
+    'MCOMMENT': IGNORE,
+    'MISMATCH': MISMATCH,
+}
+
+# (kind, action) for each group index of TOKEN_REGEX; index 0 is the whole match
+TOKEN_KINDS = [(None, None)] + [(name, SPECIAL_ACTIONS.get(name, EMIT)) for name, _ in TOKEN_SPECIFICATION]
+
+# Token type and value for identifiers that are not plain IDs, keyed by their lowercase spelling
+RESERVED_WORDS = {word: (word.upper(), None) for word in KEYWORDS}
+RESERVED_WORDS['true'] = ('BOOLEAN', True)
+RESERVED_WORDS['false'] = ('BOOLEAN', False)
+
+# iter_tokens() reads file and mmap sources in chunks of this many characters (bytes for binary sources)
+CHUNK_SIZE = 1 << 16
+
+# Characters past the end of a match that can still change it (e.g. '12' + '.5', '>' + '=')
+LOOKAHEAD = 2
+
+# Every token type the lexer can produce; a type's code is its index in this list
+# (the keyword 'pointer' shares the POINTER type with the '*' symbol)
+TOKEN_TYPES = list(dict.fromkeys([name for name, action in TOKEN_KINDS[1:] if action in (EMIT, IDENTIFIER, NUMBER, STRING)]
+                                 + sorted(word.upper() for word in KEYWORDS) + ['BOOLEAN', 'EOF']))
+TOKEN_CODES = {name: code for code, name in enumerate(TOKEN_TYPES)}
+
+class TokenStream:
+    """Tokens stored column-wise instead of as one Token object each.
+
+    kinds, lines, columns and values are parallel arrays; kinds holds a
+    TOKEN_CODES code and values an index into value_table, where every
+    distinct token value is stored once. Indexing or iterating the stream
+    materializes Token objects, so it can stand in for the list returned
+    by Lexer.tokenize().
+    """
+    __slots__ = ('kinds', 'lines', 'columns', 'values', 'value_table', 'value_indices')
+
+    def __init__(self):
+        self.kinds = array('B')
+        self.lines = array('I')
+        self.columns = array('I')
+        self.values = array('I')
+        self.value_table = []
+        self.value_indices = {}
+
+    @classmethod
+    def from_tokens(cls, tokens):
+        stream = cls()
+        for token in tokens:
+            stream.append(token.type, token.value, token.line, token.column)
+        return stream
+
+    def intern(self, value):
+        # Strings key themselves; other values also key on their type so that 1, 1.0 and True stay distinct
+        key = value if type(value) is str else (type(value), value)
+        index = self.value_indices.get(key)
+        if index is None:
+            index = self.value_indices[key] = len(self.value_table)
+            self.value_table.append(value)
+        return index
+
+    def append(self, type_, value, line, column):
+        self.kinds.append(TOKEN_CODES[type_])
+        self.lines.append(line)
+        self.columns.append(column)
+        self.values.append(self.intern(value))
+
+    def type_at(self, index):
+        return TOKEN_TYPES[self.kinds[index]]
+
+    def value_at(self, index):
+        return self.value_table[self.values[index]]
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Token(TOKEN_TYPES[self.kinds[index]], self.value_table[self.values[index]],
+                     self.lines[index], self.columns[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return f'TokenStream({len(self)} tokens, {len(self.value_table)} distinct values)'
+
+def read_chunks(source, chunk_size=CHUNK_SIZE):
+    """Yield str chunks from a text file, binary file or mmap; binary data is decoded as UTF-8."""
+    decoder = None
+    while True:
+        chunk = source.read(chunk_size)
+        if not chunk:
+            break
+        if not isinstance(chunk, str):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder('utf-8')()
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if decoder is not None:
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail
+
 class Lexer:
     def __init__(self, code):
+        # code is the program text, or a file object or mmap to be read by iter_tokens()
         self.code = code
-        self.keywords = {'var', 'if', 'else', 'while', 'for', 'function', 'return', 'print', 'import', 'pointer'}
-        self.token_specification = [
-            ('MCOMMENT', r'/\*[\s\S]*?\*/'),          # Multiline Comment
-            ('COMMENT',  r'//.*'),                    # Single Line Comment
-            ('NUMBER',   r'\b\d+(\.\d+)?\b'),         # Integer or Decimal Number
-            ('STRING',   r'"([^"\\]|\\.)*"'),         # String Literal
-            ('AND',      r'\bAND\b'),                 # Logical AND
-            ('OR',       r'\bOR\b'),                  # Logical OR
-            ('NOT',      r'\bNOT\b'),                 # Logical NOT
-            ('ID',       r'\b[A-Za-z_]\w*\b'),        # Identifiers
-            ('POINTER',  r'\*'),                      # Pointer Symbol
-            ('ASSIGN',   r'='),                        # Assignment Operator
-            ('END',      r';'),                        # Statement Terminator
-            ('EQ',       r'=='),                       # Equal Operator
-            ('NEQ',      r'!='),                       # Not Equal Operator
-            ('GTE',      r'>='),                       # Greater Than or Equal
-            ('LTE',      r'<='),                       # Less Than or Equal
-            ('GT',       r'>'),                        # Greater Than
-            ('LT',       r'<'),                        # Less Than
-            ('OP',       r'[+\-*/]'),                  # Arithmetic Operators
-            ('LPAREN',   r'\('),                       # Left Parenthesis
-            ('RPAREN',   r'\)'),                       # Right Parenthesis
-            ('LBRACE',   r'\{'),                       # Left Brace
-            ('RBRACE',   r'\}'),                       # Right Brace
-            ('LBRACKET', r'\['),                       # Left Bracket
-            ('RBRACKET', r'\]'),                       # Right Bracket
-            ('COMMA',    r','),                        # Comma
-            ('DOT',      r'\.'),                       # Dot for Attribute Access
-            ('NEWLINE',  r'\n'),                       # Line Break
-            ('SKIP',     r'[ \t]+'),                   # Skip Over Spaces and Tabs
-            ('MISMATCH', r'.'),                        # Any Other Character
-        ]
-
-        self.token_regex = '|'.join(f'(?P<{pair[0]}>{pair[1]})' for pair in self.token_specification)
+        self.keywords = KEYWORDS
+        self.token_specification = TOKEN_SPECIFICATION
+        self.token_regex = TOKEN_REGEX
         self.line = 1
         self.column = 1
 
     def tokenize(self):
-        tokens = []
-        for mo in re.finditer(self.token_regex, self.code):
-            kind = mo.lastgroup
+        return list(self.tokenize_stream())
+
+    def tokenize_stream(self):
+        """Tokenize the whole source into a compact TokenStream."""
+        stream = TokenStream()
+        kinds = stream.kinds
+        lines = stream.lines
+        columns = stream.columns
+        values = stream.values
+        intern = stream.intern
+        token_kinds = TOKEN_KINDS
+        token_codes = TOKEN_CODES
+        reserved_words = RESERVED_WORDS
+        id_code = token_codes['ID']
+        line = self.line
+        column = self.column
+        for mo in TOKEN_REGEX.finditer(self.code):
+            kind, action = token_kinds[mo.lastindex]
             value = mo.group()
-            if kind == 'NUMBER':
+            # Branches are ordered by how often each action occurs in typical code
+            if action == IGNORE:
+                column += len(value)  # Ignore whitespace and comments
+                continue
+            elif action == EMIT:
+                kinds.append(token_codes[kind])
+            elif action == IDENTIFIER:
+                reserved = reserved_words.get(value.lower())
+                if reserved is None:
+                    kinds.append(id_code)
+                else:
+                    kinds.append(token_codes[reserved[0]])
+                    if reserved[0] == 'BOOLEAN':
+                        value = reserved[1]
+            elif action == NEWLINE:
+                line += 1
+                column = 1
+                continue
+            elif action == NUMBER:
+                kinds.append(token_codes['NUMBER'])
                 value = float(value) if '.' in value else int(value)
-                tokens.append(Token('NUMBER', value, self.line, self.column))
-            elif kind == 'STRING':
+            elif action == STRING:
+                kinds.append(token_codes['STRING'])
                 # Handle escape sequences within strings
                 value = bytes(value[1:-1], "utf-8").decode("unicode_escape")
-                tokens.append(Token('STRING', value, self.line, self.column))
-            elif kind in {'AND', 'OR', 'NOT'}:
-                tokens.append(Token(kind, value, self.line, self.column))
-            elif kind == 'ID':
-                lower_val = value.lower()
-                if lower_val in self.keywords:
-                    tokens.append(Token(lower_val.upper(), value, self.line, self.column))
-                elif lower_val in {'true', 'false'}:
-                    tokens.append(Token('BOOLEAN', lower_val == 'true', self.line, self.column))
-                else:
-                    tokens.append(Token('ID', value, self.line, self.column))
-            elif kind in {'ASSIGN', 'END', 'EQ', 'NEQ', 'GTE', 'LTE', 'GT', 'LT', 'OP', 'LPAREN', 'RPAREN', 'LBRACE', 'RBRACE', 'COMMA', 'DOT', 'LBRACKET', 'RBRACKET', 'POINTER'}:
-                tokens.append(Token(kind, value, self.line, self.column))
-            elif kind == 'NEWLINE':
-                self.line += 1
-                self.column = 0
-            elif kind in {'SKIP', 'COMMENT', 'MCOMMENT'}:
-                pass  # Ignore whitespace and comments
-            elif kind == 'MISMATCH':
-                raise SyntaxError(f'Unexpected character {value!r} at line {self.line} column {self.column}')
-            self.column += mo.end() - mo.start()
-        tokens.append(Token('EOF', '', self.line, self.column))
-        return tokens
\ No newline at end of file
+            else:
+                self.line, self.column = line, column
+                raise SyntaxError(f'Unexpected character {value!r} at line {line} column {column}')
+            lines.append(line)
+            columns.append(column)
+            values.append(intern(value))
+            column += len(mo.group())
+        self.line, self.column = line, column
+        stream.append('EOF', '', line, column)
+        return stream
+
+    def iter_tokens(self, chunk_size=CHUNK_SIZE):
+        """Yield Tokens one at a time, ending with EOF.
+
+        If code is a file object or mmap it is read chunk by chunk, so only
+        the unconsumed tail of the current chunk is held in memory. A match
+        that ends within LOOKAHEAD characters of the buffered text, or that
+        may be the start of a longer lexeme ('/' before '*', an unterminated
+        string), is retried once more text has been read; this is what lets
+        comments, strings and numbers straddle chunk boundaries.
+        """
+        if isinstance(self.code, str):
+            chunks = iter((self.code,))
+        else:
+            chunks = read_chunks(self.code, chunk_size)
+        token_kinds = TOKEN_KINDS
+        reserved_words = RESERVED_WORDS
+        match = TOKEN_REGEX.match
+        buffer = ''
+        pos = 0
+        eof = False
+        line = self.line
+        column = self.column
+        while True:
+            mo = match(buffer, pos) if pos < len(buffer) else None
+            if not eof:
+                if mo is None or mo.end() > len(buffer) - LOOKAHEAD or (
+                        token_kinds[mo.lastindex][1] == MISMATCH or (mo.group() == '/' and buffer.startswith('*', mo.end()))):
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        eof = True
+                    else:
+                        # Keep one consumed character so \b at the start of the next match sees its left neighbour
+                        start = max(pos - 1, 0)
+                        buffer = buffer[start:] + chunk
+                        pos -= start
+                    continue
+            if mo is None:
+                break
+            kind, action = token_kinds[mo.lastindex]
+            value = mo.group()
+            pos = mo.end()
+            if action == IGNORE:
+                column += len(value)
+                continue
+            elif action == NEWLINE:
+                line += 1
+                column = 1
+                continue
+            elif action == MISMATCH:
+                self.line, self.column = line, column
+                raise SyntaxError(f'Unexpected character {value!r} at line {line} column {column}')
+            token_type = kind
+            token_value = value
+            if action == IDENTIFIER:
+                reserved = reserved_words.get(value.lower())
+                if reserved is not None:
+                    token_type = reserved[0]
+                    if token_type == 'BOOLEAN':
+                        token_value = reserved[1]
+            elif action == NUMBER:
+                token_value = float(value) if '.' in value else int(value)
+            elif action == STRING:
+                token_value = bytes(value[1:-1], "utf-8").decode("unicode_escape")
+            yield Token(token_type, token_value, line, column)
+            column += len(value)
+        self.line, self.column = line, column
+        yield Token('EOF', '', line, column)
+
+def shift_range(values, start, end, amount):
+    """Add amount to values[start:end], an array of unsigned ints."""
+    if amount and start < end:
+        values[start:end] = array('I', map(amount.__add__, values[start:end]))
+
+def splice_shifted(values, point, amount, start, end, new, delta):
+    """Replace values[start:end] with new and add delta to every value after them.
+
+    values[point:] hold their true value minus amount (the pending shift).
+    The addition of delta is deferred the same way: only the values between
+    the old pending point and the splice are rewritten, so the cost follows
+    how far apart successive edits are rather than the length of values.
+    Returns the new (point, amount).
+    """
+    if not amount:
+        point = end
+    if point < end:
+        shift_range(values, point, start, amount)
+        point = end
+    elif point > end:
+        shift_range(values, end, point, delta)
+    values[start:end] = new
+    point += len(new) - (end - start)
+    amount += delta
+    if point >= len(values):
+        amount = 0
+    return point, amount
+
+class IncrementalLexer:
+    """Keeps a TokenStream in step with a source that is edited piece by piece.
+
+    edit() re-lexes from shortly before the changed range and stops at the
+    first token that starts where an old token started once the changed
+    text is behind it; from there on the old tokens are reused, shifted by
+    the number of lines (and, on the resynchronisation line, columns) the
+    edit added or removed. Token offsets are not stored: line_starts holds
+    the offset at which each lexer line begins, and a token's offset is
+    line_starts[line - 1] + column - 1.
+
+    Shifting the lines of the tokens after an edit, and the offsets in
+    line_starts, is deferred (see splice_shifted) until another edit or a
+    reader needs them, so inserting a line only rewrites the tokens between
+    it and the previous edit in Python; the rest of the arrays is moved by
+    slice assignment. tokens.lines[line_shift_index:] lag behind by
+    line_shift; line_at() reads a token's true line, and settle() brings
+    tokens.lines up to date for readers of the TokenStream.
+    """
+    def __init__(self, code=''):
+        self.code = code
+        self.tokens = None
+        self.line_starts = None
+        self.relex_all()
+
+    def relex_all(self):
+        self.tokens = self.line_starts = None
+        self.damage = None  # (first, old end, new end) token indices the last edit replaced; None after a full lex
+        self.shift_line = self.shift = 0  # line_starts[shift_line:] are pending a shift by shift characters
+        self.line_shift_index = self.line_shift = 0  # tokens.lines[line_shift_index:] are pending a shift by line_shift lines
+        self.tokens, self.line_starts, _ = self.lex_range(self.code, 0, 1, 1, TokenStream(), None)
+        return self.tokens
+
+    def update(self, code, block=4096):
+        """Re-lex for a new version of the whole source, treating the changed span as a single edit."""
+        old = self.code
+        limit = min(len(old), len(code))
+        # Common prefix and suffix, compared a block at a time first
+        start = 0
+        while start + block <= limit and old[start:start + block] == code[start:start + block]:
+            start += block
+        while start < limit and old[start] == code[start]:
+            start += 1
+        end = 0
+        longest = limit - start
+        while end + block <= longest and old[len(old) - end - block:len(old) - end] == code[len(code) - end - block:len(code) - end]:
+            end += block
+        while end < longest and old[len(old) - end - 1] == code[len(code) - end - 1]:
+            end += 1
+        return self.edit(start, len(old) - start - end, code[start:len(code) - end])
+
+    def line_at(self, index):
+        line = self.tokens.lines[index]
+        return line + self.line_shift if index >= self.line_shift_index else line
+
+    def offset(self, index):
+        line = self.line_at(index) - 1
+        start = self.line_starts[line] + self.shift if line >= self.shift_line else self.line_starts[line]
+        return start + self.tokens.columns[index] - 1
+
+    def settle(self, end=None):
+        """Apply the pending line shift to tokens.lines[:end] (all of it by default)."""
+        lines = self.tokens.lines
+        end = len(lines) if end is None else min(end, len(lines))
+        if self.line_shift and self.line_shift_index < end:
+            shift_range(lines, self.line_shift_index, end, self.line_shift)
+            self.line_shift_index = end
+            if end == len(lines):
+                self.line_shift = 0
+
+    def find_restart(self, limit):
+        """Index of the last token starting at or before limit, or -1."""
+        low, high = 0, len(self.tokens) - 1
+        while low < high:
+            mid = (low + high) // 2
+            if self.offset(mid) <= limit:
+                low = mid + 1
+            else:
+                high = mid
+        return low - 1 if self.offset(low) > limit else low
+
+    def edit(self, start, deleted, inserted):
+        """Apply an edit (replace deleted characters at start with inserted) and return the updated TokenStream."""
+        old_code = self.code
+        code = self.code = old_code[:start] + inserted + old_code[start + deleted:]
+        if self.tokens is None:
+            # The previous text did not lex; there are no tokens to reuse
+            return self.relex_all()
+        delta = len(inserted) - deleted
+        limit = start - LOOKAHEAD
+        # Closing a comment can turn everything back to an unterminated '/*' into comment text;
+        # a '/*' was unterminated if no '*/' starts after it
+        if '*/' in code[max(start - 1, 0):start + len(inserted) + 1]:
+            opening = old_code.find('/*', max(old_code.rfind('*/') - 1, 0), start)
+            if opening != -1:
+                limit = min(limit, opening - LOOKAHEAD)
+        first = self.find_restart(limit)
+        tokens = self.tokens
+        if first < 0:
+            first, pos, line, column = 0, 0, 1, 1
+        else:
+            pos, line, column = self.offset(first), self.line_at(first), tokens.columns[first]
+        try:
+            region, starts, resync = self.lex_range(code, pos, line, column, tokens, (first, start + len(inserted), delta))
+        except SyntaxError:
+            self.tokens = self.line_starts = None
+            raise
+        self.splice(first, line, region, starts, resync, delta)
+        return tokens
+
+    def lex_range(self, code, pos, line, column, tokens, resync):
+        """Tokenize code from pos with the given line and column.
+
+        Returns (new tokens, offsets of the lines they start, resync point).
+        Without resync the rest of the source is tokenized into tokens. With
+        resync = (first old token, end of the inserted text, length delta)
+        the new tokens go into a fresh TokenStream sharing tokens' value
+        table, and lexing stops at the first old token boundary past the
+        edit; the resync point is then (old token index, line, column),
+        otherwise None.
+        """
+        region = tokens
+        if resync is not None:
+            region = TokenStream()
+            region.value_table = tokens.value_table
+            region.value_indices = tokens.value_indices
+        starts = array('I', [0]) if resync is None else array('I')
+        if resync is not None:
+            old_index, edit_end, delta = resync
+            old_count = len(tokens) - 1  # Tokens before EOF
+            next_offset = self.offset(old_index) if old_index < old_count else None
+        append = region.append
+        reserved_words = RESERVED_WORDS
+        for mo in TOKEN_REGEX.finditer(code, pos):
+            kind, action = TOKEN_KINDS[mo.lastindex]
+            value = mo.group()
+            if action == IGNORE:
+                column += len(value)
+                continue
+            elif action == NEWLINE:
+                line += 1
+                column = 1
+                starts.append(mo.end())
+                continue
+            elif action == MISMATCH:
+                raise SyntaxError(f'Unexpected character {value!r} at line {line} column {column}')
+            if resync is not None and next_offset is not None:
+                old_start = mo.start() - delta
+                while next_offset is not None and next_offset < old_start:
+                    old_index += 1
+                    next_offset = self.offset(old_index) if old_index < old_count else None
+                # The text from here on, and the character before it, is unchanged: so are the old tokens
+                if mo.start() > edit_end and next_offset == old_start:
+                    return region, starts, (old_index, line, column)
+            token_value = value
+            if action == IDENTIFIER:
+                reserved = reserved_words.get(value.lower())
+                if reserved is not None:
+                    kind = reserved[0]
+                    if kind == 'BOOLEAN':
+                        token_value = reserved[1]
+            elif action == NUMBER:
+                token_value = float(value) if '.' in value else int(value)
+            elif action == STRING:
+                token_value = bytes(value[1:-1], "utf-8").decode("unicode_escape")
+            append(kind, token_value, line, column)
+            column += len(value)
+        append('EOF', '', line, column)
+        return region, starts, None
+
+    def splice(self, first, first_line, region, starts, resync, delta):
+        """Replace the old tokens from first up to the resync point with region."""
+        tokens = self.tokens
+        if resync is None:
+            last = len(tokens)
+            old_line = len(self.line_starts)
+            line_delta = delta = 0
+        else:
+            last, line, column = resync
+            old_line = self.line_at(last)
+            line_delta = line - old_line
+            column_delta = column - tokens.columns[last]
+            # Tokens on the resynchronisation line move sideways; later lines only move down or up
+            end = last
+            while end < len(tokens) and self.line_at(end) == old_line:
+                tokens.columns[end] += column_delta
+                end += 1
+        for name in ('kinds', 'columns', 'values'):
+            getattr(tokens, name)[first:last] = getattr(region, name)
+        self.line_shift_index, self.line_shift = splice_shifted(
+            tokens.lines, self.line_shift_index, self.line_shift, first, last, region.lines, line_delta)
+        self.shift_line, self.shift = splice_shifted(
+            self.line_starts, self.shift_line, self.shift, first_line, old_line, starts, delta)
+        self.damage = (first, last, first + len(region))
+        return tokens
@@ -1,21 +1,521 @@
 # linter.py
 
+import hashlib
+import re
+import threading
+from ast_nodes import *
 from lexer import Lexer
-from parser import Parser
-from tkinter import messagebox
+from parser import Parser, IncrementalParser
+
+# Lexer and Parser errors end with their position
+ERROR_POSITION = re.compile(r'at line (\d+) column (\d+)')
+
+def diagnostic(message, line=None, column=None, severity='error'):
+    return {'line': line, 'column': column, 'severity': severity, 'message': message}
+
+def syntax_diagnostic(error):
+    """Diagnostic for a SyntaxError raised by the Lexer or Parser."""
+    message = str(error)
+    match = ERROR_POSITION.search(message)
+    if match:
+        return diagnostic(message, int(match.group(1)), int(match.group(2)))
+    return diagnostic(message)
+
+# ===========================
+# Static Checks
+# ===========================
+# The checker runs a program's statements against compile-time scopes that mirror the
+# interpreter's Environments. It reports names used before they are defined, calls to
+# functions that do not exist, names declared twice in one frame and values that do not
+# match a variable's declared type. Functions see their caller's variables at run time,
+# so inside a function any name declared somewhere in the program is given the benefit
+# of the doubt.
+
+BUILTINS = ('print', 'length', 'push', 'pop')  # Defined in every Interpreter's global Environment
+
+# Symbol kinds
+VARIABLE = 'variable'
+FUNCTION = 'function'
+MODULE = 'module'
+BUILTIN = 'builtin'
+
+NUMERIC_TYPES = ('integer', 'float')
+COMPARISON_OPERATORS = frozenset(('==', '!=', '>', '<', '>=', '<='))
+ARTICLES = {'integer': 'an integer', 'float': 'a float', 'string': 'a string', 'boolean': 'a boolean', 'array': 'an array'}
+
+class Scope:
+    """Compile-time stand-in for an interpreter Environment.
+
+    Names map to Symbols: (kind, declared type, type of the declared value),
+    with None for anything unknown. The blocks of if and while statements get
+    a Scope that shares its parent's frame, as they run in the enclosing
+    Environment; what they declare is merged back into the parent afterwards.
+    """
+    def __init__(self, parent=None, shares_frame=False):
+        self.vars = {}
+        self.parent = parent
+        self.shares_frame = shares_frame
+        self.defined = []  # (name, Symbol) in the order they were defined
+
+    def define(self, name, symbol):
+        self.vars[name] = symbol
+        self.defined.append((name, symbol))
+
+    def lookup(self, name):
+        scope = self
+        while scope is not None:
+            symbol = scope.vars.get(name)
+            if symbol is not None:
+                return symbol
+            scope = scope.parent
+        return None
+
+    def in_frame(self, name):
+        """Whether name is already defined in the Environment this scope's names go to."""
+        scope = self
+        while True:
+            if name in scope.vars:
+                return True
+            if not scope.shares_frame:
+                return False
+            scope = scope.parent
+
+    def merge_into_parent(self):
+        # Names declared in a branch count as defined afterwards, whether or not it ran
+        for name, symbol in self.defined:
+            if name not in self.parent.vars:
+                self.parent.define(name, symbol)
+
+class StatementCache(dict):
+    """Results of checking top-level statements, reused while the statement and what precedes it are unchanged.
+
+    Keys hash the statement's source lines and column, together with every
+    name defined before it and every name the program declares anywhere.
+    Values hold the statement's diagnostics, with lines relative to the
+    statement, and the Symbols it adds to the global scope. A check keeps only
+    the entries it used, so the cache follows the current version of a file.
+    """
+    def __init__(self):
+        super().__init__()
+        self.hits = 0
+        self.misses = 0
+
+def declared_names(statements, names):
+    """Add every name declared anywhere in statements (including parameters) to names."""
+    stack = list(statements)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (VarDeclaration, PointerDeclaration)):
+            names.add(node.name)
+        elif isinstance(node, ImportStatement):
+            names.add(node.module_name)
+        elif isinstance(node, FunctionDeclaration):
+            names.add(node.name)
+            names.update(node.params)
+            stack.extend(node.body)
+        elif isinstance(node, IfStatement):
+            stack.extend(node.then_branch)
+            stack.extend(node.else_branch or [])
+        elif isinstance(node, WhileStatement):
+            stack.extend(node.body)
+        elif isinstance(node, ForStatement):
+            stack.append(node.init)
+            stack.extend(node.body)
+    return names
+
+class Checker:
+    """Static checks for one Program; see check_program()."""
+    def __init__(self, source=None, cache=None, settle=None):
+        self.lines = source.splitlines() if source is not None and cache is not None else None
+        self.cache = cache
+        self.settle = settle
+        self.diagnostics = []
+
+    def check(self, program):
+        self.all_names = declared_names(program.statements, set(BUILTINS))
+        scope = Scope()
+        for name in BUILTINS:
+            scope.define(name, (BUILTIN, None, None))
+        if self.lines is None:
+            if self.settle is not None:
+                for stmt in program.statements:
+                    self.settle(stmt)
+            self.check_block(program.statements, scope, False)
+            return self.diagnostics
+        # The key chain covers everything a top-level statement's result depends on besides its own text
+        chain = hashlib.sha1('\0'.join(sorted(self.all_names)).encode('utf-8')).digest()
+        cache = self.cache
+        used = {}
+        for stmt in program.statements:
+            if stmt.line is None or stmt.end is None:
+                self.check_statement(stmt, scope, False)
+                continue
+            text = '\n'.join(self.lines[stmt.line - 1:stmt.end])
+            key = hashlib.sha1(chain + f'{stmt.col}:{text}'.encode('utf-8')).digest()
+            result = cache.get(key)
+            if result is None:
+                cache.misses += 1
+                if self.settle is not None:
+                    self.settle(stmt)
+                first_diagnostic, first_definition = len(self.diagnostics), len(scope.defined)
+                self.check_statement(stmt, scope, False)
+                result = (tuple((d['line'] - stmt.line if d['line'] is not None else None, d['column'], d['severity'], d['text'])
+                                for d in self.diagnostics[first_diagnostic:]),
+                          tuple(scope.defined[first_definition:]))
+            else:
+                cache.hits += 1
+                for line_offset, column, severity, text in result[0]:
+                    self.add(text, stmt.line + line_offset if line_offset is not None else None, column, severity)
+                for name, symbol in result[1]:
+                    scope.define(name, symbol)
+            used[key] = result
+            chain = hashlib.sha1(chain + repr(result[1]).encode('utf-8')).digest()
+        cache.clear()
+        cache.update(used)
+        return self.diagnostics
+
+    def add(self, text, line, column, severity):
+        message = f'{text} at line {line} column {column}' if line is not None else text
+        entry = diagnostic(message, line, column, severity)
+        entry['text'] = text  # Unpositioned message, kept for the StatementCache
+        self.diagnostics.append(entry)
+
+    def report(self, node, text, severity='error'):
+        self.add(text, node.line, node.col, severity)
+
+    # ===========================
+    # Statements
+    # ===========================
+
+    def check_block(self, statements, scope, in_function):
+        for stmt in statements:
+            self.check_statement(stmt, scope, in_function)
+
+    def check_statement(self, node, scope, in_function):
+        if isinstance(node, VarDeclaration):
+            value_type = self.expression(node.expr, scope, in_function)
+            self.check_type(node, node.name, node.var_type, node.expr, value_type)
+            self.declare(node, node.name, (VARIABLE, node.var_type, value_type), scope)
+        elif isinstance(node, PointerDeclaration):
+            self.expression(node.expr, scope, in_function)
+            self.declare(node, node.name, (VARIABLE, None, None), scope)
+        elif isinstance(node, ImportStatement):
+            self.declare(node, node.module_name, (MODULE, None, None), scope)
+        elif isinstance(node, FunctionDeclaration):
+            self.declare(node, node.name, (FUNCTION, None, None), scope)
+            body = Scope(scope)
+            for param in node.params:
+                body.define(param, (VARIABLE, None, None))
+            self.check_block(node.body, body, True)
+        elif isinstance(node, Assignment):
+            value_type = self.expression(node.expr, scope, in_function)
+            symbol = self.resolve(node, node.name, scope, in_function)
+            if symbol is not None and symbol[0] == VARIABLE and symbol[1] is not None:
+                self.check_type(node, node.name, symbol[1], node.expr, value_type)
+        elif isinstance(node, ArrayAssignment):
+            self.resolve(node, node.array_name, scope, in_function)
+            self.index(node.index_expr, scope, in_function)
+            self.expression(node.expr, scope, in_function)
+        elif isinstance(node, PrintStatement):
+            self.expression(node.expr, scope, in_function)
+        elif isinstance(node, (IfStatement, WhileStatement)):
+            self.expression(node.condition, scope, in_function)
+            branches = [node.then_branch, node.else_branch or []] if isinstance(node, IfStatement) else [node.body]
+            branch_scopes = []
+            for statements in branches:
+                branch_scopes.append(Scope(scope, shares_frame=True))
+                self.check_block(statements, branch_scopes[-1], in_function)
+            for branch in branch_scopes:
+                branch.merge_into_parent()
+        elif isinstance(node, ForStatement):
+            loop = Scope(scope)  # The interpreter gives every for loop an Environment of its own
+            self.check_statement(node.init, loop, in_function)
+            self.expression(node.condition, loop, in_function)
+            self.check_block(node.body, loop, in_function)
+            self.check_statement(node.increment, loop, in_function)
+        elif isinstance(node, ReturnStatement):
+            if not in_function:
+                self.report(node, "'return' outside of function")
+            self.expression(node.expr, scope, in_function)
+        elif not isinstance(node, ErrorStatement):
+            self.expression(node, scope, in_function)
+
+    def declare(self, node, name, symbol, scope):
+        if scope.in_frame(name):
+            self.report(node, f"Variable '{name}' already defined")
+        scope.define(name, symbol)
+
+    def check_type(self, node, name, declared, expr, value_type):
+        # Arrays are declared with the type of their elements
+        if value_type == 'array' and isinstance(expr, (Array, ArrayLiteral)):
+            for element in expr.elements:
+                element_type = self.expression_type(element, None)
+                if not compatible(declared, element_type):
+                    self.report(element, f"Array '{name}' is declared {declared} but holds {ARTICLES[element_type]}", 'warning')
+        elif value_type != 'array' and not compatible(declared, value_type):
+            self.report(node, f"Variable '{name}' is declared {declared} but assigned {ARTICLES[value_type]}", 'warning')
+
+    # ===========================
+    # Expressions
+    # ===========================
+
+    def resolve(self, node, name, scope, in_function, kind='Variable'):
+        """Return name's Symbol, or None (reporting it unless it may be defined at run time)."""
+        symbol = scope.lookup(name)
+        if symbol is None and not (in_function and name in self.all_names):
+            if name not in self.all_names:
+                self.report(node, f"{kind} '{name}' is not defined")
+            elif kind == 'Function':
+                self.report(node, f"Function '{name}' is called before it is defined")
+            else:
+                self.report(node, f"Variable '{name}' is used before it is defined")
+        return symbol
+
+    def index(self, node, scope, in_function):
+        index_type = self.expression(node, scope, in_function)
+        if index_type is not None and index_type != 'integer':
+            self.report(node, f"Array index must be an integer, not {ARTICLES[index_type]}")
+
+    def expression(self, node, scope, in_function):
+        """Check an expression and return its type, or None if it cannot be known statically."""
+        if isinstance(node, Variable):
+            symbol = self.resolve(node, node.name, scope, in_function)
+            return symbol[2] if symbol is not None and symbol[0] == VARIABLE else None
+        elif isinstance(node, BinaryOp):
+            left = self.expression(node.left, scope, in_function)
+            right = self.expression(node.right, scope, in_function)
+            return binary_type(node.op, left, right)
+        elif isinstance(node, UnaryOp):
+            self.expression(node.operand, scope, in_function)
+            return 'boolean'
+        elif isinstance(node, FunctionCall):
+            name = node.name
+            symbol = None
+            if isinstance(name, Variable):
+                symbol = self.resolve(name, name.name, scope, in_function, 'Function')
+                if symbol is not None and symbol[0] == VARIABLE and symbol[2] is not None:
+                    self.report(name, f"'{name.name}' is not callable")
+            else:
+                self.expression(name, scope, in_function)
+            for arg in node.args:
+                self.expression(arg, scope, in_function)
+            return 'integer' if symbol is not None and symbol[0] == BUILTIN and name.name == 'length' else None
+        elif isinstance(node, ArrayAccess):
+            self.expression(node.array, scope, in_function)
+            self.index(node.index, scope, in_function)
+            return None
+        elif isinstance(node, (Array, ArrayLiteral)):
+            for element in node.elements:
+                self.expression(element, scope, in_function)
+            return 'array'
+        elif isinstance(node, AttributeAccess):
+            self.expression(node.obj, scope, in_function)
+            return None
+        elif isinstance(node, PointerDereference):
+            self.expression(node.var, scope, in_function)
+            return None
+        return self.expression_type(node, scope)
+
+    def expression_type(self, node, scope):
+        """Type of a literal (or of an expression whose parts were already checked), without reporting anything."""
+        if isinstance(node, Number):
+            return 'integer' if isinstance(node.value, int) else 'float'
+        elif isinstance(node, String):
+            return 'string'
+        elif isinstance(node, Boolean):
+            return 'boolean'
+        elif isinstance(node, (Array, ArrayLiteral)):
+            return 'array'
+        elif isinstance(node, BinaryOp):
+            return binary_type(node.op, self.expression_type(node.left, scope), self.expression_type(node.right, scope))
+        elif isinstance(node, UnaryOp):
+            return 'boolean'
+        return None
+
+def binary_type(op, left, right):
+    """Type of a binary operation on operands of the given types (None when unknown)."""
+    if op in COMPARISON_OPERATORS:
+        return 'boolean'
+    if op in ('AND', 'OR'):
+        return left if left == right else None
+    if op == '+' and 'string' in (left, right):
+        return 'string'
+    if left in NUMERIC_TYPES and right in NUMERIC_TYPES:
+        if op == '/':
+            return 'float'  # Always true division
+        return 'integer' if left == right == 'integer' else 'float'
+    return None
+
+def compatible(declared, value_type):
+    return value_type is None or value_type == declared or (declared == 'float' and value_type == 'integer')
+
+def check_program(program, source=None, cache=None, settle=None):
+    """Diagnostics for problems the interpreter would only report at run time (or, for types, not at all).
+
+    Given the program's source and a StatementCache from the previous check,
+    top-level statements that did not change reuse their cached results.
+    settle(stmt), if given, is called before the nodes in a top-level
+    statement are read (IncrementalParser.settle).
+    """
+    diagnostics = Checker(source, cache, settle).check(program)
+    for entry in diagnostics:
+        del entry['text']
+    return diagnostics
+
+WORKSPACE_STATS = ('files', 'files_reused', 'statements', 'statements_reused')
+
+class WorkspaceChecker:
+    """Checks a set of files again and again, reanalysing only what changed.
+
+    A file whose text is unchanged returns its previous diagnostics without
+    being parsed. A changed file is parsed again, but its unchanged top-level
+    statements reuse their results from the file's StatementCache.
+    """
+    def __init__(self):
+        self.files = {}  # path -> (source hash, diagnostics, StatementCache)
+        self.stats = dict.fromkeys(WORKSPACE_STATS, 0)  # Counts for the latest check_files()
+
+    def check_files(self, paths):
+        """Return {path: diagnostics}, forgetting files that are no longer in paths."""
+        self.stats = dict.fromkeys(WORKSPACE_STATS, 0)
+        results = {}
+        for path in paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    code = file.read()
+            except (OSError, UnicodeDecodeError) as e:
+                results[path] = [diagnostic(str(e))]
+                continue
+            results[path] = self.check_source(path, code)
+        for path in set(self.files) - set(results):
+            del self.files[path]
+        return results
+
+    def check_source(self, path, code):
+        stats = self.stats
+        stats['files'] += 1
+        digest = hashlib.sha1(code.encode('utf-8')).digest()
+        previous = self.files.get(path)
+        if previous is not None and previous[0] == digest:
+            stats['files_reused'] += 1
+            return previous[1]
+        cache = previous[2] if previous is not None else StatementCache()
+        cache.hits = cache.misses = 0
+        try:
+            parser = Parser(Lexer(code).tokenize_stream(), recover=True)
+            program = parser.parse()
+        except SyntaxError as e:
+            diagnostics = [syntax_diagnostic(e)]  # The lexer stops at its first error
+        else:
+            diagnostics = [syntax_diagnostic(e) for e in parser.errors] + check_program(program, code, cache)
+        stats['statements'] += cache.hits + cache.misses
+        stats['statements_reused'] += cache.hits
+        self.files[path] = (digest, diagnostics, cache)
+        return diagnostics
+
+def lint_errors(parser, code, cache=None):
+    """Error messages for code, brought up to date through an IncrementalParser (and a StatementCache, if given)."""
+    try:
+        program = parser.update(code)
+    except (SyntaxError, UnicodeDecodeError) as e:
+        return [str(e)]  # The lexer stops at its first error
+    return [str(e) for e in parser.errors] + [d['message'] for d in check_program(program, code, cache, parser.settle)]
 
 class Linter:
     def __init__(self, gui):
         self.gui = gui
         self.errors = []
+        self.parser = IncrementalParser(recover=True)  # Re-lexes and reparses only what changed since the previous lint
+        self.cache = StatementCache()  # Rechecks only the statements that changed
 
     def lint(self, code):
-        self.errors.clear()
-        lexer = Lexer(code)
-        try:
-            tokens = lexer.tokenize()
-            parser = Parser(tokens)
-            parser.parse()
-        except SyntaxError as e:
-            self.errors.append(str(e))
-        self.gui.display_linter_errors(self.errors)
\ No newline at end of file
+        self.errors = lint_errors(self.parser, code, self.cache)
+        self.gui.display_linter_errors(self.errors)
+
+class LintService:
+    """Lints an editor buffer on a worker thread so typing never waits for analysis.
+
+    changed() is called from the Tk thread after every edit and restarts a
+    debounce timer. When the buffer has been quiet for delay milliseconds, its
+    text replaces whatever request the worker has not started yet, so bursts of
+    edits coalesce into one lint. A result is handed to callback(errors) on the
+    Tk thread (the service polls for it with root.after) unless newer edits have
+    made it stale. Python cannot interrupt a lint that is already running, but
+    its result is discarded and the IncrementalParser keeps the next one cheap.
+    """
+    DELAY = 300  # Milliseconds of quiet before linting
+    POLL_INTERVAL = 50  # Milliseconds between checks for a finished lint
+
+    def __init__(self, root, source, callback, delay=DELAY):
+        self.root = root
+        self.source = source  # Returns the buffer's current text; only called on the Tk thread
+        self.callback = callback
+        self.delay = delay
+        self.timer = None
+        self.polling = False
+        self.generation = 0  # Number of edits seen; requests and results are tagged with it
+        self.submitted = 0  # Generation of the newest request handed to the worker
+        self.condition = threading.Condition()
+        self.request = None  # (generation, code) the worker has not started yet
+        self.completed = 0  # Generation of the newest request the worker has finished or skipped
+        self.result = None  # (generation, errors) of the newest finished lint
+        self.parser = IncrementalParser(recover=True)  # Only used by the worker, as is the cache
+        self.cache = StatementCache()
+        self.thread = threading.Thread(target=self.work, name='lint', daemon=True)
+        self.thread.start()
+
+    # ===========================
+    # Tk Thread
+    # ===========================
+
+    def changed(self):
+        self.generation += 1
+        if self.timer is not None:
+            self.root.after_cancel(self.timer)
+        self.timer = self.root.after(self.delay, self.submit)
+
+    def submit(self):
+        self.timer = None
+        self.submitted = self.generation
+        code = self.source()
+        with self.condition:
+            self.request = (self.generation, code)
+            self.condition.notify()
+        if not self.polling:
+            self.polling = True
+            self.root.after(self.POLL_INTERVAL, self.poll)
+
+    def poll(self):
+        with self.condition:
+            result, self.result = self.result, None
+            completed = self.completed
+        if result is not None and result[0] == self.generation:
+            self.callback(result[1])
+        if completed < self.submitted:
+            self.root.after(self.POLL_INTERVAL, self.poll)
+        else:
+            self.polling = False
+
+    # ===========================
+    # Worker Thread
+    # ===========================
+
+    def work(self):
+        while True:
+            with self.condition:
+                while self.request is None:
+                    self.condition.wait()
+                generation, code = self.request
+                self.request = None
+            # generation is only ever written on the Tk thread; a stale read just lints once more
+            try:
+                errors = lint_errors(self.parser, code, self.cache) if generation == self.generation else None
+            except Exception as e:
+                # Report it and start over from a clean parser rather than let the thread die
+                errors = [str(e)]
+                self.parser = IncrementalParser(recover=True)
+                self.cache = StatementCache()
+            with self.condition:
+                if errors is not None:
+                    self.result = (generation, errors)
+                self.completed = generation
@@ -1,5 +1,6 @@
 # main.py
 
+import sys
 import tkinter as tk
 from gui import SimpleScriptGUI
 from tkinter import messagebox
@@ -27,5 +28,4 @@ def main():
     root.mainloop()
 
 if __name__ == '__main__':
-    import sys
     main()
\ No newline at end of file
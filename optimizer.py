@@ -0,0 +1,718 @@
+# optimizer.py
+
+from ast_nodes import *
+from interpreter import BINARY_OPERATORS
+
+LITERAL_NODES = (Number, String, Boolean)
+
+# Folded strings longer than this stay as expressions so the AST does not balloon
+MAX_FOLDED_STRING = 1024
+
+def make_literal(value):
+    """Wrap a Python value in the matching literal node, or return None."""
+    if isinstance(value, bool):
+        return Boolean(value)
+    if isinstance(value, (int, float)):
+        return Number(value)
+    if isinstance(value, str) and len(value) <= MAX_FOLDED_STRING:
+        return String(value)
+    return None
+
+def is_numeric(node):
+    """True if the expression can only produce a number (when it succeeds at all)."""
+    if isinstance(node, Number):
+        return not isinstance(node.value, bool)
+    if isinstance(node, BinaryOp):
+        if node.op in ('-', '/'):
+            return True
+        if node.op in ('+', '*'):
+            return is_numeric(node.left) and is_numeric(node.right)
+    return False
+
+def format_expression(node):
+    """Render an expression roughly as it would appear in SimpleScript source."""
+    if isinstance(node, String):
+        return f'"{node.value}"'
+    if isinstance(node, Boolean):
+        return 'true' if node.value else 'false'
+    if isinstance(node, Number):
+        return str(node.value)
+    if isinstance(node, Variable):
+        return node.name
+    if isinstance(node, BinaryOp):
+        return f'{format_expression(node.left)} {node.op} {format_expression(node.right)}'
+    if isinstance(node, UnaryOp):
+        return f'{node.op} {format_expression(node.operand)}'
+    if isinstance(node, (Array, ArrayLiteral)):
+        return '[' + ', '.join(format_expression(elem) for elem in node.elements) + ']'
+    if isinstance(node, ArrayAccess):
+        return f'{format_expression(node.array)}[{format_expression(node.index)}]'
+    if isinstance(node, FunctionCall):
+        return f'{format_expression(node.name)}(' + ', '.join(format_expression(arg) for arg in node.args) + ')'
+    if isinstance(node, AttributeAccess):
+        return f'{format_expression(node.obj)}.{node.attribute}'
+    if isinstance(node, PointerDereference):
+        return f'*{format_expression(node.var)}'
+    return type(node).__name__
+
+class Optimizer:
+    """AST-to-AST optimization pass run between parsing and execution.
+
+    - folds operators applied to literals, using the interpreter's own operator
+      functions (anything that would raise, e.g. division by zero, is left for run time)
+    - simplifies identities: e * 1, 1 * e, e + 0, 0 + e and e - 0 when e is known
+      to be numeric, and true AND e, false OR e (or any truthy/falsy literal) for any e
+    - replaces an if with a constant condition by the branch that runs, and
+      drops a while whose condition is constant false
+
+    Unless `loops` is false, LoopOptimizer then runs on the folded program.
+    The program is rewritten in place. Every rewrite is recorded in `changes`
+    as a human-readable message.
+    """
+    def __init__(self, loops=True):
+        self.changes = []
+        self.line = None  # Line of the statement being optimized, for reports
+        self.loops = loops  # Follow up with LoopOptimizer
+        self.statement_optimizers = {
+            VarDeclaration: self.optimize_expression_field,
+            Assignment: self.optimize_expression_field,
+            PrintStatement: self.optimize_expression_field,
+            ReturnStatement: self.optimize_expression_field,
+            ArrayAssignment: self.optimize_array_assignment,
+            IfStatement: self.optimize_if,
+            WhileStatement: self.optimize_while,
+            ForStatement: self.optimize_for,
+            FunctionDeclaration: self.optimize_function_declaration,
+            FunctionCall: self.optimize_expression_statement,
+            ArrayAccess: self.optimize_expression_statement,
+        }
+        self.expression_optimizers = {
+            BinaryOp: self.optimize_binary_op,
+            UnaryOp: self.optimize_unary_op,
+            Array: self.optimize_array,
+            ArrayLiteral: self.optimize_array,
+            ArrayAccess: self.optimize_array_access,
+            FunctionCall: self.optimize_function_call,
+            AttributeAccess: self.optimize_attribute_access,
+        }
+
+    def optimize(self, program):
+        program.statements = self.optimize_block(program.statements)
+        if self.loops:
+            LoopOptimizer(self.changes).optimize(program)
+        return program
+
+    def report(self, message):
+        if self.line is not None:
+            message = f'line {self.line}: {message}'
+        self.changes.append(message)
+
+    # ===========================
+    # Statements
+    # ===========================
+
+    def optimize_block(self, statements):
+        optimized = []
+        for stmt in statements:
+            optimized.extend(self.optimize_statement(stmt))
+        return optimized
+
+    def optimize_statement(self, node):
+        """Return the list of statements that replace `node`."""
+        if node.line is not None:
+            self.line = node.line
+        optimizer = self.statement_optimizers.get(type(node))
+        if optimizer is None:
+            return [node]  # Imports, pointer declarations and dereferences are left alone
+        return optimizer(node)
+
+    def optimize_expression_field(self, node):
+        node.expr = self.optimize_expression(node.expr)
+        return [node]
+
+    def optimize_array_assignment(self, node):
+        node.index_expr = self.optimize_expression(node.index_expr)
+        node.expr = self.optimize_expression(node.expr)
+        return [node]
+
+    def optimize_expression_statement(self, node):
+        return [self.optimize_expression(node)]
+
+    def optimize_if(self, node):
+        node.condition = self.optimize_expression(node.condition)
+        then_branch = self.optimize_block(node.then_branch)
+        else_branch = self.optimize_block(node.else_branch) if node.else_branch else node.else_branch
+        if isinstance(node.condition, LITERAL_NODES):
+            # If statements do not open a scope, so the surviving branch can be spliced in directly
+            self.line = node.line
+            if node.condition.value:
+                self.report(f'if condition is always true; kept the then branch ({len(then_branch)} statements)')
+                return then_branch
+            self.report(f'if condition is always false; kept the else branch ({len(else_branch or [])} statements)')
+            return else_branch or []
+        node.then_branch = then_branch
+        node.else_branch = else_branch
+        return [node]
+
+    def optimize_while(self, node):
+        node.condition = self.optimize_expression(node.condition)
+        if isinstance(node.condition, LITERAL_NODES) and not node.condition.value:
+            self.line = node.line
+            self.report('while condition is always false; removed the loop')
+            return []
+        node.body = self.optimize_block(node.body)
+        return [node]
+
+    def optimize_for(self, node):
+        # init and increment are single statements; neither is an if or while, so each maps to itself
+        node.init = self.optimize_statement(node.init)[0]
+        node.condition = self.optimize_expression(node.condition)
+        node.body = self.optimize_block(node.body)
+        node.increment = self.optimize_statement(node.increment)[0]
+        return [node]
+
+    def optimize_function_declaration(self, node):
+        node.body = self.optimize_block(node.body)
+        return [node]
+
+    # ===========================
+    # Expressions
+    # ===========================
+
+    def optimize_expression(self, node):
+        optimizer = self.expression_optimizers.get(type(node))
+        if optimizer is None:
+            return node
+        return optimizer(node)
+
+    def optimize_binary_op(self, node):
+        node.left = self.optimize_expression(node.left)
+        node.right = self.optimize_expression(node.right)
+        left, right = node.left, node.right
+        op = node.op if node.op in BINARY_OPERATORS else node.op.upper()
+        op_func = BINARY_OPERATORS.get(op)
+        if op_func is None:
+            return node  # Unknown operators keep failing at run time
+
+        if isinstance(left, LITERAL_NODES) and isinstance(right, LITERAL_NODES):
+            try:
+                folded = make_literal(op_func(left.value, right.value))
+            except Exception:
+                folded = None  # Leave the error for run time
+            if folded is not None:
+                self.report(f'folded {format_expression(node)} to {format_expression(folded)}')
+                return folded
+            return node
+
+        simplified = self.simplify_identity(op, left, right)
+        if simplified is not None:
+            self.report(f'simplified {format_expression(node)} to {format_expression(simplified)}')
+            return simplified
+        return node
+
+    def simplify_identity(self, op, left, right):
+        """Return the operand that `left op right` always evaluates to, or None."""
+        # "left AND right" is right whenever left is truthy, "left OR right" whenever it is falsy
+        if op == 'AND' and isinstance(left, LITERAL_NODES) and left.value:
+            return right
+        if op == 'OR' and isinstance(left, LITERAL_NODES) and not left.value:
+            return right
+        # Arithmetic identities only hold for numbers: "a" + 0 is "a0" and true * 1 is 1
+        if op in ('*', '+', '-'):
+            identity = 1 if op == '*' else 0
+            if is_numeric(left) and self.is_number(right, identity):
+                return left
+            if op != '-' and is_numeric(right) and self.is_number(left, identity):
+                return right
+        return None
+
+    def is_number(self, node, value):
+        return isinstance(node, Number) and not isinstance(node.value, bool) and node.value == value
+
+    def optimize_unary_op(self, node):
+        node.operand = self.optimize_expression(node.operand)
+        if node.op.upper() == 'NOT' and isinstance(node.operand, LITERAL_NODES):
+            folded = Boolean(not node.operand.value)
+            self.report(f'folded {format_expression(node)} to {format_expression(folded)}')
+            return folded
+        return node
+
+    def optimize_array(self, node):
+        node.elements = [self.optimize_expression(elem) for elem in node.elements]
+        return node
+
+    def optimize_array_access(self, node):
+        node.array = self.optimize_expression(node.array)
+        node.index = self.optimize_expression(node.index)
+        return node
+
+    def optimize_function_call(self, node):
+        node.args = [self.optimize_expression(arg) for arg in node.args]
+        return node
+
+    def optimize_attribute_access(self, node):
+        node.obj = self.optimize_expression(node.obj)
+        return node
+
+# ===========================
+# Effect Analysis
+# ===========================
+
+# Effects of the builtin functions, by name: (output, resizes arrays)
+BUILTIN_EFFECTS = {
+    'print': (True, False),
+    'length': (False, False),
+    'push': (False, True),
+    'pop': (False, True),
+}
+
+class Effects:
+    """What running a piece of code may do to state that outlives it."""
+    __slots__ = ('writes', 'declares', 'output', 'resizes', 'stores', 'unknown')
+
+    def __init__(self):
+        self.writes = set()    # Variables assigned (possibly in a caller's scope)
+        self.declares = set()  # Variables defined in the current scope
+        self.output = False    # Prints something
+        self.resizes = False   # Calls push/pop on some array
+        self.stores = False    # Assigns to some array element
+        self.unknown = False   # Calls or runs something that cannot be analysed
+
+    def update(self, other):
+        self.writes |= other.writes
+        self.declares |= other.declares
+        self.output = self.output or other.output
+        self.resizes = self.resizes or other.resizes
+        self.stores = self.stores or other.stores
+        self.unknown = self.unknown or other.unknown
+        return self
+
+    def is_pure(self):
+        return not (self.writes or self.declares or self.output or self.resizes or self.stores or self.unknown)
+
+    def key(self):
+        return (frozenset(self.writes), frozenset(self.declares), self.output, self.resizes, self.stores, self.unknown)
+
+def walk_statements(statements):
+    """Yield every statement in a block, including nested blocks and function bodies."""
+    for stmt in statements:
+        yield stmt
+        if isinstance(stmt, IfStatement):
+            yield from walk_statements(stmt.then_branch)
+            yield from walk_statements(stmt.else_branch or [])
+        elif isinstance(stmt, WhileStatement):
+            yield from walk_statements(stmt.body)
+        elif isinstance(stmt, ForStatement):
+            yield from walk_statements([stmt.init, stmt.increment])
+            yield from walk_statements(stmt.body)
+        elif isinstance(stmt, FunctionDeclaration):
+            yield from walk_statements(stmt.body)
+
+class EffectAnalysis:
+    """Side-effect summaries for the statements, expressions and functions of a program.
+
+    Calls are resolved by name. A function name that is declared more than once,
+    or is also used as a variable or parameter anywhere, may refer to something
+    else at run time (functions see their caller's variables), so calls through
+    it are unknown. The same goes for builtins whose names the program reuses.
+    """
+    def __init__(self, program):
+        declarations = {}
+        variables = set()
+        for stmt in walk_statements(program.statements):
+            if isinstance(stmt, FunctionDeclaration):
+                declarations.setdefault(stmt.name, []).append(stmt)
+                variables.update(stmt.params)
+            elif isinstance(stmt, (VarDeclaration, PointerDeclaration, Assignment)):
+                variables.add(stmt.name)
+            elif isinstance(stmt, ImportStatement):
+                variables.add(stmt.module_name)
+        self.shadowed = variables | set(declarations)
+        self.functions = {name: decls[0] for name, decls in declarations.items()
+                          if len(decls) == 1 and name not in variables and name not in BUILTIN_EFFECTS}
+        self.function_effects = {name: Effects() for name in self.functions}
+
+        # Effects only grow, so iterating to a fixpoint terminates; recursion sees its own effects
+        changed = True
+        while changed:
+            changed = False
+            for name, declaration in self.functions.items():
+                effects = self.block_effects(declaration.body)
+                # The function's own definitions and parameters live in its own Environment
+                effects.declares = set()
+                effects.writes -= set(declaration.params)
+                if effects.key() != self.function_effects[name].key():
+                    self.function_effects[name] = effects
+                    changed = True
+
+    def block_effects(self, statements):
+        effects = Effects()
+        for stmt in statements:
+            effects.update(self.statement_effects(stmt))
+        return effects
+
+    def statement_effects(self, node):
+        if isinstance(node, (VarDeclaration, PointerDeclaration)):
+            effects = self.expression_effects(node.expr)
+            effects.declares.add(node.name)
+        elif isinstance(node, Assignment):
+            effects = self.expression_effects(node.expr)
+            effects.writes.add(node.name)
+        elif isinstance(node, ArrayAssignment):
+            effects = self.expression_effects(node.index_expr).update(self.expression_effects(node.expr))
+            effects.stores = True
+        elif isinstance(node, PrintStatement):
+            effects = self.expression_effects(node.expr)
+            effects.output = True
+        elif isinstance(node, IfStatement):
+            effects = self.expression_effects(node.condition)
+            effects.update(self.block_effects(node.then_branch))
+            effects.update(self.block_effects(node.else_branch or []))
+        elif isinstance(node, WhileStatement):
+            effects = self.expression_effects(node.condition).update(self.block_effects(node.body))
+        elif isinstance(node, ForStatement):
+            effects = self.block_effects([node.init, node.increment])
+            effects.update(self.expression_effects(node.condition))
+            effects.update(self.block_effects(node.body))
+        elif isinstance(node, FunctionDeclaration):
+            effects = Effects()
+            effects.declares.add(node.name)
+        elif isinstance(node, ReturnStatement):
+            effects = self.expression_effects(node.expr)
+        elif isinstance(node, (FunctionCall, ArrayAccess, PointerDereference)):
+            effects = self.expression_effects(node)
+        else:
+            effects = Effects()
+            effects.unknown = True  # Imports run arbitrary Python code
+        return effects
+
+    def expression_effects(self, node):
+        effects = Effects()
+        if isinstance(node, (Number, String, Boolean, Variable, PointerDereference)):
+            pass
+        elif isinstance(node, BinaryOp):
+            effects.update(self.expression_effects(node.left)).update(self.expression_effects(node.right))
+        elif isinstance(node, UnaryOp):
+            effects.update(self.expression_effects(node.operand))
+        elif isinstance(node, (Array, ArrayLiteral)):
+            for elem in node.elements:
+                effects.update(self.expression_effects(elem))
+        elif isinstance(node, ArrayAccess):
+            effects.update(self.expression_effects(node.array)).update(self.expression_effects(node.index))
+        elif isinstance(node, AttributeAccess):
+            effects.update(self.expression_effects(node.obj))
+        elif isinstance(node, FunctionCall):
+            for arg in node.args:
+                effects.update(self.expression_effects(arg))
+            effects.update(self.call_effects(node))
+        else:
+            effects.unknown = True
+        return effects
+
+    def call_effects(self, node):
+        """Effects of the call itself, not counting its arguments."""
+        effects = Effects()
+        name = self.builtin_name(node)
+        if name is not None:
+            effects.output, effects.resizes = BUILTIN_EFFECTS[name]
+        elif isinstance(node.name, Variable) and node.name.name in self.functions:
+            effects.update(self.function_effects[node.name.name])
+        else:
+            effects.unknown = True
+        return effects
+
+    def builtin_name(self, node):
+        """The builtin a FunctionCall is known to call, or None."""
+        if isinstance(node.name, Variable):
+            name = node.name.name
+            if name in BUILTIN_EFFECTS and name not in self.shadowed:
+                return name
+        return None
+
+    def is_user_function_call(self, node):
+        return isinstance(node, FunctionCall) and isinstance(node.name, Variable) and node.name.name in self.functions
+
+# ===========================
+# Loop Optimizations
+# ===========================
+
+def expression_key(node):
+    """Structural identity of an expression, or None if it cannot be compared."""
+    if isinstance(node, LITERAL_NODES):
+        return (type(node).__name__, type(node.value).__name__, node.value)
+    if isinstance(node, Variable):
+        return ('Variable', node.name)
+    if isinstance(node, BinaryOp):
+        parts = (node.op, expression_key(node.left), expression_key(node.right))
+    elif isinstance(node, UnaryOp):
+        parts = (node.op.upper(), expression_key(node.operand))
+    elif isinstance(node, ArrayAccess):
+        parts = (expression_key(node.array), expression_key(node.index))
+    elif isinstance(node, FunctionCall):
+        parts = (expression_key(node.name),) + tuple(expression_key(arg) for arg in node.args)
+    else:
+        return None
+    if None in parts:
+        return None
+    return (type(node).__name__,) + parts
+
+def expression_size(node):
+    return 1 + sum(expression_size(child) for child in expression_children(node))
+
+def expression_children(node):
+    if isinstance(node, BinaryOp):
+        return [node.left, node.right]
+    if isinstance(node, UnaryOp):
+        return [node.operand]
+    if isinstance(node, ArrayAccess):
+        return [node.array, node.index]
+    if isinstance(node, FunctionCall):
+        return node.args
+    if isinstance(node, (Array, ArrayLiteral)):
+        return node.elements
+    if isinstance(node, AttributeAccess):
+        return [node.obj]
+    return []
+
+def replace_children(node, replace):
+    """Apply `replace(child, escapes)` to each child expression of `node` in place."""
+    if isinstance(node, BinaryOp):
+        node.left = replace(node.left, False)
+        node.right = replace(node.right, False)
+    elif isinstance(node, UnaryOp):
+        node.operand = replace(node.operand, False)
+    elif isinstance(node, ArrayAccess):
+        node.array = replace(node.array, False)
+        node.index = replace(node.index, False)
+    elif isinstance(node, FunctionCall):
+        # Arguments escape into the callee, except for length(), which only reads them
+        escapes = not (isinstance(node.name, Variable) and node.name.name == 'length')
+        node.args = [replace(arg, escapes) for arg in node.args]
+    elif isinstance(node, (Array, ArrayLiteral)):
+        node.elements = [replace(elem, True) for elem in node.elements]
+    elif isinstance(node, AttributeAccess):
+        node.obj = replace(node.obj, False)
+
+class LoopOptimizer:
+    """Loop-invariant code motion and common-subexpression elimination.
+
+    - hoists loop-invariant subexpressions of while/for conditions (such as
+      length(array)) into a temporary assigned once before the loop
+    - evaluates pure subexpressions that occur more than once in a statement
+      (such as array[i]) once, into a temporary assigned just before it
+
+    Only conditions are hoisted because they run at least once, so hoisting
+    never evaluates something the original program would not have. A
+    hoisted expression may read variables, array elements and array lengths.
+    It is hoisted only if EffectAnalysis shows that nothing in the loop
+    (including the functions it calls) reassigns those variables, stores
+    into arrays or resizes them. A subexpression passed directly to a call
+    other than length() is never shared: the callee might mutate it if it
+    is an array built by +.
+
+    Temporaries are named "$loop<n>" and "$cse<n>", which no source
+    identifier can clash with. They are declared at the top of the enclosing
+    function body or program, because loop bodies do not get a fresh scope
+    per iteration.
+    """
+    def __init__(self, changes=None):
+        self.changes = [] if changes is None else changes
+        self.analysis = None
+        self.temporaries = []  # Temporaries of the enclosing function body or program
+        self.counter = 0
+
+    def optimize(self, program):
+        self.analysis = EffectAnalysis(program)
+        program.statements = self.optimize_scope(program.statements)
+        return program
+
+    def report(self, line, message):
+        if line is not None:
+            message = f'line {line}: {message}'
+        self.changes.append(message)
+
+    def new_temporary(self, prefix):
+        name = f'${prefix}{self.counter}'
+        self.counter += 1
+        self.temporaries.append(name)
+        return name
+
+    def optimize_scope(self, statements):
+        enclosing = self.temporaries
+        self.temporaries = []
+        statements = self.optimize_block(statements)
+        declarations = [VarDeclaration(None, name, Number(0)) for name in self.temporaries]
+        self.temporaries = enclosing
+        return declarations + statements
+
+    def optimize_block(self, statements):
+        optimized = []
+        for stmt in statements:
+            optimized.extend(self.optimize_statement(stmt))
+        return optimized
+
+    def optimize_statement(self, node):
+        if isinstance(node, FunctionDeclaration):
+            node.body = self.optimize_scope(node.body)
+            return [node]
+        if isinstance(node, IfStatement):
+            node.then_branch = self.optimize_block(node.then_branch)
+            if node.else_branch:
+                node.else_branch = self.optimize_block(node.else_branch)
+            return self.eliminate_common_subexpressions(node, ['condition'])
+        if isinstance(node, (WhileStatement, ForStatement)):
+            node.body = self.optimize_block(node.body)
+            return self.hoist_invariants(node) + [node]
+        if isinstance(node, (VarDeclaration, Assignment, PrintStatement, ReturnStatement)):
+            return self.eliminate_common_subexpressions(node, ['expr'])
+        if isinstance(node, ArrayAssignment):
+            return self.eliminate_common_subexpressions(node, ['index_expr', 'expr'])
+        if isinstance(node, (FunctionCall, ArrayAccess)):
+            return self.eliminate_common_subexpressions(node, [])
+        return [node]
+
+    # ===========================
+    # Loop-Invariant Code Motion
+    # ===========================
+
+    def hoist_invariants(self, node):
+        loop_effects = self.analysis.statement_effects(node)
+        if loop_effects.unknown:
+            return []
+        killed = loop_effects.writes | loop_effects.declares
+        hoisted = []
+
+        def replace(expr, escapes):
+            if not escapes and self.is_nontrivial(expr):
+                dependencies = self.dependencies(expr)
+                if dependencies is not None:
+                    names, elements, lengths = dependencies
+                    if not (names & killed or (elements and (loop_effects.stores or loop_effects.resizes))
+                            or (lengths and loop_effects.resizes)):
+                        name = self.new_temporary('loop')
+                        self.report(node.line, f'hoisted {format_expression(expr)} out of the loop as {name}')
+                        hoisted.append(Assignment(name, expr))
+                        return Variable(name)
+            replace_children(expr, replace)
+            return expr
+
+        node.condition = replace(node.condition, False)
+        return hoisted
+
+    def is_nontrivial(self, node):
+        return isinstance(node, (BinaryOp, UnaryOp, ArrayAccess, FunctionCall))
+
+    def dependencies(self, node):
+        """Return (variables read, reads array elements, reads array lengths) or None if not hoistable."""
+        if isinstance(node, LITERAL_NODES):
+            return set(), False, False
+        if isinstance(node, Variable):
+            return {node.name}, False, False
+        if isinstance(node, BinaryOp):
+            if node.op not in BINARY_OPERATORS and node.op.upper() not in BINARY_OPERATORS:
+                return None
+            parts = [self.dependencies(node.left), self.dependencies(node.right)]
+        elif isinstance(node, UnaryOp):
+            if node.op.upper() != 'NOT':
+                return None
+            parts = [self.dependencies(node.operand)]
+        elif isinstance(node, ArrayAccess):
+            parts = [self.dependencies(node.array), self.dependencies(node.index), (set(), True, False)]
+        elif isinstance(node, FunctionCall) and self.analysis.builtin_name(node) == 'length' and len(node.args) == 1:
+            parts = [self.dependencies(node.args[0]), (set(), False, True)]
+        else:
+            return None  # Other calls, array literals, pointers and attributes
+        if None in parts:
+            return None
+        names = set().union(*(part[0] for part in parts))
+        return names, any(part[1] for part in parts), any(part[2] for part in parts)
+
+    # ===========================
+    # Common-Subexpression Elimination
+    # ===========================
+
+    def eliminate_common_subexpressions(self, node, fields):
+        """Return `node` preceded by assignments of the subexpressions it now shares."""
+        analysis = self.analysis
+        if fields:
+            roots = [getattr(node, field) for field in fields]
+        else:
+            roots = expression_children(node)  # Expression statement: the call/access itself runs once
+        # Any side effect inside the statement could change a value between two occurrences
+        for root in roots:
+            if not analysis.expression_effects(root).is_pure():
+                return [node]
+
+        prelude = []
+        while True:
+            occurrences = {}
+
+            def collect(expr, escapes):
+                if not escapes and self.is_shareable(expr):
+                    key = expression_key(expr)
+                    if key is not None:
+                        occurrences.setdefault(key, []).append(expr)
+                for child, child_escapes in self.children_with_escape(expr):
+                    collect(child, child_escapes)
+
+            for root, escapes in self.roots_with_escape(node, fields, roots):
+                collect(root, escapes)
+            for assignment in prelude:
+                collect(assignment.expr, False)
+            repeated = [exprs for exprs in occurrences.values() if len(exprs) > 1]
+            if not repeated:
+                break
+            # Share the largest repeated expression first; its parts are then counted again
+            exprs = max(repeated, key=lambda exprs: expression_size(exprs[0]))
+            shared = {id(expr) for expr in exprs}
+            name = self.new_temporary('cse')
+            self.report(node.line, f'reused {format_expression(exprs[0])} ({len(exprs)} occurrences) as {name}')
+            # Smaller expressions are shared later, and earlier temporaries may be built from them
+            prelude.insert(0, Assignment(name, exprs[0]))
+
+            def replace(expr, escapes):
+                if id(expr) in shared:
+                    return Variable(name)
+                replace_children(expr, replace)
+                return expr
+
+            for assignment in prelude[1:]:
+                assignment.expr = replace(assignment.expr, False)
+            if fields:
+                for field in fields:
+                    setattr(node, field, replace(getattr(node, field), False))
+            else:
+                replace_children(node, replace)
+        return prelude + [node]
+
+    def is_shareable(self, node):
+        if not self.is_nontrivial(node):
+            return False
+        if self.dependencies(node) is not None:
+            return True
+        # Calls to user functions are shareable when they have no effects at all
+        return (self.analysis.is_user_function_call(node)
+                and self.analysis.expression_effects(node).is_pure())
+
+    def children_with_escape(self, node):
+        pairs = []
+        replace_children(node, lambda child, escapes: pairs.append((child, escapes)) or child)
+        return pairs
+
+    def roots_with_escape(self, node, fields, roots):
+        if fields:
+            return [(root, False) for root in roots]
+        return self.children_with_escape(node)
+
+if __name__ == '__main__':
+    # Usage: python optimizer.py file.ss
+    import sys
+    from lexer import Lexer
+    from parser import Parser
+    with open(sys.argv[1], 'r') as file:
+        program = Parser(Lexer(file.read()).tokenize_stream()).parse()
+    optimizer = Optimizer()
+    optimizer.optimize(program)
+    for change in optimizer.changes:
+        print(change)
+    print(f'{len(optimizer.changes)} changes')
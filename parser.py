@@ -1,69 +1,221 @@
 # parser.py
 
 from ast_nodes import *
+from lexer import TOKEN_TYPES, TOKEN_CODES, TokenStream, IncrementalLexer, splice_shifted
+from array import array
 import re
+import threading
+
+# Binary operator precedence by token code, loosest first; every binary operator is left-associative.
+# '*' always lexes as POINTER, so OP covers '+', '-' and '/' in practice.
+BINARY_PRECEDENCE = {
+    TOKEN_CODES['OR']: 1,
+    TOKEN_CODES['AND']: 2,
+    TOKEN_CODES['EQ']: 3,
+    TOKEN_CODES['NEQ']: 3,
+    TOKEN_CODES['GT']: 4,
+    TOKEN_CODES['LT']: 4,
+    TOKEN_CODES['GTE']: 4,
+    TOKEN_CODES['LTE']: 4,
+    TOKEN_CODES['OP']: 5,
+}
+
+# Operator stack markers; below every binary precedence so reductions stop at them
+OPEN_PAREN = -1
+UNARY_NOT = 0
+
+# Line numbers as shared int objects (CPython only caches small ints), so positions on
+# a line cost every node a pointer rather than an int of its own. Parsers run on the Tk thread
+# and the lint worker, so the table only grows under LINE_NUMBERS_LOCK
+LINE_NUMBERS = list(range(1024))
+LINE_NUMBERS_LOCK = threading.Lock()
+
+def intern_lines(last_line):
+    """Make sure LINE_NUMBERS covers every line up to last_line."""
+    if last_line >= len(LINE_NUMBERS):
+        with LINE_NUMBERS_LOCK:
+            if last_line >= len(LINE_NUMBERS):
+                LINE_NUMBERS.extend(range(len(LINE_NUMBERS), last_line + 1))
+
+NOT_CODE = TOKEN_CODES['NOT']
+LPAREN_CODE = TOKEN_CODES['LPAREN']
+RPAREN_CODE = TOKEN_CODES['RPAREN']
+POINTER_CODE = TOKEN_CODES['POINTER']
+END_CODE = TOKEN_CODES['END']
+LBRACE_CODE = TOKEN_CODES['LBRACE']
+RBRACE_CODE = TOKEN_CODES['RBRACE']
+ELSE_CODE = TOKEN_CODES['ELSE']
+EOF_CODE = TOKEN_CODES['EOF']
+
+# Every SyntaxError the lexer and parser raise ends with its position
+ERROR_POSITION = re.compile(r' at line (\d+) column (\d+)$')
 
 class Parser:
-    def __init__(self, tokens):
+    """Recursive descent parser over a TokenStream.
+
+    By default the first syntax error is raised. With recover=True a
+    statement that fails to parse is recorded in errors and replaced by an
+    ErrorStatement; parsing resumes after the next ';' or '{...}' block at
+    the statement's level, or at the '}' closing the enclosing block, so
+    one parse returns a partial Program and every error.
+    """
+    def __init__(self, tokens, recover=False):
+        # The parser reads a TokenStream's columns directly; plain token lists are converted once
+        if not isinstance(tokens, TokenStream):
+            tokens = TokenStream.from_tokens(tokens)
         self.tokens = tokens
+        self.kinds = tokens.kinds
         self.pos = 0
+        self.errors = [] if recover else None  # SyntaxErrors found so far in recovery mode
+        self.error_nodes = []  # ErrorStatements made so far, minus those now held in another's skipped
+        if len(tokens):
+            intern_lines(tokens.lines[-1])
 
     def peek(self):
+        # Materializes a Token; the hot paths use peek_type() and peek_value() instead
         return self.tokens[self.pos]
 
+    def peek_type(self):
+        return TOKEN_TYPES[self.kinds[self.pos]]
+
+    def peek_value(self):
+        return self.tokens.value_at(self.pos)
+
     def advance(self):
-        if self.pos < len(self.tokens):
+        if self.pos < len(self.kinds):
             self.pos += 1
 
     def expect(self, type_):
+        """Consume a token of the given type and return its value."""
+        pos = self.pos
+        if self.kinds[pos] == TOKEN_CODES[type_]:
+            self.pos = pos + 1
+            return self.tokens.value_at(pos)
         token = self.peek()
-        if token.type == type_:
-            self.advance()
-            return token
-        else:
-            raise SyntaxError(f'Expected token {type_}, got {token.type} at line {token.line} column {token.column}')
+        raise SyntaxError(f'Expected token {type_}, got {token.type} at line {token.line} column {token.column}')
 
     def parse(self):
         statements = []
-        while self.peek().type != 'EOF':
+        while self.peek_type() != 'EOF':
             stmt = self.statement()
             statements.append(stmt)
         return Program(statements)  # Assuming a Program node to encapsulate all statements
 
+    @classmethod
+    def iter_statements(cls, tokens):
+        """Parse top-level statements from an iterable of Tokens, yielding each as soon as it is complete.
+
+        Tokens are grouped lexically first: a statement ends at ';' or at a
+        closing '}' (unless 'else' follows) outside any brackets. Each group
+        is parsed on its own, so only one statement's tokens are held at a
+        time. A Program built from this generator can be run in 'tree' mode
+        while the source is still being read.
+        """
+        group = TokenStream()
+        depth = 0
+        block_closed = False  # A '}' just returned to depth 0; the statement ends unless 'else' follows
+        for token in tokens:
+            type_ = token.type
+            if block_closed and type_ != 'ELSE':
+                yield from cls.parse_group(group, token.line, token.column)
+                group = TokenStream()
+            block_closed = False
+            if type_ == 'EOF':
+                if len(group):
+                    yield from cls.parse_group(group, token.line, token.column)
+                return
+            group.append(type_, token.value, token.line, token.column)
+            if type_ in ('LPAREN', 'LBRACE', 'LBRACKET'):
+                depth += 1
+            elif type_ in ('RPAREN', 'RBRACE', 'RBRACKET'):
+                depth -= 1
+                block_closed = depth == 0 and type_ == 'RBRACE'
+            elif type_ == 'END' and depth == 0:
+                yield from cls.parse_group(group, token.line, token.column + 1)
+                group = TokenStream()
+
+    @classmethod
+    def parse_group(cls, group, line, column):
+        # The group gets its own EOF, positioned where the statement ended
+        group.append('EOF', '', line, column)
+        parser = cls(group)
+        while parser.peek_type() != 'EOF':
+            yield parser.statement()
+
+    def locate(self, node, start):
+        """Record the position of node, which spans the tokens from start to the last one consumed."""
+        tokens = self.tokens
+        node.line = LINE_NUMBERS[tokens.lines[start]]
+        node.col = tokens.columns[start]
+        node.end = LINE_NUMBERS[tokens.lines[self.pos - 1]]
+        return node
+
     def statement(self):
-        token = self.peek()
-        if token.type == 'VAR':
+        start = self.pos
+        if self.errors is None:
+            return self.locate(self.bare_statement(), start)
+        count = len(self.error_nodes)
+        try:
+            return self.locate(self.bare_statement(), start)
+        except SyntaxError as e:
+            self.synchronize()
+            if self.pos == start:
+                self.pos += 1  # A stray '}' at the top level: skip it so parsing makes progress
+            return self.error_statement(e, start, count)
+
+    def block(self):
+        """Parse '{' statements '}' and return the statements."""
+        self.expect('LBRACE')
+        body = []
+        kinds = self.kinds
+        while kinds[self.pos] != RBRACE_CODE:
+            if kinds[self.pos] == EOF_CODE and self.errors is not None:
+                # Unclosed block: keep what it holds
+                token = self.peek()
+                error = SyntaxError(f'Expected token RBRACE, got EOF at line {token.line} column {token.column}')
+                body.append(self.error_statement(error, self.pos, len(self.error_nodes)))
+                return body
+            body.append(self.statement())
+        self.pos += 1
+        return body
+
+    def bare_statement(self):
+        token_type = self.peek_type()
+        if token_type == 'VAR':
             return self.var_declaration()
-        elif token.type == 'POINTER':
+        elif token_type == 'POINTER':
             return self.pointer_declaration()
-        elif token.type == 'IMPORT':
+        elif token_type == 'IMPORT':
             return self.import_statement()
-        elif token.type == 'FUNCTION':
+        elif token_type == 'FUNCTION':
             return self.function_declaration()
-        elif token.type == 'IF':
+        elif token_type == 'IF':
             return self.if_statement()
-        elif token.type == 'WHILE':
+        elif token_type == 'WHILE':
             return self.while_statement()
-        elif token.type == 'FOR':
+        elif token_type == 'FOR':
             return self.for_statement()
-        elif token.type == 'RETURN':
+        elif token_type == 'RETURN':
             return self.return_statement()
-        elif token.type == 'PRINT':
+        elif token_type == 'PRINT':
             return self.print_statement()
-        elif token.type == 'ID':
-            if self.pos + 1 < len(self.tokens):
-                next_token = self.tokens[self.pos + 1]
-                if next_token.type == 'ASSIGN':
+        elif token_type == 'ID':
+            if self.pos + 1 < len(self.kinds):
+                next_type = self.tokens.type_at(self.pos + 1)
+                if next_type == 'ASSIGN':
                     return self.assignment()
-                elif next_token.type == 'LPAREN':
+                elif next_type == 'LPAREN':
                     return self.function_call_statement()
-                elif next_token.type == 'LBRACKET':
+                elif next_type == 'LBRACKET':
                     return self.array_assignment()
                 else:
+                    next_token = self.tokens[self.pos + 1]
                     raise SyntaxError(f'Unexpected token {next_token.type} after ID at line {next_token.line} column {next_token.column}')
             else:
+                token = self.peek()
                 raise SyntaxError(f'Unexpected end of input after ID at line {token.line} column {token.column}')
         else:
+            token = self.peek()
             raise SyntaxError(f'Unexpected token {token.type} at line {token.line} column {token.column}')
 
     def var_declaration(self):
@@ -75,7 +227,7 @@ class Parser:
         if var_type not in {'integer', 'float', 'string', 'boolean'}:
             raise SyntaxError(f'Unknown variable type {var_type} at line {var_type_token.line} column {var_type_token.column}')
         self.advance()
-        var_name = self.expect('ID').value
+        var_name = self.expect('ID')
         self.expect('ASSIGN')
         expr = self.expression()
         self.expect('END')
@@ -90,7 +242,7 @@ class Parser:
         if var_type not in {'integer', 'float', 'string', 'boolean'}:
             raise SyntaxError(f'Unknown pointer type {var_type} at line {var_type_token.line} column {var_type_token.column}')
         self.advance()
-        var_name = self.expect('ID').value
+        var_name = self.expect('ID')
         self.expect('ASSIGN')
         expr = self.expression()
         self.expect('END')
@@ -107,14 +259,14 @@ class Parser:
         return ImportStatement(module_name)
 
     def assignment(self):
-        var_name = self.expect('ID').value
+        var_name = self.expect('ID')
         self.expect('ASSIGN')
         expr = self.expression()
         self.expect('END')
         return Assignment(var_name, expr)
 
     def array_assignment(self):
-        array_name = self.expect('ID').value
+        array_name = self.expect('ID')
         self.expect('LBRACKET')
         index_expr = self.expression()
         self.expect('RBRACKET')
@@ -136,19 +288,11 @@ class Parser:
         self.expect('LPAREN')
         condition = self.expression()
         self.expect('RPAREN')
-        self.expect('LBRACE')
-        then_branch = []
-        while self.peek().type != 'RBRACE':
-            then_branch.append(self.statement())
-        self.expect('RBRACE')
+        then_branch = self.block()
         else_branch = None
-        if self.peek().type == 'ELSE':
+        if self.peek_type() == 'ELSE':
             self.advance()
-            self.expect('LBRACE')
-            else_branch = []
-            while self.peek().type != 'RBRACE':
-                else_branch.append(self.statement())
-            self.expect('RBRACE')
+            else_branch = self.block()
         return IfStatement(condition, then_branch, else_branch)
 
     def while_statement(self):
@@ -156,62 +300,54 @@ class Parser:
         self.expect('LPAREN')
         condition = self.expression()
         self.expect('RPAREN')
-        self.expect('LBRACE')
-        body = []
-        while self.peek().type != 'RBRACE':
-            body.append(self.statement())
-        self.expect('RBRACE')
+        body = self.block()
         return WhileStatement(condition, body)
 
     def for_statement(self):
         self.expect('FOR')
         self.expect('LPAREN')
-        if self.peek().type == 'VAR':
+        start = self.pos
+        if self.peek_type() == 'VAR':
             init = self.var_declaration()
-        elif self.peek().type == 'POINTER':
+        elif self.peek_type() == 'POINTER':
             init = self.pointer_declaration()
-        elif self.peek().type == 'ID':
+        elif self.peek_type() == 'ID':
             init = self.assignment()
         else:
             raise SyntaxError(f'Invalid initialization in for loop at line {self.peek().line} column {self.peek().column}')
+        self.locate(init, start)
         condition = self.expression()
         self.expect('END')
-        if self.peek().type in {'ID', 'POINTER'}:
-            if self.peek().type == 'POINTER':
+        start = self.pos
+        if self.peek_type() in {'ID', 'POINTER'}:
+            if self.peek_type() == 'POINTER':
                 increment = self.pointer_declaration()
             else:
-                var_name = self.expect('ID').value
+                var_name = self.expect('ID')
                 self.expect('ASSIGN')
                 expr = self.expression()
                 increment = Assignment(var_name, expr)
         else:
             raise SyntaxError(f'Invalid increment in for loop at line {self.peek().line} column {self.peek().column}')
+        self.locate(increment, start)
         self.expect('RPAREN')
-        self.expect('LBRACE')
-        body = []
-        while self.peek().type != 'RBRACE':
-            body.append(self.statement())
-        self.expect('RBRACE')
+        body = self.block()
         return ForStatement(init, condition, increment, body)
 
     def function_declaration(self):
         self.expect('FUNCTION')
-        func_name = self.expect('ID').value
+        func_name = self.expect('ID')
         self.expect('LPAREN')
         params = []
-        if self.peek().type != 'RPAREN':
+        if self.peek_type() != 'RPAREN':
             while True:
-                param = self.expect('ID').value
+                param = self.expect('ID')
                 params.append(param)
-                if self.peek().type != 'COMMA':
+                if self.peek_type() != 'COMMA':
                     break
                 self.expect('COMMA')
         self.expect('RPAREN')
-        self.expect('LBRACE')
-        body = []
-        while self.peek().type != 'RBRACE':
-            body.append(self.statement())
-        self.expect('RBRACE')
+        body = self.block()
         return FunctionDeclaration(func_name, params, body)
 
     def function_call_statement(self):
@@ -223,11 +359,11 @@ class Parser:
         name = self.variable()
         self.expect('LPAREN')
         args = []
-        if self.peek().type != 'RPAREN':
+        if self.peek_type() != 'RPAREN':
             while True:
                 arg = self.expression()
                 args.append(arg)
-                if self.peek().type != 'COMMA':
+                if self.peek_type() != 'COMMA':
                     break
                 self.expect('COMMA')
         self.expect('RPAREN')
@@ -240,109 +376,109 @@ class Parser:
         return ReturnStatement(expr)
 
     def expression(self):
-        return self.logical_or()
-
-    def logical_or(self):
-        node = self.logical_and()
-        while self.peek().type == 'OR':
-            op = self.expect('OR').value
-            right = self.logical_and()
-            node = BinaryOp(node, op, right)
-        return node
-
-    def logical_and(self):
-        node = self.equality()
-        while self.peek().type == 'AND':
-            op = self.expect('AND').value
-            right = self.equality()
-            node = BinaryOp(node, op, right)
-        return node
-
-    def equality(self):
-        node = self.comparison()
-        while self.peek().type in {'EQ', 'NEQ'}:
-            op = self.expect(self.peek().type).value
-            right = self.comparison()
-            node = BinaryOp(node, op, right)
-        return node
-
-    def comparison(self):
-        node = self.term()
-        while self.peek().type in {'GT', 'LT', 'GTE', 'LTE'}:
-            op = self.expect(self.peek().type).value
-            right = self.term()
-            node = BinaryOp(node, op, right)
-        return node
-
-    def term(self):
-        node = self.factor()
-        while self.peek().type == 'OP' and self.peek().value in {'+', '-', '*', '/'}:
-            op = self.expect('OP').value
-            right = self.factor()
-            node = BinaryOp(node, op, right)
-        return node
-
-    def factor(self):
-        node = self.unary()
-        return node
-
-    def unary(self):
-        token = self.peek()
-        if token.type == 'NOT':
-            op = self.expect('NOT').value
-            operand = self.unary()
-            node = UnaryOp(op, operand)
-            return node
-        elif token.type == 'POINTER':
-            self.expect('POINTER')
-            var_name = self.expect('ID').value
-            return PointerDereference(Variable(var_name))  # Correctly references the new AST node
-        else:
-            return self.primary()
+        """Parse an expression by precedence climbing over explicit stacks.
+
+        Binary operators are all left-associative, with precedences from
+        BINARY_PRECEDENCE; NOT and pointer dereference bind tighter than any
+        of them. Parentheses and NOT are handled on the operator stack
+        rather than by recursion, so long or deeply nested expressions cost
+        no Python stack depth (array indexes, array literals and call
+        arguments still recurse into expression()).
+        """
+        kinds = self.kinds
+        binary = binary_op
+        operands = []
+        operators = []  # (precedence, op) for binary operators, (UNARY_NOT, op, token index) or (OPEN_PAREN, None)
+        open_parens = 0
+        while True:
+            # Operand position: prefixes, then one primary
+            code = kinds[self.pos]
+            while code == NOT_CODE or code == LPAREN_CODE:
+                if code == NOT_CODE:
+                    operators.append((UNARY_NOT, self.expect('NOT'), self.pos - 1))
+                else:
+                    self.pos += 1
+                    operators.append((OPEN_PAREN, None))
+                    open_parens += 1
+                code = kinds[self.pos]
+            if code == POINTER_CODE:
+                start = self.pos
+                self.pos += 1
+                operand = self.locate(PointerDereference(self.locate(Variable(self.expect('ID')), start + 1)), start)
+            else:
+                operand = self.primary()
+            # Operator position: close parentheses, then either a binary operator or the end
+            while True:
+                while operators and operators[-1][0] == UNARY_NOT:
+                    _, op, start = operators.pop()
+                    operand = self.locate(UnaryOp(op, operand), start)
+                code = kinds[self.pos]
+                precedence = BINARY_PRECEDENCE.get(code)
+                if precedence is not None:
+                    while operators and operators[-1][0] >= precedence:
+                        op = operators.pop()[1]
+                        operand = binary(operands.pop(), op, operand)
+                    operators.append((precedence, self.tokens.value_at(self.pos)))
+                    operands.append(operand)
+                    self.pos += 1
+                    break
+                if code == RPAREN_CODE and open_parens:
+                    while operators[-1][0] != OPEN_PAREN:
+                        op = operators.pop()[1]
+                        operand = binary(operands.pop(), op, operand)
+                    operators.pop()
+                    open_parens -= 1
+                    self.pos += 1
+                    continue
+                if open_parens:
+                    self.expect('RPAREN')  # Raises the usual error for the unexpected token
+                while operators:
+                    op = operators.pop()[1]
+                    operand = binary(operands.pop(), op, operand)
+                return operand
 
     def primary(self):
-        token = self.peek()
-        if token.type == 'NUMBER':
-            self.advance()
-            return Number(token.value)
-        elif token.type == 'STRING':
-            self.advance()
-            return String(token.value)
-        elif token.type == 'BOOLEAN':
-            self.advance()
-            return Boolean(token.value)
-        elif token.type == 'ID':
-            node = Variable(self.expect('ID').value)
-            while self.peek().type == 'DOT':
+        token_type = self.peek_type()
+        start = self.pos
+        if token_type == 'NUMBER':
+            return self.locate(Number(self.expect('NUMBER')), start)
+        elif token_type == 'STRING':
+            return self.locate(String(self.expect('STRING')), start)
+        elif token_type == 'BOOLEAN':
+            return self.locate(Boolean(self.expect('BOOLEAN')), start)
+        elif token_type == 'ID':
+            node = self.locate(Variable(self.expect('ID')), start)
+            while self.peek_type() == 'DOT':
                 self.expect('DOT')
-                attr = self.expect('ID').value
-                node = AttributeAccess(node, attr)
-            while self.peek().type == 'LPAREN':
-                node = self.function_call_with_node(node)
-            while self.peek().type == 'LBRACKET':
+                attr = self.expect('ID')
+                node = self.locate(AttributeAccess(node, attr), start)
+            while self.peek_type() == 'LPAREN':
+                node = self.locate(self.function_call_with_node(node), start)
+            while self.peek_type() == 'LBRACKET':
                 self.expect('LBRACKET')
                 index = self.expression()
                 self.expect('RBRACKET')
-                node = ArrayAccess(node, index)
+                node = self.locate(ArrayAccess(node, index), start)
             return node
-        elif token.type == 'LBRACKET':
-            return self.array_literal()
-        elif token.type == 'LPAREN':
+        elif token_type == 'LBRACKET':
+            return self.locate(self.array_literal(), start)
+        elif token_type == 'LPAREN':
             self.expect('LPAREN')
             node = self.expression()
             self.expect('RPAREN')
             return node
         else:
+            token = self.peek()
             raise SyntaxError(f'Unexpected token {token.type} at line {token.line} column {token.column}')
 
     def array_literal(self):
         elements = []
         self.expect('LBRACKET')
-        if self.peek().type != 'RBRACKET':
+        if self.peek_type() != 'RBRACKET':
             while True:
                 elem = self.expression()
                 elements.append(elem)
-                if self.peek().type != 'COMMA':
+                if self.peek_type() != 'COMMA':
                     break
                 self.expect('COMMA')
         self.expect('RBRACKET')
@@ -351,16 +487,292 @@ class Parser:
     def function_call_with_node(self, node):
         self.expect('LPAREN')
         args = []
-        if self.peek().type != 'RPAREN':
+        if self.peek_type() != 'RPAREN':
             while True:
                 arg = self.expression()
                 args.append(arg)
-                if self.peek().type != 'COMMA':
+                if self.peek_type() != 'COMMA':
                     break
                 self.expect('COMMA')
         self.expect('RPAREN')
         return FunctionCall(node, args)
 
     def variable(self):
-        var = self.expect('ID').value
-        return Variable(var)
\ No newline at end of file
+        start = self.pos
+        var = self.expect('ID')
+        return self.locate(Variable(var), start)
+
+    def synchronize(self):
+        """Skip the rest of a statement that failed to parse: through the next ';' or
+        closed '{...}' block (and its else) at this level, or up to a '}' closing the enclosing block."""
+        kinds = self.kinds
+        depth = 0
+        while True:
+            kind = kinds[self.pos]
+            if kind == EOF_CODE:
+                return
+            if kind == RBRACE_CODE:
+                if depth == 0:
+                    return
+                depth -= 1
+                self.pos += 1
+                if depth == 0 and kinds[self.pos] != ELSE_CODE:
+                    return
+                continue
+            self.pos += 1
+            if kind == LBRACE_CODE:
+                depth += 1
+            elif kind == END_CODE and depth == 0:
+                return
+
+    def error_statement(self, error, start, count):
+        """Record error and return the ErrorStatement standing for the tokens from start that it made
+        the parser skip; it takes over the ErrorStatements made since there were count of them."""
+        self.errors.append(error)
+        node = ErrorStatement(str(error), skipped=self.error_nodes[count:])
+        del self.error_nodes[count:]
+        self.error_nodes.append(node)
+        self.locate(node, start)
+        if self.pos <= start:
+            node.end = node.line  # Nothing was skipped (an unclosed block at EOF)
+        match = ERROR_POSITION.search(node.message)
+        if match:
+            node.message = node.message[:match.start()]
+            node.line_offset = int(match.group(1)) - node.line
+            node.column = int(match.group(2)) - (node.col if node.line_offset == 0 else 0)
+        return node
+
+def binary_op(left, op, right):
+    """BinaryOp spanning its operands."""
+    node = BinaryOp(left, op, right)
+    node.line = left.line
+    node.col = left.col
+    node.end = right.end
+    return node
+
+def error_statements(statements):
+    """Yield the ErrorStatements among statements and the blocks nested in them."""
+    for stmt in statements:
+        if isinstance(stmt, ErrorStatement):
+            yield from error_statements(stmt.skipped)
+            yield stmt
+        elif isinstance(stmt, IfStatement):
+            yield from error_statements(stmt.then_branch)
+            yield from error_statements(stmt.else_branch or [])
+        elif isinstance(stmt, (WhileStatement, ForStatement, FunctionDeclaration)):
+            yield from error_statements(stmt.body)
+
+def error_from_statement(node):
+    """The SyntaxError an ErrorStatement was made for, positioned where the node now is."""
+    if node.line is None:
+        return SyntaxError(node.message)
+    column = node.column + (node.col if node.line_offset == 0 else 0)
+    return SyntaxError(f'{node.message} at line {node.line + node.line_offset} column {column}')
+
+def shift_positions(node, line_delta, column_line=None, column_delta=0):
+    """Move the positions of every node in a subtree: lines by line_delta, and columns by column_delta on column_line."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+        elif isinstance(node, ASTNode):
+            if node.line is not None:
+                if node.line == column_line:
+                    node.col += column_delta
+                node.line += line_delta
+            if node.end is not None:
+                node.end += line_delta
+            for field in node.__slots__:
+                stack.append(getattr(node, field, None))
+
+class IncrementalParser:
+    """Keeps a Program in step with a source that is edited piece by piece.
+
+    Alongside the Program it records the token span [start, end) of every
+    top-level statement. After an edit only the statements from the last
+    one ending at or after the damaged tokens are reparsed, up to the first
+    old statement boundary past the damage; the statements after that are
+    kept as the same objects, with their spans and, where the edit moved
+    them, their positions shifted.
+
+    Like the lexer's, the shift of the spans is deferred (see
+    splice_shifted). A kept statement's own position is updated, but the
+    nodes nested in it keep their old positions until settle() is called
+    for it, so an edit never rewrites the subtrees it did not touch.
+
+    With recover=True statements are parsed in the Parser's recovery mode:
+    update() only raises for lexer errors and errors lists every syntax
+    error, including those in statements kept from earlier updates.
+    """
+    def __init__(self, recover=False):
+        self.recover = recover
+        self.lexer = None
+        self.program = None
+        self.starts = None
+        self.ends = None
+        self.shift_index = self.shift = 0  # starts[shift_index:] and ends[shift_index:] are pending a shift by shift tokens
+        self.anchors = {}  # Kept statement -> its (line, col) when the positions nested in it were last updated
+
+    def update(self, code):
+        """Bring the Program up to date with code and return it; raises SyntaxError like Parser.parse()."""
+        if self.lexer is None:
+            self.lexer = IncrementalLexer(code)
+        else:
+            self.lexer.update(code)
+        if self.program is None or self.lexer.damage is None:
+            return self.parse_all()
+        return self.reparse(*self.lexer.damage)
+
+    def parse_all(self):
+        self.program = None
+        self.lexer.settle()
+        parser = Parser(self.lexer.tokens, self.recover)
+        statements = []
+        starts = array('I')
+        ends = array('I')
+        while parser.peek_type() != 'EOF':
+            starts.append(parser.pos)
+            statements.append(parser.statement())
+            ends.append(parser.pos)
+        self.starts, self.ends = starts, ends
+        self.shift_index = self.shift = 0
+        self.anchors = {}
+        self.program = Program(statements)
+        return self.program
+
+    def start(self, index):
+        start = self.starts[index]
+        return start + self.shift if index >= self.shift_index else start
+
+    def end(self, index):
+        end = self.ends[index]
+        return end + self.shift if index >= self.shift_index else end
+
+    def find(self, values, target):
+        """Index of the first of starts or ends (values) at or after token target."""
+        low, high = 0, len(values)
+        while low < high:
+            mid = (low + high) // 2
+            value = values[mid] + self.shift if mid >= self.shift_index else values[mid]
+            if value < target:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def reparse(self, first, old_end, new_end):
+        lexer = self.lexer
+        tokens = lexer.tokens
+        count = len(self.starts)
+        delta = new_end - old_end
+        # An if ending right before the damage is included: the edit may give it an else
+        index = self.find(self.ends, first)
+        # Token lines are brought up to date through the first old statement past the damage, where
+        # reparsing normally stops; an edit that carries it further (opening a block, say) settles them all
+        follow = self.find(self.starts, old_end)
+        limit = self.end(follow) + delta if follow < count else None
+        lexer.settle(limit)
+        intern_lines(lexer.line_at(len(tokens) - 1))
+        result = self.parse_range(index, new_end, delta, limit)
+        if result is None:
+            lexer.settle()
+            result = self.parse_range(index, new_end, delta, None)
+        statements, new_starts, new_ends, reuse = result
+        old_statements = self.program.statements
+        if reuse < count:
+            kept = old_statements[reuse]
+            kept_start = self.start(reuse) + delta
+            line = kept.line
+            line_delta = lexer.line_at(kept_start) - line
+            column_delta = tokens.columns[kept_start] - kept.col
+            end = reuse
+            if column_delta:
+                # Only statements starting on the line the lexer resynchronised on moved sideways
+                while end < count and old_statements[end].line == line:
+                    self.move(old_statements[end], line_delta, column_delta)
+                    end += 1
+            if line_delta:
+                # The move() loop inlined: on Enter this runs for every later statement
+                anchors = self.anchors
+                for stmt in old_statements[end:]:
+                    if stmt.line is not None:
+                        if stmt not in anchors:
+                            anchors[stmt] = (stmt.line, stmt.col)
+                        stmt.line += line_delta
+                        if stmt.end is not None:
+                            stmt.end += line_delta
+        for stmt in old_statements[index:reuse]:
+            self.anchors.pop(stmt, None)
+        old_statements[index:reuse] = statements
+        point, shift = self.shift_index, self.shift
+        self.shift_index, self.shift = splice_shifted(self.starts, point, shift, index, reuse, new_starts, delta)
+        splice_shifted(self.ends, point, shift, index, reuse, new_ends, delta)
+        return self.program
+
+    def parse_range(self, index, new_end, delta, limit):
+        """Parse from statement index up to the first old statement boundary past new_end.
+
+        Returns (statements, their starts, their ends, index of the first
+        kept statement), or None if the parser reached token limit, whose
+        line may not be up to date.
+        """
+        count = len(self.starts)
+        parser = Parser(self.lexer.tokens, self.recover)
+        parser.pos = self.start(index) if index < count else (self.end(count - 1) if count else 0)
+        statements = []
+        new_starts = array('I')
+        new_ends = array('I')
+        reuse = index
+        try:
+            while parser.peek_type() != 'EOF':
+                pos = parser.pos
+                if pos >= new_end:
+                    # Past the damage: stop at the first old statement that started at this token
+                    old_pos = pos - delta
+                    while reuse < count and self.start(reuse) < old_pos:
+                        reuse += 1
+                    if reuse < count and self.start(reuse) == old_pos:
+                        break
+                new_starts.append(pos)
+                statements.append(parser.statement())
+                new_ends.append(parser.pos)
+                if limit is not None and parser.pos >= limit:
+                    return None
+            else:
+                reuse = count
+        except SyntaxError:
+            if limit is not None and parser.pos >= limit:
+                return None
+            self.program = None
+            raise
+        return statements, new_starts, new_ends, reuse
+
+    def move(self, stmt, line_delta, column_delta):
+        """Shift a kept top-level statement; the nodes nested in it catch up in settle()."""
+        if stmt.line is None:
+            return
+        self.anchors.setdefault(stmt, (stmt.line, stmt.col))
+        stmt.line += line_delta
+        stmt.col += column_delta
+        if stmt.end is not None:
+            stmt.end += line_delta
+
+    def settle(self, stmt):
+        """Bring the positions of the nodes nested in a top-level statement up to date with its own."""
+        anchor = self.anchors.pop(stmt, None)
+        if anchor is not None:
+            line, col = anchor
+            for field in stmt.__slots__:
+                shift_positions(getattr(stmt, field, None), stmt.line - line, line, stmt.col - col)
+
+    @property
+    def errors(self):
+        """SyntaxErrors for the ErrorStatements in the Program, in source order."""
+        errors = []
+        for stmt in self.program.statements if self.program else []:
+            nodes = list(error_statements([stmt]))
+            if nodes:
+                self.settle(stmt)
+                errors.extend(error_from_statement(node) for node in nodes)
+        return errors
@@ -0,0 +1,74 @@
+# quickening.py
+
+# Runtime type feedback for the "adaptive" execution mode. A BinaryOp, ArrayAccess or
+# FunctionCall starts out generic and records what it sees; once it has seen the same operand
+# types (or the same function) WARMUP times in a row, the interpreter rewrites the node in
+# place by switching its class to the Specialized subclass below, whose handler checks a cheap
+# guard and takes a fast path. A failed guard switches the node back (deoptimizes it); after
+# MAX_DEOPTIMIZATIONS, or if what it sees has no fast path, the node becomes Generic for good.
+
+from ast_nodes import *
+from type_inference import TYPED_OPERATORS, NO_SPECIALIZATIONS
+
+WARMUP = 8  # Identical observations in a row before a node is specialized
+MAX_DEOPTIMIZATIONS = 3  # Failed guards after which a node stays generic
+
+# Runtime types named like the declared types TYPED_OPERATORS uses. bool is left out on
+# purpose: guards compare exact types, and the operators treat booleans like any other value
+TYPE_NAMES = {int: 'integer', float: 'float', str: 'string'}
+
+# Operand types of an array access that only needs its bounds checked
+LIST_INDEX_TYPES = (list, int)
+
+class Feedback:
+    """What one node has observed: seen is the last operand types (or function declaration),
+    count how many times in a row it was seen, and target what the node is specialized to."""
+    __slots__ = ('seen', 'count', 'deoptimizations', 'target')
+
+    def __init__(self):
+        self.seen = None
+        self.count = 0
+        self.deoptimizations = 0
+        self.target = None
+
+def specialized_operator(op, left_type, right_type):
+    """The C-level function for op on exactly these Python types, or None if there is none."""
+    return TYPED_OPERATORS.get(op, NO_SPECIALIZATIONS).get((TYPE_NAMES.get(left_type), TYPE_NAMES.get(right_type)))
+
+# ===========================
+# Node States
+# ===========================
+# The subclasses add no fields, so a node can switch between them by assigning __class__.
+# The compilers and the optimizer dispatch on the exact class, so an adaptive run puts every
+# node back in its base class when it finishes (see Interpreter.run).
+
+class SpecializedBinaryOp(BinaryOp):
+    """feedback.seen holds the guarded (left, right) types and feedback.target the operator function."""
+    __slots__ = ()
+
+class GenericBinaryOp(BinaryOp):
+    __slots__ = ()
+
+class SpecializedArrayAccess(ArrayAccess):
+    """Guarded on a list indexed by an int; only the bounds are checked."""
+    __slots__ = ()
+
+class GenericArrayAccess(ArrayAccess):
+    __slots__ = ()
+
+class SpecializedFunctionCall(FunctionCall):
+    """Guarded on calling a UserFunction for feedback.target (its declaration), whose body runs inline."""
+    __slots__ = ()
+
+class GenericFunctionCall(FunctionCall):
+    __slots__ = ()
+
+# Where a node goes once it stops adapting
+GENERIC_CLASSES = {
+    BinaryOp: GenericBinaryOp,
+    ArrayAccess: GenericArrayAccess,
+    FunctionCall: GenericFunctionCall,
+}
+
+BASE_CLASSES = {cls: cls.__base__ for cls in (SpecializedBinaryOp, GenericBinaryOp, SpecializedArrayAccess,
+                                              GenericArrayAccess, SpecializedFunctionCall, GenericFunctionCall)}
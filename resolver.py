@@ -0,0 +1,208 @@
+# resolver.py
+
+from ast_nodes import *
+
+class Undefined:
+    """Marker stored in a frame slot whose variable has not been declared yet."""
+    def __repr__(self):
+        return 'UNDEFINED'
+
+UNDEFINED = Undefined()
+
+class Scope:
+    """Static description of a frame: the names it declares, in slot order."""
+    __slots__ = ('names', 'index')
+
+    def __init__(self, names=()):
+        self.names = []
+        self.index = {}
+        for name in names:
+            self.declare(name)
+
+    def declare(self, name):
+        if name not in self.index:
+            self.index[name] = len(self.names)
+            self.names.append(name)
+        return self.index[name]
+
+    def __repr__(self):
+        return f'Scope(names={self.names})'
+
+class Frame:
+    """Runtime storage for one Scope: a flat list of values indexed by slot.
+
+    Frames also implement the Environment interface (define/get/set by name)
+    so the tree-walking handlers that are not slot-aware keep working, and so
+    names that could not be resolved statically (free variables of functions,
+    which SimpleScript resolves dynamically through the caller) can still be
+    found by walking the chain.
+    """
+    __slots__ = ('values', 'parent', 'scope', 'extra')
+
+    def __init__(self, scope, parent=None):
+        self.values = [UNDEFINED] * len(scope.names)
+        self.parent = parent
+        self.scope = scope
+        self.extra = None  # Names defined at run time that the resolver did not know about
+
+    def define(self, name, value):
+        slot = self.scope.index.get(name)
+        if slot is None:
+            if self.extra is None:
+                self.extra = {}
+            if name in self.extra:
+                raise NameError(f"Variable '{name}' already defined.")
+            self.extra[name] = value
+        elif self.values[slot] is not UNDEFINED:
+            raise NameError(f"Variable '{name}' already defined.")
+        else:
+            self.values[slot] = value
+
+    def set(self, name, value):
+        frame = self
+        while frame is not None:
+            slot = frame.scope.index.get(name)
+            if slot is not None and frame.values[slot] is not UNDEFINED:
+                frame.values[slot] = value
+                return
+            if frame.extra is not None and name in frame.extra:
+                frame.extra[name] = value
+                return
+            frame = frame.parent
+        raise NameError(f"Variable '{name}' is not defined.")
+
+    def get(self, name):
+        frame = self
+        while frame is not None:
+            slot = frame.scope.index.get(name)
+            if slot is not None:
+                value = frame.values[slot]
+                if value is not UNDEFINED:
+                    return value
+            if frame.extra is not None and name in frame.extra:
+                return frame.extra[name]
+            frame = frame.parent
+        raise NameError(f"Variable '{name}' is not defined.")
+
+class Resolver:
+    """Assigns every variable reference a (depth, slot) pair ahead of time.
+
+    Scopes are the program (global), each function body and each for loop,
+    mirroring where the interpreter creates Environments. A reference gets
+    depth = number of frames to walk up and slot = index in that frame;
+    references that leave the enclosing function get depth None and are
+    looked up by name at run time, because functions see their caller's
+    variables.
+    """
+    def __init__(self, builtins=()):
+        self.builtins = builtins
+        self.scopes = []  # Stack of (Scope, is_function_boundary)
+
+    def resolve(self, program):
+        program.scope = Scope(self.builtins)
+        self.scopes = [(program.scope, True)]
+        self.declare_block(program.statements)
+        self.resolve_block(program.statements)
+        return program
+
+    # ===========================
+    # Declarations
+    # ===========================
+
+    def declare_block(self, statements):
+        # Pre-declare everything a scope defines so uses before the declaration get the same slot
+        for stmt in statements:
+            self.declare_statement(stmt)
+
+    def declare_statement(self, node):
+        scope = self.scopes[-1][0]
+        if isinstance(node, (VarDeclaration, PointerDeclaration, FunctionDeclaration)):
+            node.slot = scope.declare(node.name)
+        elif isinstance(node, ImportStatement):
+            node.slot = scope.declare(node.module_name)
+        elif isinstance(node, IfStatement):
+            self.declare_block(node.then_branch)
+            self.declare_block(node.else_branch or [])
+        elif isinstance(node, WhileStatement):
+            self.declare_block(node.body)
+
+    # ===========================
+    # References
+    # ===========================
+
+    def lookup(self, name):
+        depth = 0
+        for scope, is_function_boundary in reversed(self.scopes):
+            if name in scope.index:
+                return depth, scope.index[name]
+            if is_function_boundary:
+                break
+            depth += 1
+        return None, None
+
+    def resolve_block(self, statements):
+        for stmt in statements:
+            self.resolve_statement(stmt)
+
+    def resolve_statement(self, node):
+        if isinstance(node, (VarDeclaration, PointerDeclaration)):
+            self.resolve_expression(node.expr)
+        elif isinstance(node, Assignment):
+            self.resolve_expression(node.expr)
+            node.depth, node.slot = self.lookup(node.name)
+        elif isinstance(node, ArrayAssignment):
+            self.resolve_expression(node.index_expr)
+            self.resolve_expression(node.expr)
+        elif isinstance(node, PrintStatement):
+            self.resolve_expression(node.expr)
+        elif isinstance(node, IfStatement):
+            self.resolve_expression(node.condition)
+            self.resolve_block(node.then_branch)
+            self.resolve_block(node.else_branch or [])
+        elif isinstance(node, WhileStatement):
+            self.resolve_expression(node.condition)
+            self.resolve_block(node.body)
+        elif isinstance(node, ForStatement):
+            node.scope = Scope()
+            self.scopes.append((node.scope, False))
+            self.declare_statement(node.init)
+            self.declare_statement(node.increment)
+            self.declare_block(node.body)
+            self.resolve_statement(node.init)
+            self.resolve_expression(node.condition)
+            self.resolve_block(node.body)
+            self.resolve_statement(node.increment)
+            self.scopes.pop()
+        elif isinstance(node, FunctionDeclaration):
+            node.scope = Scope(node.params)
+            self.scopes.append((node.scope, True))
+            self.declare_block(node.body)
+            self.resolve_block(node.body)
+            self.scopes.pop()
+        elif isinstance(node, ReturnStatement):
+            self.resolve_expression(node.expr)
+        else:
+            self.resolve_expression(node)
+
+    def resolve_expression(self, node):
+        if isinstance(node, Variable):
+            node.depth, node.slot = self.lookup(node.name)
+        elif isinstance(node, BinaryOp):
+            self.resolve_expression(node.left)
+            self.resolve_expression(node.right)
+        elif isinstance(node, UnaryOp):
+            self.resolve_expression(node.operand)
+        elif isinstance(node, (Array, ArrayLiteral)):
+            for elem in node.elements:
+                self.resolve_expression(elem)
+        elif isinstance(node, ArrayAccess):
+            self.resolve_expression(node.array)
+            self.resolve_expression(node.index)
+        elif isinstance(node, FunctionCall):
+            self.resolve_expression(node.name)
+            for arg in node.args:
+                self.resolve_expression(arg)
+        elif isinstance(node, AttributeAccess):
+            self.resolve_expression(node.obj)
+        elif isinstance(node, PointerDereference):
+            self.resolve_expression(node.var)
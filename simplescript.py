@@ -0,0 +1,152 @@
+# simplescript.py
+
+# Headless command line: runs, checks and benchmarks scripts without the GUI.
+# Only the lexer, parser, interpreter and compile cache are imported here (never tkinter),
+# because workers start a fresh process per job and pay for every import.
+
+import sys
+import time
+from compile_cache import CompileCache
+from interpreter import Interpreter
+
+USAGE = """Usage: python -m simplescript <command> [options] file.ss ...
+
+Commands:
+  run [--mode MODE] [--no-cache] file.ss      Run a script, streaming its output to stdout
+  check file.ss ...                           Report syntax errors and lint diagnostics
+  bench [--mode MODE] [--repeat N] file.ss    Time parsing and running a script (all modes by default)
+
+Modes: """ + ', '.join(Interpreter.MODES) + """
+Exit status: 0 on success, 1 if the script has syntax, lint or runtime errors, 2 on usage or file errors."""
+
+class UsageError(Exception):
+    pass
+
+def parse_options(args, defaults):
+    """Split args into (options, files); defaults maps each accepted '--flag' to its default
+    (booleans are switches, anything else takes a value)."""
+    options = {flag[2:].replace('-', '_'): value for flag, value in defaults.items()}
+    files = []
+    args = iter(args)
+    for arg in args:
+        if arg in defaults:
+            name = arg[2:].replace('-', '_')
+            if isinstance(defaults[arg], bool):
+                options[name] = True
+                continue
+            value = next(args, None)
+            if value is None:
+                raise UsageError(f'{arg} expects a value')
+            options[name] = type(defaults[arg])(value) if defaults[arg] is not None else value
+        elif arg.startswith('--'):
+            raise UsageError(f'Unknown option {arg}')
+        else:
+            files.append(arg)
+    if not files:
+        raise UsageError('No file given')
+    mode = options.get('mode')
+    if mode is not None and mode not in Interpreter.MODES:
+        raise UsageError(f"Unknown execution mode '{mode}'")
+    return options, files
+
+def read_source(path):
+    with open(path, 'r', encoding='utf-8') as file:
+        return file.read()
+
+def parse_source(code, recover=False):
+    """Return the Program for code; with recover=True return (Program, syntax errors) instead of raising."""
+    from lexer import Lexer
+    from parser import Parser
+    parser = Parser(Lexer(code).tokenize_stream(), recover)
+    program = parser.parse()
+    return (program, parser.errors) if recover else program
+
+# ===========================
+# Commands
+# ===========================
+
+def run(args):
+    options, files = parse_options(args, {'--mode': 'tree', '--no-cache': False})
+    if len(files) != 1:
+        raise UsageError('run takes a single file')
+    code = read_source(files[0])
+    try:
+        program = parse_source(code) if options['no_cache'] else CompileCache().get_program(code)
+    except SyntaxError as e:
+        print(f'{files[0]}: {e}', file=sys.stderr)
+        return 1
+    interpreter = Interpreter(program, mode=options['mode'])
+    interpreter.run()
+    sys.stdout.flush()
+    return 1 if interpreter.error is not None else 0
+
+def check(args):
+    from linter import check_program
+    _, files = parse_options(args, {})
+    status = 0
+    for path in files:
+        try:
+            program, errors = parse_source(read_source(path), recover=True)
+            messages = [('error', str(e)) for e in errors] + [(d['severity'], d['message']) for d in check_program(program)]
+        except SyntaxError as e:
+            messages = [('error', str(e))]  # From the lexer, which stops at its first error
+        for severity, message in messages:
+            print(f'{path}: {severity}: {message}')
+            if severity == 'error':
+                status = 1
+    return status
+
+def bench(args):
+    options, files = parse_options(args, {'--mode': None, '--repeat': 5})
+    if len(files) != 1:
+        raise UsageError('bench takes a single file')
+    code = read_source(files[0])
+    repeat = max(1, options['repeat'])
+
+    def parse_time():
+        start = time.perf_counter()
+        parse_source(code)
+        return time.perf_counter() - start
+
+    try:
+        print(f'parse: {min(parse_time() for _ in range(repeat)) * 1000:.2f}ms')
+    except SyntaxError as e:
+        print(f'{files[0]}: {e}', file=sys.stderr)
+        return 1
+    for mode in ([options['mode']] if options['mode'] else Interpreter.MODES):
+        interpreters = []
+
+        def run_time():
+            # Each run gets a fresh AST: the slots mode annotates the one it runs
+            interpreter = Interpreter(parse_source(code), output_callback=lambda message: None, mode=mode)
+            start = time.perf_counter()
+            interpreter.run()
+            interpreters.append(interpreter)
+            return time.perf_counter() - start
+
+        best = min(run_time() for _ in range(repeat))
+        last = interpreters[-1]
+        note = f' ({last.error})' if last.error is not None else ''
+        if mode == 'adaptive':
+            note += f" ({last.quickening['specialized']} specialized, {last.quickening['deoptimized']} deoptimized)"
+        print(f'{mode}: {best * 1000:.2f}ms{note}')
+    return 0
+
+COMMANDS = {'run': run, 'check': check, 'bench': bench}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] not in COMMANDS:
+        print(USAGE, file=sys.stderr)
+        return 2
+    try:
+        return COMMANDS[argv[0]](argv[1:])
+    except UsageError as e:
+        print(f'{e}\n\n{USAGE}', file=sys.stderr)
+        return 2
+    except (OSError, UnicodeDecodeError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+if __name__ == '__main__':
+    sys.exit(main())
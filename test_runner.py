@@ -1,14 +1,14 @@
 # test_runner.py
 
 from interpreter import Interpreter
-from lexer import Lexer
-from parser import Parser
+from compile_cache import CompileCache
 import json
 
 class TestRunner:
-    def __init__(self, code, output_callback):
+    def __init__(self, code, output_callback, compile_cache=None):
         self.code = code
         self.output_callback = output_callback
+        self.compile_cache = compile_cache or CompileCache()
 
     def output(self, message):
         """Handle output by using the provided callback."""
@@ -18,11 +18,9 @@ class TestRunner:
     def run_tests(self, tests):
         results = []
         for test in tests:
-            lexer = Lexer(self.code)
             try:
-                tokens = lexer.tokenize()
-                parser = Parser(tokens)
-                ast = parser.parse()
+                # Each test gets a fresh Program; after the first it comes from the cache
+                ast = self.compile_cache.get_program(self.code)
                 interpreter = Interpreter(ast, output_callback=self.output_callback, profiler=None, debugger=None)
                 
                 # Create a dummy print function to capture output
@@ -37,10 +35,7 @@ class TestRunner:
                 expression = test["expression"]
                 
                 # Tokenize and parse the expression
-                lexer_test = Lexer(expression)
-                tokens_test = lexer_test.tokenize()
-                parser_test = Parser(tokens_test)
-                ast_test = parser_test.parse()
+                ast_test = self.compile_cache.get_program(expression)
                 
                 # Execute the expression
                 for stmt in ast_test.statements:
@@ -0,0 +1,397 @@
+# transpiler.py
+
+import time
+import traceback
+from ast_nodes import *
+from interpreter import Environment, ReturnException, binary_add, binary_div, binary_and, binary_or, binary_not, lookup_binary_operator
+from type_inference import ARRAY_INDEX_TYPES, typed_operator
+
+FILENAME = '<simplescript>'
+
+# Deeper subexpressions are handed to the tree-walker; CPython's parser rejects very deep nesting
+MAX_EXPRESSION_DEPTH = 40
+
+# Operators that map directly onto a Python operator with identical semantics
+INLINE_OPERATORS = {'-': '-', '*': '*', '==': '==', '!=': '!=', '>': '>', '<': '<', '>=': '>=', '<=': '<='}
+
+# Operators that need a runtime helper (string concatenation, zero checks, eager logic)
+HELPER_OPERATORS = {'+': '_add', '/': '_div', 'AND': '_and', 'OR': '_or', 'NOT': '_not'}
+
+# ===========================
+# Runtime Helpers
+# ===========================
+# Generated code calls these for anything that is not a plain Python operation.
+
+def lookup(env, name):
+    while env is not None:
+        if name in env.vars:
+            return env.vars[name]
+        env = env.parent
+    raise NameError(f"Variable '{name}' is not defined.")
+
+def assign(env, name, value):
+    while env is not None:
+        if name in env.vars:
+            env.vars[name] = value
+            return
+        env = env.parent
+    raise NameError(f"Variable '{name}' is not defined.")
+
+def check_arity(name, expected, args):
+    if len(args) != expected:
+        raise TypeError(f"Function '{name}' expects {expected} arguments, got {len(args)}.")
+
+def index_array(array, index, array_node):
+    if not isinstance(array, list):
+        raise TypeError(f"Variable '{array_node.name}' is not an array.")
+    if not isinstance(index, int):
+        raise TypeError("Array index must be an integer.")
+    if index < 0 or index >= len(array):
+        raise IndexError("Array index out of bounds.")
+    return array[index]
+
+def store_index(env, array_name, array, index, value):
+    if not isinstance(array, list):
+        raise TypeError(f"Variable '{array_name}' is not an array.")
+    if not isinstance(index, int):
+        raise TypeError("Array index must be an integer.")
+    if index < 0 or index >= len(array):
+        raise IndexError("Array index out of bounds.")
+    array[index] = value
+    env.set(array_name, array)
+
+def index_list(array, index):
+    # Type inference proved array is a list and index an integer
+    if index < 0 or index >= len(array):
+        raise IndexError("Array index out of bounds.")
+    return array[index]
+
+def store_list_index(env, array_name, array, index, value):
+    if index < 0 or index >= len(array):
+        raise IndexError("Array index out of bounds.")
+    array[index] = value
+    env.set(array_name, array)
+
+def check_callable(func, call_node):
+    if not callable(func):
+        raise TypeError(f"'{call_node.name.name}' is not callable.")
+    return func
+
+def call(func, call_node, *args):
+    try:
+        return func(*args)
+    except Exception as e:
+        raise RuntimeError(f"Error calling function '{call_node.name.name}': {e}")
+
+class TranspiledProgram:
+    """Python source generated from a Program, plus what is needed to run it."""
+    def __init__(self, source, nodes, line_map):
+        self.source = source
+        self.nodes = nodes        # AST nodes referenced from the generated code as _nodes[i]
+        self.line_map = line_map  # Generated line number -> SimpleScript line number
+        self.code = compile(source, FILENAME, 'exec')
+
+    def run(self, interpreter):
+        debugger = interpreter.debugger
+        profiler = interpreter.profiler
+
+        def debug_call(func, call_node, *args):
+            try:
+                debugger.before_function_call(func, list(args))
+                return func(*args)
+            except Exception as e:
+                raise RuntimeError(f"Error calling function '{call_node.name.name}': {e}")
+
+        def profiled_binary(op, left, right):
+            op_func = lookup_binary_operator(op)
+            start_time = time.time()
+            result = op_func(left, right)
+            end_time = time.time()
+            profiler.profile(op, end_time - start_time)
+            return result
+
+        namespace = {
+            '_interp': interpreter,
+            '_nodes': self.nodes,
+            '_Environment': Environment,
+            '_ReturnException': ReturnException,
+            '_get': lookup,
+            '_set': assign,
+            '_check_arity': check_arity,
+            '_index': index_array,
+            '_store_index': store_index,
+            '_index_list': index_list,
+            '_store_list_index': store_list_index,
+            '_callable': check_callable,
+            '_call': debug_call if debugger else call,
+            '_binary': profiled_binary,
+            '_output': interpreter.output,
+            '_add': binary_add,
+            '_div': binary_div,
+            '_and': binary_and,
+            '_or': binary_or,
+            '_not': binary_not,
+            '_eval': interpreter.evaluate,
+            '_exec': lambda node: interpreter.exec_handlers[type(node)](node),
+            '_check_breakpoint': debugger.check_breakpoint if debugger else None,
+        }
+        exec(self.code, namespace)
+        previous_env = interpreter.current_env
+        try:
+            namespace['_main']()
+        except ReturnException:
+            raise
+        except Exception as e:
+            e.simplescript_line = self.source_line(e)
+            raise
+        finally:
+            interpreter.current_env = previous_env
+
+    def source_line(self, exception):
+        """Return the SimpleScript line where an exception raised by the generated code originated."""
+        # Errors from nested calls are re-raised wrapped; the innermost one knows where it started
+        innermost = exception
+        while innermost.__context__ is not None:
+            innermost = innermost.__context__
+        for candidate in (innermost, exception):
+            for frame in reversed(traceback.extract_tb(candidate.__traceback__)):
+                if frame.filename == FILENAME:
+                    return self.line_map.get(frame.lineno)
+        return None
+
+class Transpiler:
+    """Translates a Program AST into Python source that runs against an Interpreter.
+
+    Scoping stays dynamic (functions see their caller's variables), so the
+    generated code keeps the Environment chain; the innermost scope's dict is
+    held in the local _vars so the common case is a single dict lookup.
+    """
+    def __init__(self, profile=False, debug=False):
+        self.profile = profile
+        self.debug = debug
+        self.lines = []
+        self.line_map = {}
+        self.nodes = []
+        self.indent = 0
+        self.current_line = None
+        self.function_depth = 0
+        self.expression_depth = 0
+        self.statement_transpilers = {
+            VarDeclaration: self.transpile_var_declaration,
+            Assignment: self.transpile_assignment,
+            ArrayAssignment: self.transpile_array_assignment,
+            PrintStatement: self.transpile_print,
+            IfStatement: self.transpile_if,
+            WhileStatement: self.transpile_while,
+            ForStatement: self.transpile_for,
+            FunctionDeclaration: self.transpile_function_declaration,
+            FunctionCall: self.transpile_expression_statement,
+            ArrayAccess: self.transpile_expression_statement,
+            PointerDereference: self.transpile_expression_statement,
+            ReturnStatement: self.transpile_return,
+        }
+        self.expression_transpilers = {
+            Number: self.transpile_literal,
+            String: self.transpile_literal,
+            Boolean: self.transpile_literal,
+            Variable: self.transpile_variable,
+            Array: self.transpile_array,
+            ArrayLiteral: self.transpile_array,
+            ArrayAccess: self.transpile_array_access,
+            BinaryOp: self.transpile_binary_op,
+            UnaryOp: self.transpile_unary_op,
+            FunctionCall: self.transpile_function_call,
+        }
+
+    def transpile(self, program):
+        self.emit('def _main():')
+        self.indent += 1
+        self.emit('_env = _interp.current_env')
+        self.emit('_vars = _env.vars')
+        self.transpile_block(program.statements)
+        self.indent -= 1
+        return TranspiledProgram('\n'.join(self.lines) + '\n', self.nodes, self.line_map)
+
+    # ===========================
+    # Emission Helpers
+    # ===========================
+
+    def emit(self, line):
+        self.lines.append('    ' * self.indent + line)
+        if self.current_line is not None:
+            self.line_map[len(self.lines)] = self.current_line
+
+    def node_ref(self, node):
+        self.nodes.append(node)
+        return f'_nodes[{len(self.nodes) - 1}]'
+
+    def enter_scope(self):
+        self.emit('_env = _Environment(_env)')
+        self.emit('_vars = _env.vars')
+        self.emit('_interp.current_env = _env')
+
+    def leave_scope(self):
+        self.emit('_env = _env.parent')
+        self.emit('_vars = _env.vars')
+        self.emit('_interp.current_env = _env')
+
+    # ===========================
+    # Statements
+    # ===========================
+
+    def transpile_block(self, statements):
+        if not statements:
+            self.emit('pass')
+        for stmt in statements:
+            self.transpile_statement(stmt)
+
+    def transpile_statement(self, node):
+        if node.line is not None:
+            self.current_line = node.line
+        if self.debug:
+            self.emit(f'_check_breakpoint({self.node_ref(node)})')
+        transpiler = self.statement_transpilers.get(type(node))
+        if transpiler is None:
+            # Imports, pointer declarations and unknown nodes run through the tree-walker
+            self.emit(f'_exec({self.node_ref(node)})')
+        else:
+            transpiler(node)
+
+    def transpile_var_declaration(self, node):
+        self.emit(f'_env.define({node.name!r}, {self.expression(node.expr)})')
+
+    def transpile_assignment(self, node):
+        name = repr(node.name)
+        self.emit(f'_value = {self.expression(node.expr)}')
+        self.emit(f'if {name} in _vars:')
+        self.emit(f'    _vars[{name}] = _value')
+        self.emit('else:')
+        self.emit(f'    _set(_env.parent, {name}, _value)')
+
+    def transpile_array_assignment(self, node):
+        name = repr(node.array_name)
+        store = '_store_list_index' if node.operand_types == ARRAY_INDEX_TYPES else '_store_index'
+        self.emit(f'{store}(_env, {name}, _get(_env, {name}), '
+                  f'{self.expression(node.index_expr)}, {self.expression(node.expr)})')
+
+    def transpile_print(self, node):
+        self.emit(f'_output({self.expression(node.expr)})')
+
+    def transpile_if(self, node):
+        self.emit(f'if {self.expression(node.condition)}:')
+        self.indent += 1
+        self.transpile_block(node.then_branch)
+        self.indent -= 1
+        if node.else_branch:
+            self.emit('else:')
+            self.indent += 1
+            self.transpile_block(node.else_branch)
+            self.indent -= 1
+
+    def transpile_while(self, node):
+        self.emit(f'while {self.expression(node.condition)}:')
+        self.indent += 1
+        self.transpile_block(node.body)
+        self.indent -= 1
+
+    def transpile_for(self, node):
+        self.enter_scope()
+        self.emit('try:')
+        self.indent += 1
+        self.transpile_statement(node.init)
+        self.emit(f'while {self.expression(node.condition)}:')
+        self.indent += 1
+        self.transpile_block(node.body)
+        self.transpile_statement(node.increment)
+        self.indent -= 2
+        self.emit('finally:')
+        self.indent += 1
+        self.leave_scope()
+        self.indent -= 1
+
+    def transpile_function_declaration(self, node):
+        function_name = f'ss_{node.name}'
+        self.emit(f'def {function_name}(*args):')
+        self.indent += 1
+        self.emit(f'_check_arity({node.name!r}, {len(node.params)}, args)')
+        self.emit('_previous_env = _interp.current_env')
+        self.emit('_env = _Environment(_previous_env)')
+        self.emit('_vars = _env.vars')
+        for position, param in enumerate(node.params):
+            self.emit(f'_env.define({param!r}, args[{position}])')
+        self.emit('_interp.current_env = _env')
+        self.emit('try:')
+        self.indent += 1
+        self.function_depth += 1
+        self.transpile_block(node.body)
+        self.function_depth -= 1
+        self.indent -= 1
+        self.emit('finally:')
+        self.emit('    _interp.current_env = _previous_env')
+        self.indent -= 1
+        self.emit(f'_env.define({node.name!r}, {function_name})')
+
+    def transpile_expression_statement(self, node):
+        self.emit(self.expression(node))
+
+    def transpile_return(self, node):
+        if self.function_depth:
+            self.emit(f'return {self.expression(node.expr)}')
+        else:
+            self.emit(f'raise _ReturnException({self.expression(node.expr)})')
+
+    # ===========================
+    # Expressions
+    # ===========================
+
+    def expression(self, node):
+        transpiler = self.expression_transpilers.get(type(node))
+        if transpiler is None or self.expression_depth >= MAX_EXPRESSION_DEPTH:
+            # Attribute access, pointer dereference, unknown nodes and overly deep
+            # subexpressions are evaluated by the tree-walker
+            return f'_eval({self.node_ref(node)})'
+        self.expression_depth += 1
+        try:
+            return transpiler(node)
+        finally:
+            self.expression_depth -= 1
+
+    def transpile_literal(self, node):
+        return repr(node.value)
+
+    def transpile_variable(self, node):
+        name = repr(node.name)
+        return f'(_vars[{name}] if {name} in _vars else _get(_env.parent, {name}))'
+
+    def transpile_array(self, node):
+        return '[' + ', '.join(self.expression(elem) for elem in node.elements) + ']'
+
+    def transpile_array_access(self, node):
+        if node.operand_types == ARRAY_INDEX_TYPES:
+            return f'_index_list({self.expression(node.array)}, {self.expression(node.index)})'
+        return f'_index({self.expression(node.array)}, {self.expression(node.index)}, {self.node_ref(node.array)})'
+
+    def transpile_binary_op(self, node):
+        op = node.op if node.op in INLINE_OPERATORS or node.op in HELPER_OPERATORS else node.op.upper()
+        if op not in INLINE_OPERATORS and op not in HELPER_OPERATORS:
+            # The tree-walker raises the same "Unknown operator" error at run time
+            return f'_eval({self.node_ref(node)})'
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        if self.profile:
+            return f'_binary({node.op!r}, {left}, {right})'
+        if op in INLINE_OPERATORS:
+            return f'({left} {INLINE_OPERATORS[op]} {right})'
+        if typed_operator(node) is not None:
+            return f'({left} {op} {right})'  # Numbers or strings on both sides: no conversion needed
+        return f'{HELPER_OPERATORS[op]}({left}, {right})'
+
+    def transpile_unary_op(self, node):
+        if node.op.upper() != 'NOT':
+            return f'_eval({self.node_ref(node)})'
+        return f'(not {self.expression(node.operand)})'
+
+    def transpile_function_call(self, node):
+        call_node = self.node_ref(node)
+        args = ''.join(f', {self.expression(arg)}' for arg in node.args)
+        return f'_call(_callable({self.expression(node.name)}, {call_node}), {call_node}{args})'
@@ -0,0 +1,299 @@
+# type_inference.py
+
+import operator
+from ast_nodes import *
+
+# Types are named after SimpleScript's declared types; None means the type is not known
+NUMERIC_TYPES = ('integer', 'float')
+COMPARISON_OPERATORS = ('==', '!=', '>', '<', '>=', '<=')
+
+# Builtins that never call back into the program, so calling them cannot reassign a variable
+PURE_BUILTINS = {'print': None, 'length': 'integer', 'push': 'array', 'pop': None}  # name -> result type
+
+# Operand types of an array access (or array element assignment) that need no type checks
+ARRAY_INDEX_TYPES = ('array', 'integer')
+
+# ===========================
+# Specialized Operators
+# ===========================
+# C-level functions with exactly the semantics of the interpreter's operators for the given
+# operand types: '+' on two numbers or two strings needs no string conversion, and '-', '*'
+# and the comparisons on numbers need no Python-level wrapper. Anything else keeps the
+# generic operator.
+
+NUMERIC_PAIRS = [(left, right) for left in NUMERIC_TYPES for right in NUMERIC_TYPES]
+
+TYPED_OPERATORS = {
+    '+': dict.fromkeys(NUMERIC_PAIRS + [('string', 'string')], operator.add),
+    '-': dict.fromkeys(NUMERIC_PAIRS, operator.sub),
+    '*': dict.fromkeys(NUMERIC_PAIRS, operator.mul),
+}
+for _op, _func in zip(COMPARISON_OPERATORS, (operator.eq, operator.ne, operator.gt, operator.lt, operator.ge, operator.le)):
+    TYPED_OPERATORS[_op] = dict.fromkeys(NUMERIC_PAIRS + [('string', 'string')], _func)
+
+NO_SPECIALIZATIONS = {}
+
+def typed_operator(node):
+    """The specialized function for a BinaryOp whose operand types were proven, or None."""
+    return TYPED_OPERATORS.get(node.op, NO_SPECIALIZATIONS).get(node.operand_types)
+
+# ===========================
+# Typed Nodes
+# ===========================
+# The tree-walking modes switch each node whose types were proven to one of these classes, so
+# only those nodes pay for (and profit from) the typed handlers. Like the node states in
+# quickening.py they add no fields, and Interpreter.run puts the nodes back when it finishes.
+
+class TypedBinaryOp(BinaryOp):
+    """op_func holds the specialized operator function."""
+    __slots__ = ()
+
+class TypedArrayAccess(ArrayAccess):
+    """Proven to index an array with an integer; only the bounds are checked."""
+    __slots__ = ()
+
+class TypedArrayAssignment(ArrayAssignment):
+    """Proven to assign into an array at an integer index; only the bounds are checked."""
+    __slots__ = ()
+
+def binary_result_type(op, left, right):
+    if op in COMPARISON_OPERATORS:
+        return 'boolean'
+    if op in ('AND', 'OR'):
+        return left if left == right else None  # The result is one of the operands
+    if op == '+' and (left == 'string' or right == 'string'):
+        return 'string'
+    if op == '*' and {left, right} == {'string', 'integer'}:
+        return 'string'
+    if left in NUMERIC_TYPES and right in NUMERIC_TYPES:
+        if op == '/':
+            return 'float'
+        if op in ('+', '-', '*'):
+            return 'integer' if left == right == 'integer' else 'float'
+    return None
+
+# ===========================
+# Flow State
+# ===========================
+
+class TypeState:
+    """Types of the variables visible at one point of the program.
+
+    Layers mirror the chain of Environments at run time (one per for loop,
+    innermost last); a layer maps each name it defines to its type. Names
+    missing from every layer, like a function's free variables, which are
+    resolved through the caller at run time, have no known type.
+    """
+    def __init__(self, layers):
+        self.layers = layers
+
+    def copy(self):
+        return TypeState([dict(layer) for layer in self.layers])
+
+    def lookup(self, name):
+        for layer in reversed(self.layers):
+            if name in layer:
+                return layer[name]
+        return None
+
+    def declare(self, name, value_type):
+        self.layers[-1][name] = value_type
+
+    def assign(self, name, value_type):
+        for layer in reversed(self.layers):
+            if name in layer:
+                layer[name] = value_type
+                return
+
+    def forget(self, name):
+        for layer in self.layers:
+            if name in layer:
+                layer[name] = None
+
+    def join(self, other):
+        """The state after control flow from self and other merges."""
+        state = TypeState([])
+        uncertain = []
+        for mine, theirs in zip(self.layers, other.layers):
+            layer = {}
+            for name in mine.keys() | theirs.keys():
+                if name in mine and name in theirs and mine[name] == theirs[name]:
+                    layer[name] = mine[name]
+                else:
+                    layer[name] = None
+                    if name not in mine or name not in theirs:
+                        uncertain.append(name)
+            state.layers.append(layer)
+        for name in uncertain:
+            # Defined on one path only: the name may refer to this variable or to one further out
+            state.forget(name)
+        return state
+
+    def __eq__(self, other):
+        return self.layers == other.layers
+
+# ===========================
+# Inference
+# ===========================
+
+class TypeInference:
+    """Flow-sensitive inference of the types of a Program's values.
+
+    Each BinaryOp, ArrayAccess and ArrayAssignment gets operand_types: the
+    types its operands are guaranteed to have whenever it runs (None where
+    a type is not guaranteed); a BinaryOp also gets op_func, the specialized
+    operator those types allow (None if there is none). Types come from literals and operators and
+    follow each variable through declarations, assignments, branches (where
+    they have to agree) and loops (iterated to a fixed point). Declared var
+    types are not enforced at run time, so they cannot prove anything on
+    their own. Functions use their caller's variables, so a call to anything
+    but a builtin forgets the type of every name some function body assigns
+    to, and function bodies start knowing nothing.
+    """
+    def __init__(self):
+        self.annotations = {}  # node -> operand types, applied once the whole program is analysed
+
+    def infer(self, program):
+        """Annotate program; returns False (annotating nothing) if it is nested too deeply to analyse."""
+        self.shadowed = set()  # Names the program declares, which could hide a builtin
+        self.reassigned = set()  # Names assigned in some function body, which a call may change
+        for node in walk(program.statements):
+            if isinstance(node, (VarDeclaration, PointerDeclaration)):
+                self.shadowed.add(node.name)
+            elif isinstance(node, FunctionDeclaration):
+                self.shadowed.add(node.name)
+                self.shadowed.update(node.params)
+                self.reassigned.update(stmt.name for stmt in walk(node.body) if isinstance(stmt, Assignment))
+            elif isinstance(node, ImportStatement):
+                self.shadowed.add(node.module_name)
+        try:
+            self.block(program.statements, TypeState([{}]))
+        except RecursionError:
+            return False
+        for node, operand_types in self.annotations.items():
+            node.operand_types = operand_types
+            if isinstance(node, BinaryOp):
+                node.op_func = typed_operator(node)
+        return True
+
+    # ===========================
+    # Statements
+    # ===========================
+
+    def block(self, statements, state):
+        for stmt in statements:
+            self.statement(stmt, state)
+
+    def statement(self, node, state):
+        if isinstance(node, VarDeclaration):
+            state.declare(node.name, self.expression(node.expr, state))
+        elif isinstance(node, Assignment):
+            state.assign(node.name, self.expression(node.expr, state))
+        elif isinstance(node, ArrayAssignment):
+            # The array is looked up before the index and value are evaluated
+            array_type = state.lookup(node.array_name)
+            self.annotations[node] = (array_type, self.expression(node.index_expr, state))
+            self.expression(node.expr, state)
+        elif isinstance(node, PointerDeclaration):
+            state.declare(node.name, None)
+        elif isinstance(node, ImportStatement):
+            state.declare(node.module_name, None)
+        elif isinstance(node, FunctionDeclaration):
+            state.declare(node.name, None)
+            self.block(node.body, TypeState([dict.fromkeys(node.params)]))
+        elif isinstance(node, IfStatement):
+            self.expression(node.condition, state)
+            then_state = state.copy()
+            self.block(node.then_branch, then_state)
+            self.block(node.else_branch or [], state)
+            state.layers = state.join(then_state).layers
+        elif isinstance(node, WhileStatement):
+            state.layers = self.loop(node.condition, node.body, None, state).layers
+        elif isinstance(node, ForStatement):
+            state.layers.append({})
+            self.statement(node.init, state)
+            state.layers = self.loop(node.condition, node.body, node.increment, state).layers[:-1]
+        elif isinstance(node, (PrintStatement, ReturnStatement)):
+            self.expression(node.expr, state)
+        elif not isinstance(node, ErrorStatement):
+            self.expression(node, state)
+
+    def loop(self, condition, body, increment, state):
+        """Analyse a loop until the types at its head stop changing; returns the state after it."""
+        head = state.copy()
+        while True:
+            current = head.copy()
+            self.expression(condition, current)
+            exit_state = current.copy()
+            self.block(body, current)
+            if increment is not None:
+                self.statement(increment, current)
+            joined = head.join(current)
+            if joined == head:
+                # The last pass analysed (and annotated) the loop with the types that hold on every iteration
+                return exit_state
+            head = joined
+
+    # ===========================
+    # Expressions
+    # ===========================
+
+    def expression(self, node, state):
+        """Infer node's type in state, following evaluation order; calls may forget types in state."""
+        if isinstance(node, Number):
+            return 'integer' if type(node.value) is int else 'float'
+        elif isinstance(node, String):
+            return 'string'
+        elif isinstance(node, Boolean):
+            return 'boolean'
+        elif isinstance(node, Variable):
+            return state.lookup(node.name)
+        elif isinstance(node, BinaryOp):
+            left = self.expression(node.left, state)
+            right = self.expression(node.right, state)
+            self.annotations[node] = (left, right)
+            op = node.op if node.op in TYPED_OPERATORS else node.op.upper()
+            return binary_result_type(op, left, right)
+        elif isinstance(node, UnaryOp):
+            self.expression(node.operand, state)
+            return 'boolean' if node.op.upper() == 'NOT' else None
+        elif isinstance(node, (Array, ArrayLiteral)):
+            for elem in node.elements:
+                self.expression(elem, state)
+            return 'array'
+        elif isinstance(node, ArrayAccess):
+            self.annotations[node] = (self.expression(node.array, state), self.expression(node.index, state))
+            return None
+        elif isinstance(node, FunctionCall):
+            return self.function_call(node, state)
+        elif isinstance(node, AttributeAccess):
+            self.expression(node.obj, state)
+        elif isinstance(node, PointerDereference):
+            self.expression(node.var, state)
+        return None
+
+    def function_call(self, node, state):
+        name = node.name
+        self.expression(name, state)
+        for arg in node.args:
+            self.expression(arg, state)
+        if isinstance(name, Variable) and name.name in PURE_BUILTINS and name.name not in self.shadowed:
+            return PURE_BUILTINS[name.name]
+        # Only an assignment in a function body can change a variable the caller sees
+        # (declarations go to the callee's own Environment)
+        for assigned in self.reassigned:
+            state.forget(assigned)
+        return None
+
+def walk(statements):
+    """Every statement in statements, including those nested in blocks and function bodies."""
+    stack = list(reversed(statements))
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, IfStatement):
+            stack.extend(reversed(node.then_branch + (node.else_branch or [])))
+        elif isinstance(node, (WhileStatement, FunctionDeclaration)):
+            stack.extend(reversed(node.body))
+        elif isinstance(node, ForStatement):
+            stack.extend(reversed([node.init, node.increment] + node.body))
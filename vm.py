@@ -0,0 +1,296 @@
+# vm.py
+
+import operator
+import time
+from compiler import *
+from interpreter import Environment, ReturnException, UserFunction, FAST_OPERATORS
+
+# Operator functions indexed by the BINARY_OP operand
+OPERATOR_FUNCTIONS = [FAST_OPERATORS[op] for op in OPERATOR_NAMES[:TYPED_ADD]] + [operator.add]
+
+OPCODES = (LOAD_CONST, LOAD_NAME, STORE_NAME, DEFINE_NAME, BINARY_OP, UNARY_NOT, JUMP, JUMP_IF_FALSE,
+           LOAD_INDEX, STORE_INDEX, BUILD_LIST, CHECK_CALLABLE, CALL, RETURN, MAKE_FUNCTION, PRINT,
+           POP, PUSH_SCOPE, POP_SCOPE, EVAL_NODE, EXEC_NODE, BREAKPOINT, HALT, BINARY_OP_CONST, TAIL_CALL,
+           LOAD_LIST_INDEX, STORE_LIST_INDEX)
+
+class TailScope(Environment):
+    """Variables of the frames discarded by tail calls.
+
+    SimpleScript functions see their caller's variables, so a tail call cannot
+    simply drop the calling frame. Its variables move into a single TailScope
+    between the callee and the rest of the chain instead; further tail calls
+    merge into the same TailScope, so a tail-recursive loop runs in constant space.
+    """
+    def __init__(self, env, parent):
+        super().__init__(parent=parent)
+        self.vars = env.vars
+
+class VMFunction(UserFunction):
+    """A user function backed by a CodeObject.
+
+    Calls made from bytecode push a frame onto the VM's own frame stack;
+    calling the object from Python (e.g. from an imported module) re-enters
+    the VM with a fresh run loop.
+    """
+    def __init__(self, declaration, code_object, vm):
+        super().__init__(declaration, vm.interpreter)
+        self.code_object = code_object
+        self.vm = vm
+
+    def __call__(self, *args):
+        if len(args) != len(self.declaration.params):
+            raise TypeError(f"Function '{self.declaration.name}' expects {len(self.declaration.params)} arguments, got {len(args)}.")
+        env = Environment(parent=self.interpreter.current_env)
+        for param, arg in zip(self.declaration.params, args):
+            env.define(param, arg)
+        previous_env = self.interpreter.current_env
+        try:
+            return self.vm.run(self.code_object, env)
+        finally:
+            self.interpreter.current_env = previous_env
+
+class VM:
+    """Stack-based virtual machine for code produced by compiler.Compiler.
+
+    The VM shares its global Environment, output, profiler and debugger with
+    the Interpreter it is created for, and falls back to the Interpreter's
+    tree-walking handlers for EXEC_NODE/EVAL_NODE instructions.
+    """
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+
+    def run_program(self, program):
+        code_object = Compiler(debug=bool(self.interpreter.debugger)).compile(program)
+        previous_env = self.interpreter.current_env
+        try:
+            return self.run(code_object, previous_env)
+        finally:
+            self.interpreter.current_env = previous_env
+
+    def run(self, code_object, env):
+        interpreter = self.interpreter
+        profiler = interpreter.profiler
+        debugger = interpreter.debugger
+        output = interpreter.output
+        operator_functions = OPERATOR_FUNCTIONS
+        # Opcodes as locals: comparing against a local is much cheaper than a global lookup
+        (load_const, load_name, store_name, define_name, binary_op, unary_not, jump, jump_if_false,
+         load_index, store_index, build_list, check_callable, call, return_, make_function, print_,
+         pop_, push_scope, pop_scope, eval_node, exec_node, breakpoint_, halt, binary_op_const, tail_call,
+         load_list_index, store_list_index) = OPCODES
+
+        code = code_object.code
+        constants = code_object.constants
+        names = code_object.names
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        # Saved caller state: (code object, return offset, environment, call node)
+        frames = []
+        ip = 0
+
+        try:
+            while True:
+                op = code[ip]
+                arg = code[ip + 1]
+                ip += 2
+
+                if op == load_name:
+                    name = names[arg]
+                    scope = env
+                    while scope is not None:
+                        scope_vars = scope.vars
+                        if name in scope_vars:
+                            push(scope_vars[name])
+                            break
+                        scope = scope.parent
+                    else:
+                        raise NameError(f"Variable '{name}' is not defined.")
+                elif op == load_const:
+                    push(constants[arg])
+                elif op == binary_op:
+                    right = pop()
+                    left = pop()
+                    if profiler:
+                        start_time = time.time()
+                        result = operator_functions[arg](left, right)
+                        end_time = time.time()
+                        profiler.profile(OPERATOR_NAMES[arg], end_time - start_time)
+                        push(result)
+                    else:
+                        push(operator_functions[arg](left, right))
+                elif op == binary_op_const:
+                    left = pop()
+                    right = constants[arg >> 4]
+                    if profiler:
+                        start_time = time.time()
+                        result = operator_functions[arg & 15](left, right)
+                        end_time = time.time()
+                        profiler.profile(OPERATOR_NAMES[arg & 15], end_time - start_time)
+                        push(result)
+                    else:
+                        push(operator_functions[arg & 15](left, right))
+                elif op == jump_if_false:
+                    if not pop():
+                        ip = arg
+                elif op == jump:
+                    ip = arg
+                elif op == store_name:
+                    name = names[arg]
+                    value = pop()
+                    scope = env
+                    while scope is not None:
+                        scope_vars = scope.vars
+                        if name in scope_vars:
+                            scope_vars[name] = value
+                            break
+                        scope = scope.parent
+                    else:
+                        raise NameError(f"Variable '{name}' is not defined.")
+                elif op == load_index:
+                    index = pop()
+                    array = pop()
+                    if not isinstance(array, list):
+                        raise TypeError(f"Variable '{constants[arg].name}' is not an array.")
+                    if not isinstance(index, int):
+                        raise TypeError("Array index must be an integer.")
+                    if index < 0 or index >= len(array):
+                        raise IndexError("Array index out of bounds.")
+                    push(array[index])
+                elif op == load_list_index:
+                    index = pop()
+                    array = pop()
+                    if index < 0 or index >= len(array):
+                        raise IndexError("Array index out of bounds.")
+                    push(array[index])
+                elif op == check_callable:
+                    if not callable(stack[-1]):
+                        raise TypeError(f"'{constants[arg].name.name}' is not callable.")
+                elif op == call or op == tail_call:
+                    argc, call_node = constants[arg]
+                    if argc:
+                        args = stack[-argc:]
+                        del stack[-argc:]
+                    else:
+                        args = []
+                    func = pop()
+                    if type(func) is VMFunction and func.vm is self:
+                        declaration = func.declaration
+                        if debugger:
+                            try:
+                                debugger.before_function_call(func, args)
+                            except Exception as e:
+                                raise RuntimeError(f"Error calling function '{call_node.name.name}': {e}")
+                        if argc != len(declaration.params):
+                            raise RuntimeError(f"Error calling function '{call_node.name.name}': "
+                                               f"Function '{declaration.name}' expects {len(declaration.params)} arguments, got {argc}.")
+                        if op == call:
+                            frames.append((code_object, ip, env, call_node))
+                            env = Environment(parent=env)
+                        else:
+                            # Reuse the current frame; the callee returns straight to our caller
+                            parent = env.parent
+                            if type(parent) is TailScope:
+                                parent.vars.update(env.vars)
+                            else:
+                                parent = TailScope(env, parent)
+                            env = Environment(parent=parent)
+                        for param, value in zip(declaration.params, args):
+                            env.define(param, value)
+                        code_object = func.code_object
+                        code = code_object.code
+                        constants = code_object.constants
+                        names = code_object.names
+                        ip = 0
+                    else:
+                        interpreter.current_env = env
+                        try:
+                            if debugger:
+                                debugger.before_function_call(func, args)
+                            push(func(*args))
+                        except Exception as e:
+                            raise RuntimeError(f"Error calling function '{call_node.name.name}': {e}")
+                        if op == tail_call:
+                            # Tail calls are only compiled inside functions, so this frame returns a value
+                            value = pop()
+                            if not frames:
+                                return value
+                            code_object, ip, env, _ = frames.pop()
+                            code = code_object.code
+                            constants = code_object.constants
+                            names = code_object.names
+                            push(value)
+                elif op == return_:
+                    if not frames:
+                        if code_object.is_function:
+                            return pop()
+                        raise ReturnException(pop())
+                    value = pop()
+                    code_object, ip, env, _ = frames.pop()
+                    code = code_object.code
+                    constants = code_object.constants
+                    names = code_object.names
+                    push(value)
+                elif op == pop_:
+                    pop()
+                elif op == define_name:
+                    env.define(names[arg], pop())
+                elif op == push_scope:
+                    env = Environment(parent=env)
+                elif op == pop_scope:
+                    env = env.parent
+                elif op == store_index:
+                    value = pop()
+                    index = pop()
+                    array = pop()
+                    array_name = names[arg]
+                    if not isinstance(array, list):
+                        raise TypeError(f"Variable '{array_name}' is not an array.")
+                    if not isinstance(index, int):
+                        raise TypeError("Array index must be an integer.")
+                    if index < 0 or index >= len(array):
+                        raise IndexError("Array index out of bounds.")
+                    array[index] = value
+                    env.set(array_name, array)
+                elif op == store_list_index:
+                    value = pop()
+                    index = pop()
+                    array = pop()
+                    if index < 0 or index >= len(array):
+                        raise IndexError("Array index out of bounds.")
+                    array[index] = value
+                    env.set(names[arg], array)
+                elif op == unary_not:
+                    push(not pop())
+                elif op == build_list:
+                    if arg:
+                        values = stack[-arg:]
+                        del stack[-arg:]
+                    else:
+                        values = []
+                    push(values)
+                elif op == print_:
+                    output(pop())
+                elif op == make_function:
+                    declaration, function_code = constants[arg]
+                    env.define(declaration.name, VMFunction(declaration, function_code, self))
+                elif op == eval_node:
+                    interpreter.current_env = env
+                    push(interpreter.evaluate(constants[arg]))
+                elif op == exec_node:
+                    interpreter.current_env = env
+                    node = constants[arg]
+                    interpreter.exec_handlers[type(node)](node)
+                elif op == breakpoint_:
+                    interpreter.current_env = env
+                    debugger.check_breakpoint(constants[arg])
+                elif op == halt:
+                    return None
+                else:
+                    raise RuntimeError(f'Unknown opcode: {op}')
+        except Exception as e:
+            # Unwind VM-managed frames, wrapping the error once per active call like call_function does
+            while frames:
+                call_node = frames.pop()[3]
+                e = RuntimeError(f"Error calling function '{call_node.name.name}': {e}")
+            raise e